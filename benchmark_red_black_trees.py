@@ -0,0 +1,578 @@
+"""
+Benchmarks for Red_Black_Tree, compared against the standard library
+structures that are usually used in its place: a sorted list kept with
+bisect, a dict and a heap kept with heapq. The read-only operations are also
+timed on the tree's Eytzinger export (see Red_Black_Tree.eytzinger),
+Retroactive_Priority_Queue is timed against replaying the whole history
+after every retroactive Insert, DeleteMin and Remove, and
+Concurrent_Red_Black_Tree is timed searching for every key split between 1,
+2, 4 and 8 threads.
+
+The concurrent searches do not show read throughput scaling with the number
+of threads on CPython: its global interpreter lock runs one thread's Python
+code at a time, so however many readers the Readers_Writer_Lock lets in, the
+searches still run one after another. On CPython 3.11 (on one core), the
+searches for 100000 keys took 0.66s, 0.52s, 0.57s and 0.68s with 1, 2, 4 and
+8 threads, against 0.20s for Red_Black_Tree.Search with no lock at all. The
+thread counts only give different times on an interpreter without the lock
+(such as a free-threaded build), which is what these benchmarks are there to
+compare.
+
+Each operation is timed on key streams of several shapes and sizes, and the
+best time of a few repeats is written to a JSON file. Passing a previous
+results file as a baseline prints the ratio of every time to its baseline and
+exits with status 1 if any of them has slowed down by more than the tolerance.
+
+Usage:
+  python benchmark_red_black_trees.py --sizes 1000 100000 --output results.json
+  python benchmark_red_black_trees.py --baseline results.json
+  python benchmark_red_black_trees.py --sizes 1000000 --streams random --structures retroactive_pq --operations retroactive
+  python benchmark_red_black_trees.py --structures concurrent --operations read_threads_1 read_threads_2 read_threads_4 read_threads_8
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from itertools import accumulate
+
+from red_black_trees import Concurrent_Red_Black_Tree, Red_Black_Tree, Retroactive_Priority_Queue
+
+STREAMS = ['sequential', 'random', 'zipfian', 'adversarial']
+STRUCTURES = ['red_black_tree', 'eytzinger', 'bisect', 'dict', 'heapq', 'retroactive_pq', 'replay', 'concurrent']
+
+# The numbers of threads the concurrent searches are split between
+THREADS = [1, 2, 4, 8]
+
+OPERATIONS = ['insert', 'search', 'successor', 'iterate', 'delete', 'retroactive'] + [f'read_threads_{k}' for k in THREADS]
+
+################## Key Streams ######################
+
+def make_stream(kind : str, n : int, seed : int) -> list:
+  """
+  Returns a list of n keys of the given kind. The same kind, size and seed
+  always give the same keys.
+
+  Parameters
+  ----------
+  kind : str
+    One of STREAMS:
+      sequential  : 0, 1, ..., n-1
+      random      : a random permutation of 0, ..., n-1
+      zipfian     : n keys drawn from 0, ..., n-1 with a Zipf distribution
+                    (exponent 1.1), so a few keys repeat very often
+      adversarial : n-1, 0, n-2, 1, ..., which keeps inserting at both ends
+                    of the key range (the worst case for a sorted list, and
+                    a steady stream of fixups for the tree)
+  n : int
+    The number of keys.
+  seed : int
+    The seed of the random number generator.
+
+  Returns
+  -------
+  list
+    The keys.
+
+  """
+
+  rng = random.Random(f"{kind}-{n}-{seed}")
+
+  if kind == 'sequential':
+    return list(range(n))
+
+  if kind == 'random':
+    keys = list(range(n))
+    rng.shuffle(keys)
+    return keys
+
+  if kind == 'zipfian':
+    # Key k has probability proportional to 1 / (k + 1)^1.1, so key 0 is the
+    # most common. The keys are then relabeled at random, so the common keys
+    # are spread over the key range.
+    weights = accumulate(1 / (k + 1) ** 1.1 for k in range(n))
+    ranks = rng.choices(range(n), cum_weights=list(weights), k=n)
+    labels = list(range(n))
+    rng.shuffle(labels)
+    return [labels[r] for r in ranks]
+
+  if kind == 'adversarial':
+    keys = []
+    lo, hi = 0, n - 1
+    while lo <= hi:
+      keys.append(hi)
+      if lo < hi:
+        keys.append(lo)
+      lo, hi = lo + 1, hi - 1
+    return keys
+
+  raise ValueError(f"Unknown stream {kind!r}, expected one of {STREAMS}")
+
+################## Operations ######################
+
+# Each function below takes the keys of a stream and returns a function that
+# performs one operation on every key, so that only the operation itself is
+# timed. The structure the operation needs is built before that function is
+# returned. A structure that does not support an operation has no entry.
+
+def tree_insert(keys):
+  def run():
+    t = Red_Black_Tree()
+    for k in keys:
+      t.Insert(k)
+  return run
+
+def tree_search(keys):
+  t = Red_Black_Tree.from_sorted(keys, sort=True)
+  probes = shuffled(keys)
+  def run():
+    for k in probes:
+      t.Search(t.root, k)
+  return run
+
+def tree_successor(keys):
+  t = Red_Black_Tree.from_sorted(keys, sort=True)
+  def run():
+    x = t.Minimum(t.root)
+    while x != t.nil:
+      x = t.Successor(x)
+  return run
+
+def tree_iterate(keys):
+  t = Red_Black_Tree.from_sorted(keys, sort=True)
+  def run():
+    for k in t:
+      pass
+  return run
+
+def tree_delete(keys):
+  t = Red_Black_Tree.from_sorted(keys, sort=True)
+  def run():
+    for k in keys:
+      t.Delete(k)
+  return run
+
+def eytzinger_search(keys):
+  e = Red_Black_Tree.from_sorted(keys, sort=True).eytzinger()
+  probes = shuffled(keys)
+  def run():
+    for k in probes:
+      e.Search(k)
+  return run
+
+def eytzinger_successor(keys):
+  # Steps from each position to the next, as tree_successor does with nodes
+  e = Red_Black_Tree.from_sorted(keys, sort=True).eytzinger()
+  def run():
+    i = e.First()
+    while i != 0:
+      i = e.Next(i)
+  return run
+
+def eytzinger_iterate(keys):
+  e = Red_Black_Tree.from_sorted(keys, sort=True).eytzinger()
+  def run():
+    for k in e:
+      pass
+  return run
+
+def bisect_insert(keys):
+  def run():
+    a = []
+    for k in keys:
+      bisect.insort(a, k)
+  return run
+
+def bisect_search(keys):
+  a = sorted(keys)
+  probes = shuffled(keys)
+  def run():
+    for k in probes:
+      i = bisect.bisect_left(a, k)
+      i < len(a) and a[i] == k
+  return run
+
+def bisect_successor(keys):
+  a = sorted(keys)
+  def run():
+    for i in range(len(a)):
+      a[i]
+  return run
+
+def bisect_iterate(keys):
+  a = sorted(keys)
+  def run():
+    for k in a:
+      pass
+  return run
+
+def bisect_delete(keys):
+  a = sorted(keys)
+  def run():
+    for k in keys:
+      del a[bisect.bisect_left(a, k)]
+  return run
+
+def dict_insert(keys):
+  def run():
+    d = {}
+    for k in keys:
+      d[k] = k
+  return run
+
+def dict_search(keys):
+  d = dict.fromkeys(keys)
+  probes = shuffled(keys)
+  def run():
+    for k in probes:
+      k in d
+  return run
+
+def dict_iterate(keys):
+  # A dict is not ordered by key, so sorted iteration has to sort it first
+  d = dict.fromkeys(keys)
+  def run():
+    for k in sorted(d):
+      pass
+  return run
+
+def dict_delete(keys):
+  d = dict.fromkeys(keys)
+  def run():
+    for k in keys:
+      d.pop(k, None)
+  return run
+
+def heapq_insert(keys):
+  def run():
+    h = []
+    for k in keys:
+      heapq.heappush(h, k)
+  return run
+
+def heapq_delete(keys):
+  # A heap can only delete its minimum, so this pops every key
+  h = list(keys)
+  heapq.heapify(h)
+  def run():
+    while h:
+      heapq.heappop(h)
+  return run
+
+def retroactive_pq_retroactive(keys):
+  ops = retroactive_operations(keys)
+  def run():
+    q = Retroactive_Priority_Queue()
+    for kind, t, key in ops:
+      if kind == 'insert':
+        q.Insert(t, key)
+      elif kind == 'delete_min':
+        q.DeleteMin(t)
+      else:
+        q.Remove(t)
+      q.GetMin()
+  return run
+
+def replay_retroactive(keys):
+  # Keeps the history as a sorted list of (time, key) pairs, with the key
+  # None for a DeleteMin, and replays all of it with heapq after every change
+  # to find the minimum now
+  ops = retroactive_operations(keys)
+  def run():
+    history = []
+    for kind, t, key in ops:
+      if kind == 'remove':
+        del history[bisect.bisect_left(history, (t,))]
+      else:
+        bisect.insort(history, (t, key))
+      h = []
+      for _, key in history:
+        if key is None:
+          heapq.heappop(h)
+        else:
+          heapq.heappush(h, key)
+      h[0] if h else None
+  return run
+
+def retroactive_operations(keys : list) -> list:
+  """
+  Returns one retroactive priority queue operation per key, as a (kind,
+  time, key) triple, where kind is 'insert', 'delete_min' or 'remove' (of
+  the operation at that time) and key is None for the last two. Out of every
+  six operations:
+    
+    - three insert a distinct key at a time in [0, n) taken from the stream,
+      so the shape of the stream decides how far back they go
+    - one is a DeleteMin at a time in [n, 2n) taken from the stream, so it
+      usually goes in among the DeleteMins already in the history
+    - one removes an earlier insertion and one an earlier DeleteMin, both
+      picked at random (or inserts a key instead, if there is nothing it can
+      remove)
+  
+  Every DeleteMin comes after every insertion, and the history always has
+  more insertions than DeleteMins, so the queue is never empty at a
+  DeleteMin.
+  """
+
+  n = len(keys)
+  rng = random.Random(n)
+  labels = list(range(n))
+  rng.shuffle(labels)
+
+  ops = []
+  inserts = []
+  deletes = []
+  for i, k in enumerate(keys):
+    step = i % 6
+
+    # i / n keeps the times distinct when the stream repeats a key
+    if step == 3:
+      t = n + k + i / n
+      deletes.append(t)
+      ops.append(('delete_min', t, None))
+    elif step == 4 and len(inserts) > len(deletes) + 1:
+      ops.append(('remove', pop_random(inserts, rng), None))
+    elif step == 5 and deletes:
+      ops.append(('remove', pop_random(deletes, rng), None))
+    else:
+      t = k + i / n
+      inserts.append(t)
+      ops.append(('insert', t, labels[i]))
+  return ops
+
+def pop_random(times : list, rng : random.Random):
+  """
+  Removes a random time from the list in O(1) time and returns it.
+  """
+
+  i = rng.randrange(len(times))
+  times[i], times[-1] = times[-1], times[i]
+  return times.pop()
+
+def concurrent_read(threads : int):
+  # Returns the benchmark that searches for every key with the searches split
+  # evenly between the threads, so the time falls as read throughput scales
+  # with the number of threads
+  def benchmark(keys):
+    c = Concurrent_Red_Black_Tree(Red_Black_Tree.from_sorted(keys, sort=True))
+    probes = shuffled(keys)
+    chunks = [probes[i::threads] for i in range(threads)]
+    def read(probes):
+      for k in probes:
+        c.Search(k)
+    def run():
+      workers = [threading.Thread(target=read, args=(probes,)) for probes in chunks]
+      for w in workers:
+        w.start()
+      for w in workers:
+        w.join()
+    return run
+  return benchmark
+
+def shuffled(keys : list) -> list:
+  """
+  Returns the keys in a fixed random order, used as search probes so that
+  searches do not simply follow the order the keys were inserted in.
+  """
+
+  probes = list(keys)
+  random.Random(len(keys)).shuffle(probes)
+  return probes
+
+BENCHMARKS = {
+  ('red_black_tree', 'insert') : tree_insert,
+  ('red_black_tree', 'search') : tree_search,
+  ('red_black_tree', 'successor') : tree_successor,
+  ('red_black_tree', 'iterate') : tree_iterate,
+  ('red_black_tree', 'delete') : tree_delete,
+  ('eytzinger', 'search') : eytzinger_search,
+  ('eytzinger', 'successor') : eytzinger_successor,
+  ('eytzinger', 'iterate') : eytzinger_iterate,
+  ('bisect', 'insert') : bisect_insert,
+  ('bisect', 'search') : bisect_search,
+  ('bisect', 'successor') : bisect_successor,
+  ('bisect', 'iterate') : bisect_iterate,
+  ('bisect', 'delete') : bisect_delete,
+  ('dict', 'insert') : dict_insert,
+  ('dict', 'search') : dict_search,
+  ('dict', 'iterate') : dict_iterate,
+  ('dict', 'delete') : dict_delete,
+  ('heapq', 'insert') : heapq_insert,
+  ('heapq', 'delete') : heapq_delete,
+  ('retroactive_pq', 'retroactive') : retroactive_pq_retroactive,
+  ('replay', 'retroactive') : replay_retroactive,
+  **{('concurrent', f'read_threads_{k}') : concurrent_read(k) for k in THREADS},
+}
+
+# Inserting into or deleting from a sorted list moves O(n) keys each time, so
+# these take O(n^2) time in total and are skipped above max_quadratic keys
+QUADRATIC = {('bisect', 'insert'), ('bisect', 'delete')}
+
+# Replaying the history after every change takes O(n^2 lg(n)) time in total,
+# so it is skipped above max_replay operations
+REPLAY = {('replay', 'retroactive')}
+
+################## Running and Comparing ######################
+
+def run_benchmarks(sizes : list, streams : list = STREAMS, structures : list = STRUCTURES, operations : list = OPERATIONS, repeat : int = 3, seed : int = 0, max_quadratic : int = 100000, max_replay : int = 2000, log = None) -> dict:
+  """
+  Times every combination of structure, operation, stream and size.
+
+  Parameters
+  ----------
+  sizes : list
+    The numbers of keys to benchmark.
+  streams : list, optional
+    The key streams to use (see make_stream). The default is STREAMS.
+  structures : list, optional
+    The structures to benchmark. The default is STRUCTURES.
+  operations : list, optional
+    The operations to benchmark. The default is OPERATIONS.
+  repeat : int, optional
+    How many times to time each benchmark; the best time is kept. The
+    default is 3.
+  seed : int, optional
+    The seed for the key streams. The default is 0.
+  max_quadratic : int, optional
+    The largest size at which the quadratic sorted-list benchmarks are run.
+    The default is 100000.
+  max_replay : int, optional
+    The largest size at which the naive replay of a retroactive history is
+    run. The default is 2000.
+  log : file, optional
+    Where to print progress, if anywhere. The default is None.
+
+  Returns
+  -------
+  dict
+    The results, with a "meta" entry describing the run and a "results"
+    entry mapping "structure/operation/stream/size" to the best time in
+    seconds (or None for skipped benchmarks).
+
+  """
+
+  results = {}
+  for n in sizes:
+    for kind in streams:
+      keys = make_stream(kind, n, seed)
+      for structure in structures:
+        for operation in operations:
+          if (structure, operation) not in BENCHMARKS:
+            continue
+
+          name = f"{structure}/{operation}/{kind}/{n}"
+          if ((structure, operation) in QUADRATIC and n > max_quadratic) or ((structure, operation) in REPLAY and n > max_replay):
+            results[name] = None
+            continue
+
+          # Every repeat gets a freshly built structure, since inserts and
+          # deletes change it
+          best = None
+          for _ in range(repeat):
+            run = BENCHMARKS[structure, operation](keys)
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+          results[name] = best
+          if log is not None:
+            print(f"{name:45s} {best:10.4f}s", file=log)
+
+  return {
+    'meta' : {
+      'python' : sys.version,
+      'implementation' : platform.python_implementation(),
+      'platform' : platform.platform(),
+      'processor' : platform.processor(),
+      'sizes' : sizes,
+      'streams' : streams,
+      'repeat' : repeat,
+      'seed' : seed,
+      'max_quadratic' : max_quadratic,
+      'max_replay' : max_replay,
+    },
+    'results' : results,
+  }
+
+def compare(current : dict, baseline : dict, tolerance : float = 0.1) -> list:
+  """
+  Compares two sets of results (as returned by run_benchmarks).
+
+  Parameters
+  ----------
+  current : dict
+    The new results.
+  baseline : dict
+    The results to compare against.
+  tolerance : float, optional
+    How much slower than the baseline a benchmark may be before it counts as
+    a regression, as a fraction. The default is 0.1 (10% slower).
+
+  Returns
+  -------
+  list
+    A (name, baseline time, current time, ratio, regressed) tuple for every
+    benchmark timed in both, in sorted order of name.
+
+  """
+
+  rows = []
+  for name in sorted(current['results']):
+    new = current['results'][name]
+    old = baseline['results'].get(name)
+    if new is None or old is None:
+      continue
+    ratio = new / old if old > 0 else float('inf')
+    rows.append((name, old, new, ratio, ratio > 1 + tolerance))
+  return rows
+
+def main(argv : list = None) -> int:
+  """
+  Runs the benchmarks from the command line (see the module docstring) and
+  returns the exit status.
+  """
+
+  parser = argparse.ArgumentParser(description="Benchmark Red_Black_Tree against its Eytzinger export, bisect, dict and heapq, Retroactive_Priority_Queue against naive replay, and concurrent reads at several thread counts.")
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="numbers of keys (default: 1000 10000 100000)")
+  parser.add_argument('--streams', nargs='+', choices=STREAMS, default=STREAMS, help="key streams to use")
+  parser.add_argument('--structures', nargs='+', choices=STRUCTURES, default=STRUCTURES, help="structures to benchmark")
+  parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS, help="operations to benchmark")
+  parser.add_argument('--repeat', type=int, default=3, help="timings per benchmark, the best is kept (default: 3)")
+  parser.add_argument('--seed', type=int, default=0, help="seed for the key streams (default: 0)")
+  parser.add_argument('--max-quadratic', type=int, default=100000, help="largest size for the O(n^2) sorted-list benchmarks (default: 100000)")
+  parser.add_argument('--max-replay', type=int, default=2000, help="largest size for the naive replay of a retroactive history (default: 2000)")
+  parser.add_argument('--output', help="file to write the results to as JSON")
+  parser.add_argument('--baseline', help="JSON results file to compare against")
+  parser.add_argument('--tolerance', type=float, default=0.1, help="slowdown counted as a regression (default: 0.1)")
+  args = parser.parse_args(argv)
+
+  current = run_benchmarks(args.sizes, args.streams, args.structures, args.operations, args.repeat, args.seed, args.max_quadratic, args.max_replay, log=sys.stdout)
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(current, f, indent=2, sort_keys=True)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)
+
+    rows = compare(current, baseline, args.tolerance)
+    print()
+    print(f"{'benchmark':45s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}")
+    for name, old, new, ratio, regressed in rows:
+      print(f"{name:45s} {old:10.4f} {new:10.4f} {ratio:7.2f}{'  REGRESSION' if regressed else ''}")
+
+    regressions = sum(regressed for *_, regressed in rows)
+    print(f"\n{regressions} of {len(rows)} benchmarks slower than the baseline by more than {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
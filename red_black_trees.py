@@ -1,6 +1,53 @@
+import bisect
+import heapq
+import mmap
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+from itertools import chain, repeat, starmap
+from operator import attrgetter
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
 BLACK = 0
 RED   = 1
 
+INFINITY = float('inf')
+
+# The counts kept by Red_Black_Tree.stats
+STATS = ('left_rotations', 'right_rotations',
+         'insert_case_1', 'insert_case_2', 'insert_case_3',
+         'delete_case_1', 'delete_case_2', 'delete_case_3', 'delete_case_4',
+         'comparisons', 'searches', 'search_path_length',
+         'max_search_path_length', 'inserts', 'insert_path_length')
+
+# The format written by Red_Black_Tree.dump: a header of the magic bytes, the
+# typecode of the keys, padding and the number of keys, then the keys
+FILE_MAGIC = b'RBTK'
+FILE_HEADER = '<4sc3xQ'
+FILE_HEADER_SIZE = struct.calcsize(FILE_HEADER)
+FILE_TYPECODES = ('q', 'd')
+
+def Read_Header(header : bytes, path : str) -> tuple:
+  """
+  Checks the header of a file written by Red_Black_Tree.dump and returns the
+  typecode and number of its keys, raising a ValueError if it is not one.
+  """
+  
+  if len(header) != FILE_HEADER_SIZE:
+    raise ValueError(f"{path} is not a Red Black Tree file")
+  
+  magic, typecode, n = struct.unpack(FILE_HEADER, header)
+  typecode = typecode.decode()
+  if magic != FILE_MAGIC or typecode not in FILE_TYPECODES:
+    raise ValueError(f"{path} is not a Red Black Tree file")
+  return typecode, n
+
 # A node in a Red Black Tree as presented in the CLRS textbook
 class Red_Black_Node:
   """
@@ -12,8 +59,16 @@ class Red_Black_Node:
     right : The node's right child
     p     : The node's parent
     color : The node's color (either RED or BLACK)
+  
+  The attributes are declared in __slots__, so a node carries no per-instance
+  __dict__. This matters for large trees, where the dictionary would take up
+  most of the node's memory. The color is one of the small integers BLACK or
+  RED, which Python shares between all nodes, so each node only stores a
+  reference to it.
   """
   
+  __slots__ = ('key', 'left', 'right', 'p', 'color')
+  
   def __init__(self, key : int):
     """
     Initializes the key to the value passed to the constructor and initializes
@@ -45,6 +100,41 @@ class Red_Black_Node:
     # Color (Red or Black)
     self.color = None
 
+# A node in a Red Black Tree with a key function
+class Keyed_Red_Black_Node(Red_Black_Node):
+  """
+  A node in a Red_Black_Tree created with a key function. In addition to the
+  attributes of a Red_Black_Node, the node has:
+    
+    item : The item stored in the node, whose sort key (computed once, when
+           the item was inserted) is the node's key
+  """
+  
+  __slots__ = ('item',)
+  
+  def __init__(self, key, item = None):
+    """
+    Initializes the key and item to the values passed to the constructor and
+    initializes all other values to None.
+
+    Parameters
+    ----------
+    key
+      The sort key of the item.
+    item : optional
+      The item stored in the node. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    
+    # The item stored under the key
+    self.item = item
+
 # A Red Black Tree as presented in the CLRS textbook
 class Red_Black_Tree:
   """
@@ -60,9 +150,56 @@ class Red_Black_Tree:
        contain the same number of black nodes
   """
   
-  def __init__(self):
+  # The class of the tree's nodes (including the sentinel T.nil). Trees that
+  # augment their nodes with extra attributes override this.
+  Node = Red_Black_Node
+  
+  # The counters kept while stats are enabled (see enable_stats), or None.
+  # Every counting site checks this first, so a tree that is not counting
+  # pays one comparison per search, rotation or fixup.
+  counters = None
+  
+  # The key function given to the constructor, or None
+  key_function = None
+  
+  # The array of keys returned by freeze, or None
+  frozen = None
+  
+  # The attributes of a node that are saved when the tree is pickled or copied
+  # (see __getstate__), in the order the node's constructor takes them. The
+  # links, colors and any attributes that Build recomputes are left out.
+  Node_Fields = ('key',)
+  
+  def __init__(self, key = None):
     """
     Creates sentinel leaf (called T.nil in CLRS) and sets root equal to it
+    
+    Like sorted, the tree can be given a key function that maps the items
+    stored in it to the keys they are ordered by. Each item's key is computed
+    once, when it is inserted, and kept in its node (a Keyed_Red_Black_Node)
+    next to the item, so that searches compare the stored keys and never call
+    the key function. In such a tree:
+      
+      - Insert, InsertMany, from_sorted, Join's pivot and
+        Red_Black_Cursor.insert_here take items.
+      - Search, Delete and DeleteMany take either a precomputed key or, as
+        item=, an item whose key is computed first. Split, Range, Cursor,
+        Red_Black_Cursor.seek and the in operator take keys.
+      - Iteration and Range yield the items, in order of their keys.
+
+    Parameters
+    ----------
+    key : callable, optional
+      The key function, which takes an item and returns its key. The default
+      is None, which stores the keys themselves. A key function can only be
+      used with trees of Red_Black_Nodes, and must be picklable for the tree
+      to be pickled.
+
+    Raises
+    ------
+    TypeError
+      If a key function is given to a tree whose nodes are not
+      Red_Black_Nodes.
 
     Returns
     -------
@@ -70,8 +207,17 @@ class Red_Black_Tree:
 
     """
     
+    # The function computing the key of each item, or None if the items are
+    # the keys
+    self.key_function = key
+    if key is not None:
+      if self.Node is not Red_Black_Node:
+        raise TypeError(f"{self.__class__.__name__} does not support a key function")
+      self.Node = Keyed_Red_Black_Node
+      self.Node_Fields = ('key', 'item')
+    
     # Create sentinel T.nil
-    self.nil = Red_Black_Node(None)
+    self.nil = self.Node(None)
     self.nil.left = None
     self.nil.right = None
     self.nil.p = None
@@ -80,11 +226,15 @@ class Red_Black_Tree:
     # Initialize self.root to the sentinel T.nil    
     self.root = self.nil
     self.root.p = self.nil
-    self.root.l = self.nil
-    self.root.r = self.nil
     
     # Some bookeeping information
     self.num_nodes = 0
+    
+    # Stats are off until enable_stats is called
+    self.counters = None
+    
+    # The array of keys returned by freeze, until the tree is next modified
+    self.frozen = None
 
   def isEmpty(self):
     """
@@ -99,8 +249,296 @@ class Red_Black_Tree:
     """
     
     return self.num_nodes
+  
+  def __len__(self):
+    """
+    Returns the number of nodes in the tree, as Size does.
+    """
+    
+    return self.num_nodes
+  
+  def __contains__(self, key) -> bool:
+    """
+    Returns True if a node with the key is in the tree and False otherwise.
+    """
+    
+    return self.Search(self.root, key) != self.nil
+  
+  def __iter__(self):
+    """
+    A generator that yields every key in the tree in sorted order (or every
+    item, if the tree has a key function). It walks the tree with an explicit
+    stack, as Range does, so it visits each node once instead of calling
+    Minimum and then Successor for every key. The tree must not be modified
+    while the generator is in use.
+    """
+    
+    keyed = self.key_function is not None
+    nil = self.nil
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    x = self.root
+    while True:
+      while x is not nil:
+        push(x)
+        x = x.left
+      if not stack:
+        return
+      x = pop()
+      yield x.item if keyed else x.key
+      x = x.right
+  
+  def __reversed__(self):
+    """
+    A generator that yields every key in the tree from largest to smallest,
+    the mirror image of __iter__.
+    """
+    
+    keyed = self.key_function is not None
+    nil = self.nil
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    x = self.root
+    while True:
+      while x is not nil:
+        push(x)
+        x = x.right
+      if not stack:
+        return
+      x = pop()
+      yield x.item if keyed else x.key
+      x = x.left
+  
+  def __reduce__(self):
+    """
+    Tells pickle and copy to rebuild the tree by calling its class with no
+    arguments and passing the result of __getstate__ to __setstate__, rather
+    than following every node's left, right and p references recursively.
+    """
+    
+    return (self.__class__, (), self.__getstate__())
+  
+  def __getstate__(self) -> dict:
+    """
+    Returns the tree's state for pickle and copy: its attributes other than
+    the nodes, and under 'nodes' one list for each attribute in Node_Fields,
+    holding that attribute of every node in sorted order. The links and colors
+    of the nodes are not kept, since __setstate__ rebuilds a balanced tree
+    from the sorted nodes in O(n) time.
+    """
+    
+    state = self.__dict__.copy()
+    del state['nil'], state['root'], state['num_nodes'], state['frozen']
+    
+    nodes = self.Nodes()
+    state['nodes'] = [list(map(attrgetter(field), nodes)) for field in self.Node_Fields]
+    return state
+  
+  def __setstate__(self, state : dict) -> None:
+    """
+    Restores a state returned by __getstate__ into a new, empty tree, creating
+    a node from each entry of the lists in state['nodes'] and linking them
+    with Build.
+    """
+    
+    state = state.copy()
+    columns = state.pop('nodes')
+    self.__dict__.update(state)
+    
+    # A shallow copy shares the state's dictionaries, so the counters are
+    # copied to keep the two trees' stats apart
+    if self.counters is not None:
+      self.counters = dict(self.counters)
+    
+    Node = self.Node
+    if len(columns) == 1:
+      nodes = [Node(key) for key in columns[0]]
+    else:
+      nodes = [Node(*fields) for fields in zip(*columns)]
+    self.Build(nodes)
+
+  def enable_stats(self) -> None:
+    """
+    Starts counting what the tree does, from zero (see stats).
+    """
+    
+    self.counters = dict.fromkeys(STATS, 0)
+  
+  def disable_stats(self) -> None:
+    """
+    Stops counting and discards the counts.
+    """
+    
+    self.counters = None
+  
+  def reset_stats(self) -> None:
+    """
+    Sets every count back to zero, if stats are enabled.
+    """
+    
+    if self.counters is not None:
+      self.counters.update(dict.fromkeys(STATS, 0))
+  
+  def stats(self) -> dict:
+    """
+    Returns a copy of the counts since stats were enabled or last reset, or an
+    empty dictionary if stats are not enabled. The counts are:
+      
+      left_rotations, right_rotations : Calls to Left_Rotate and Right_Rotate
+      insert_case_1 to insert_case_3  : Passes through each case of
+                                        Insert_Fixup (see CLRS)
+      delete_case_1 to delete_case_4  : Passes through each case of
+                                        Delete_Fixup (see CLRS)
+      comparisons                     : Key comparisons made by Search and by
+                                        Insert_Node's descent
+      searches, search_path_length    : Calls to Search and the total number
+                                        of nodes they visited
+      max_search_path_length          : The most nodes visited by one Search
+      inserts, insert_path_length     : Calls to Insert_Node and the total
+                                        number of nodes their descents visited
+    
+    Trees created from this one by Split share its counts.
+    """
+    
+    return dict(self.counters) if self.counters is not None else {}
+  
+  @classmethod
+  def from_sorted(cls, keys, sort : bool = False, key = None) -> 'Red_Black_Tree':
+    """
+    Builds a tree from keys in O(n) time, without calling Insert (see Build).
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to put in the tree, in non-decreasing order (or the items, in
+      non-decreasing order of their keys, if key is given).
+    sort : bool, optional
+      If True, keys are sorted first (in O(n lg(n)) time). The default is
+      False.
+    key : callable, optional
+      The tree's key function (see __init__). The default is None.
+
+    Raises
+    ------
+    ValueError
+      If sort is False and keys are not in non-decreasing order.
+
+    Returns
+    -------
+    Red_Black_Tree
+      A tree containing every key in keys.
+
+    """
+
+    t = cls() if key is None else cls(key=key)
+    
+    if key is None:
+      keys = sorted(keys) if sort else list(keys)
+      nodes = [t.Node(k) for k in keys]
+    else:
+      nodes = list(map(t.Item_Node, keys))
+      if sort:
+        nodes.sort(key=attrgetter('key'))
+      keys = [x.key for x in nodes]
+
+    for i in range(1, len(keys)):
+      if keys[i] < keys[i-1]:
+        raise ValueError("from_sorted() requires keys in non-decreasing order (pass sort=True to sort them)")
+
+    t.Build(nodes)
+
+    return t
+  
+  def dump(self, path : str, typecode : str = 'q') -> None:
+    """
+    Writes the tree's keys to a file in sorted order, in a fixed-width binary
+    format: a 16-byte header (the magic bytes FILE_MAGIC, the typecode, three
+    bytes of padding and the number of keys as a little-endian 64-bit
+    integer), followed by the keys as a little-endian array of the typecode
+    (see the array module). The tree's shape is not stored, since load can
+    rebuild a balanced tree from the sorted keys in O(n) time.
+    
+    Only the keys are written, so other node attributes (such as the values
+    of a Red_Black_Map) are not saved.
+
+    Parameters
+    ----------
+    path : str
+      The file to write.
+    typecode : str, optional
+      The array typecode to store the keys as, which must be one of 'q'
+      (signed 64-bit integers) or 'd' (64-bit floats). The default is 'q'.
+
+    Raises
+    ------
+    ValueError
+      If the typecode is not supported.
+    TypeError
+      If a key cannot be stored as the typecode.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if typecode not in FILE_TYPECODES:
+      raise ValueError(f"Unsupported typecode {typecode!r}, expected one of {FILE_TYPECODES}")
+    
+    keys = array(typecode, self if self.key_function is None else self.Keys())
+    if sys.byteorder != 'little':
+      keys.byteswap()
+    
+    with open(path, 'wb') as f:
+      f.write(struct.pack(FILE_HEADER, FILE_MAGIC, typecode.encode(), len(keys)))
+      keys.tofile(f)
+  
+  @classmethod
+  def load(cls, path : str, mmap : bool = True):
+    """
+    Reads a file written by dump.
+    
+    With mmap=True, the file is memory-mapped and returned as a
+    Mapped_Red_Black_Tree, which answers Search, Range and Select by binary
+    search directly on the mapped keys, so loading takes the same short time
+    for any number of keys and no nodes are created. With mmap=False, the keys
+    are read and a tree of this class is built from them in O(n) time.
+
+    Parameters
+    ----------
+    path : str
+      The file to read.
+    mmap : bool, optional
+      Whether to memory-map the file instead of building a tree. The default
+      is True.
+
+    Raises
+    ------
+    ValueError
+      If the file was not written by dump.
+
+    Returns
+    -------
+    Mapped_Red_Black_Tree or Red_Black_Tree
+      The loaded keys.
+
+    """
+    
+    if mmap:
+      return Mapped_Red_Black_Tree(path)
+    
+    with open(path, 'rb') as f:
+      typecode, n = Read_Header(f.read(FILE_HEADER_SIZE), path)
+      keys = array(typecode)
+      keys.fromfile(f, n)
+    if sys.byteorder != 'little':
+      keys.byteswap()
+    
+    return cls.from_sorted(keys)
 
-  def Search(self, x : Red_Black_Node, k : int) -> Red_Black_Node:
+  def Search(self, x : Red_Black_Node, k : int = None, item = None) -> Red_Black_Node:
     """
     A performs a classic search through a Binary Search Tree for a node whose
     key is equal to k.
@@ -109,8 +547,11 @@ class Red_Black_Tree:
     ----------
     x : Red_Black_Node
       The root of the subtree to be searched.
-    k : int
+    k : int, optional
       The key that we are searching for
+    item : optional
+      An item to search for instead of k, in a tree with a key function. Its
+      key is computed once, before the search.
 
     Returns
     -------
@@ -120,6 +561,12 @@ class Red_Black_Tree:
 
     """
     
+    if item is not None:
+      k = self.Sort_Key(item)
+    
+    if self.counters is not None:
+      return self.Counted_Search(x, k)
+    
     while x != self.nil and k != x.key:
       if k < x.key:
         x = x.left
@@ -216,190 +663,212 @@ class Red_Black_Tree:
         x = y
         y = y.p
       return y
-  
-  def Insert(self, key : int) -> None:
+
+  def Range(self, lo : int = None, hi : int = None, inclusive : tuple = (True, True), reverse : bool = False):
     """
-    Creates a new node z with the key and inserts it at the appropriate place
-    in the tree, using Insert_Fixup to maintain Red Black properties.
+    Returns an iterator over every key between lo and hi in sorted order (or
+    the item of every such key, if the tree has a key function). It first
+    descends from the root to the first key in the range in O(lg(n)) time,
+    keeping the nodes whose right subtrees still have to be visited on a
+    stack, and then walks the tree in order from there (see Range_Nodes).
+    Each step pops or pushes nodes on that stack rather than climbing parent
+    pointers like Successor, so yielding k keys takes O(lg(n) + k) time in
+    total.
+
+    The tree must not be modified while the iterator is in use.
 
     Parameters
     ----------
-    key : int
-      The key of the node to be inserted in the graph.
+    lo : int, optional
+      The lower end of the range, which does not have to be a key in the tree.
+      The default is None, which means the range has no lower end.
+    hi : int, optional
+      The upper end of the range, which does not have to be a key in the tree.
+      The default is None, which means the range has no upper end.
+    inclusive : tuple, optional
+      A pair of booleans saying whether keys equal to lo and to hi are in the
+      range. The default is (True, True).
+    reverse : bool, optional
+      If True, keys are yielded from largest to smallest. The default is
+      False.
 
     Returns
     -------
-    None
+    iterator
+      The keys in the range.
 
     """
     
-    z = Red_Black_Node(key)
-    
-    y = self.nil
-    x = self.root
-    while x != self.nil:
-      y = x
-      if z.key < x.key:
-        x = x.left
-      else:
-        x = x.right
-    
-    z.p = y
-    
-    if y == self.nil:
-      self.root = z
-    elif z.key < y.key:
-      y.left = z
-    else:
-      y.right = z
-    
-    z.left = self.nil
-    z.right = self.nil
-    z.color = RED
-    
-    self.Insert_Fixup(z)
-    
-    self.num_nodes += 1
-          
-  def Delete(self, key : int) -> None:
+    return self.Node_Values(self.Range_Nodes(lo, hi, inclusive, reverse))
+
+  def Cursor(self, key : int = None) -> 'Red_Black_Cursor':
     """
-    Deletes node z from the tree. Calls Delete_Fixup to maintain Red Black
-    properties.
+    Returns a cursor (see Red_Black_Cursor) at the node with the smallest key
+    that is at least key, or at the node with the minimum key if no key is
+    given.
 
     Parameters
     ----------
-    key : int
-      The key of the node to be deleted.
+    key : int, optional
+      The key to place the cursor at. The default is None.
 
     Returns
     -------
-    None
+    Red_Black_Cursor
+      A cursor in this tree.
 
     """
     
-    z = self.Search(self.root, key)
-    
-    if z == self.nil:
-      return None
-    
-    # Throughout this algorithm, we keep track of z, the node to be deleted,
-    # y, a node that may cause violations of the Red Black properties, and x,
-    # the node that moves into y's original position (and may also cause
-    # violations)
-    y = z
-    y_original_color = y.color
+    c = Red_Black_Cursor(self)
+    if key is not None:
+      c.seek(key)
+    return c
+
+  def freeze(self):
+    """
+    Returns a read-only NumPy array of every key in the tree in sorted order
+    (repeated as in iteration, for a Red_Black_Multiset). The array is built
+    in O(n) time on the first call and kept until the tree is next modified,
+    so later calls, and search_many, contains_many and rank_many, reuse it.
     
-    # If z only has one child, then we want y = z and x = y's child
-    if z.left == self.nil:
-      x = z.right
-      self.Transplant(z, x)
-    elif z.right == self.nil:
-      x = z.left
-      self.Transplant(z, x)
+    Unlike Graph.freeze, the tree itself stays mutable; modifying it only
+    discards the array.
+
+    Raises
+    ------
+    ImportError
+      If NumPy is not installed.
+
+    Returns
+    -------
+    numpy.ndarray
+      The keys.
+
+    """
     
-    # If z has two children, then y should be z's successor. Now y replaces
-    # z in the tree and x replaces y
-    else:
-      y = self.Successor(z)
-      y_original_color = y.color
+    if self.frozen is None:
+      if np is None:
+        raise ImportError("Red_Black_Tree.freeze requires NumPy")
       
-      # A successor cannot have a left child, so we know y will be replaced by
-      # its right child
-      x = y.right
-      
-      # Take care of replacing y with x and z with y
-      if y.p == z:
-        x.p = y
-      else:
-        self.Transplant(y, x)
-        y.right = z.right
-        y.right.p = y
-      self.Transplant(z, y)
-      y.left = z.left
-      y.left.p = y
-      y.color = z.color
+      self.frozen = np.array(list(self) if self.key_function is None else self.Keys())
+      self.frozen.setflags(write=False)
+    return self.frozen
+  
+  def eytzinger(self) -> 'Eytzinger_Red_Black_Tree':
+    """
+    Returns a read-only copy of the tree's keys (or items, if the tree has a
+    key function) packed into a list in Eytzinger order, which answers
+    Search, floor, ceiling and Range without following pointers between
+    nodes (see Eytzinger_Red_Black_Tree). Building it takes O(n) time. Unlike
+    freeze, the copy is not tied to the tree and is not updated when the
+    tree changes.
+    """
     
-    # If y was originally RED, no Red Black violations could have occurred.
-    # We thus only have to fix the tree if y was originally black.
-    if y_original_color == BLACK:
-      self.Delete_Fixup(x)
+    if self.key_function is None:
+      return Eytzinger_Red_Black_Tree(list(self))
     
-    self.num_nodes -= 1
-  
-  ################## Auxiliary Funcntions ######################
+    nodes = self.Nodes()
+    return Eytzinger_Red_Black_Tree([x.key for x in nodes], [x.item for x in nodes])
   
-  def Left_Rotate(self, x : Red_Black_Node) -> None:
+  def search_many(self, keys):
     """
-    Performs a left rotation on node x, assuming that x's right child is not the sentinel.
-    This maintains the Binary Search Tree property, but not necessarily the
-    Red Black Tree properties.
+    Searches for every key in keys at once, with a single call to
+    np.searchsorted on the array returned by freeze.
 
     Parameters
     ----------
-    x : Red_Black_Node
-      The node on which we are performing a left rotation.
+    keys : array_like
+      The keys to search for.
 
     Returns
     -------
-    None
+    numpy.ndarray
+      For each key, the position in freeze() of the first key equal to it,
+      or -1 if there is none.
 
     """
     
-    y = x.right
-    x.right = y.left
-    if y.left != self.nil:
-      y.left.p = x
-    y.p = x.p
-    if x.p == self.nil:
-      self.root = y
-    elif x == x.p.left:
-      x.p.left = y
-    else:
-      x.p.right = y
-    y.left = x
-    x.p = y
+    i, found = self.Search_Frozen(keys)
+    return np.where(found, i, -1)
   
-  def Right_Rotate(self, y : Red_Black_Node) -> None:
+  def contains_many(self, keys):
     """
-    Performs a right rotation on node x, assuming that x's left child is not the sentinel.
-    This maintains the Binary Search Tree property, but not necessarily the
-    Red Black Tree properties.
+    Returns a boolean array saying, for each key in keys, whether it is in the
+    tree (see search_many).
+    """
+    
+    return self.Search_Frozen(keys)[1]
+  
+  def rank_many(self, keys):
+    """
+    Returns an array with the number of keys in the tree that are less than
+    each key in keys (as Order_Statistic_Tree.CountLess), which for a key in
+    the tree is one less than its rank.
+    """
+    
+    return self.Search_Frozen(keys)[0]
+
+  def Insert(self, key : int) -> None:
+    """
+    Creates a new node z with the key and inserts it at the appropriate place
+    in the tree, using Insert_Fixup to maintain Red Black properties.
 
     Parameters
     ----------
-    x : Red_Black_Node
-      The node on which we are performing a right rotation.
+    key : int
+      The key of the node to be inserted in the graph, or the item to be
+      inserted if the tree has a key function.
 
     Returns
     -------
     None
 
     """
+    
+    self.Insert_Node(self.Item_Node(key), self.root)
+  
+  def InsertMany(self, keys) -> int:
+    """
+    Inserts every key in keys. The keys are sorted once first, so that
+    consecutive keys land near each other in the tree:
+      
+      - If the batch is less than half the size of the tree, each key is
+        inserted starting from the node inserted just before it instead of
+        from the root (see Finger).
+      - Otherwise, nodes for the batch are merged with the tree's nodes in
+        one pass and all of them are relinked into a balanced tree with
+        Build.
 
-    x = y.left
-    y.left = x.right
-    if x.right != self.nil:
-      x.right.p = y
-    x.p = y.p
-    if y.p == self.nil:
-      self.root = x
-    elif y == y.p.left:
-      y.p.left = x
-    else:
-      y.p.right = x
-    x.right = y
-    y.p = x
+    Parameters
+    ----------
+    keys : iterable
+      The keys to be inserted (or the items, if the tree has a key function).
+
+    Returns
+    -------
+    int
+      The number of keys inserted. Since the tree allows duplicate keys, this
+      is the number of keys in the batch.
 
-  def Transplant(self, u : Red_Black_Node, v : Red_Black_Node) -> None:
     """
-    Replaces the subtree rooted at node u with the subtree rooted at node v
+    
+    if self.key_function is None:
+      batch = [self.Node(key) for key in sorted(keys)]
+    else:
+      batch = sorted(map(self.Item_Node, keys), key=attrgetter('key'))
+    
+    return self.Insert_Batch(batch)
+  
+  def Delete(self, key : int = None, item = None) -> None:
+    """
+    Deletes a node with the key from the tree, if there is one (see Remove).
 
     Parameters
     ----------
-    u : Red_Black_Node
-      The root of the subtree to be replaced.
-    v : Red_Black_Node
-      The root of the subtree doing the replacing.
+    key : int, optional
+      The key of the node to be deleted.
+    item : optional
+      An item whose key is deleted instead, in a tree with a key function.
 
     Returns
     -------
@@ -407,242 +876,5634 @@ class Red_Black_Tree:
 
     """
     
-    if u.p == self.nil:
-      self.root = v
-    elif u == u.p.left:
-      u.p.left = v
-    else:
-      u.p.right = v
-    v.p = u.p
+    z = self.Search(self.root, key, item)
+    
+    if z == self.nil:
+      return None
+    
+    self.Remove(z)
   
-  def Insert_Fixup(self, z : Red_Black_Node) -> None:
+  def DeleteMany(self, keys, items : bool = False) -> int:
     """
-    Performs a sequence of re-colorings and rotations after an Insert to
-    maintain Red Black properties. Note that insertions may only violate
-    Property 2 or Property 4.
+    Deletes one node for every key in keys that is in the tree. As in
+    InsertMany, the keys are sorted once first. A batch smaller than the tree
+    searches for each key starting near the node deleted just before it. A
+    larger batch is merged with the tree's nodes in one pass and the nodes
+    that are kept are relinked into a balanced tree with Build.
 
     Parameters
     ----------
-    z : Red_Black_Node
-      The node that was inserted.
+    keys : iterable
+      The keys to be deleted.
+    items : bool, optional
+      If True, keys holds items, whose keys are computed first (in a tree
+      with a key function). The default is False.
 
     Returns
     -------
-    None
+    int
+      The number of nodes deleted. Keys not in the tree are not counted.
 
     """
-    # We are only violating Property 2 or 4 if both z and z's parent is RED
-    while z.p.color == RED:
+    
+    keys = sorted(map(self.Sort_Key, keys) if items else keys)
+    
+    # Relinking visits every node in the tree, so it only pays off once the
+    # batch is about as large as the tree
+    if len(keys) >= self.num_nodes:
       
-      # z's uncle is its grandparent's right child
-      if z.p == z.p.p.left:
-        y = z.p.p.right
-        
-        # z, z's parent, and z's uncle are RED, but z's grandparent is BLACK.
-        # We fix this by making z's parent and z's uncle BLACK and z's
-        # grandparent RED, then set z equal to its grandparent. (Case 1 in CLRS)
-        if y.color == RED:
-          z.p.color = BLACK
-          y.color = BLACK
-          z.p.p.color = RED
-          z = z.p.p
-        
-        # z and z's parent are RED, but z's uncle and grandparent are BLACK.
-        else:
-          
-          # z is its parent's right child (Case 2 in CLRS), so we change z
-          # to be its parent and then rotate. Now z is its parent's left child
-          if z == z.p.right:
-            z = z.p
-            self.Left_Rotate(z)
-          
-          # z is its parent's left child (Case 3 in CLRS)
-          z.p.color = BLACK
-          z.p.p.color = RED
-          self.Right_Rotate(z.p.p)
-
-      # z's uncle is its grandparent's left child
-      else: # z.p == z.p.p.right
-        y = z.p.p.left
-        
-        # z, z's parent, and z's uncle are RED, but z's grandparent is BLACK.
-        # We fix this by making z's parent and z's uncle BLACK and z's
-        # grandparent RED, then set z equal to its grandparent. (Case 1 in CLRS)
-        if y.color == RED:
-          z.p.color = BLACK
-          y.color = BLACK
-          z.p.p.color = RED
-          z = z.p.p
-        
-        # z and z's parent are RED, but z's uncle and grandparent are BLACK.
+      # Walk the tree's nodes and the batch together, dropping each node whose
+      # key matches the next batch key
+      kept = []
+      i = 0
+      for x in self.Nodes():
+        while i < len(keys) and keys[i] < x.key:
+          i += 1
+        if i < len(keys) and keys[i] == x.key:
+          i += 1
         else:
-          
-          # z is its parent's left child (Case 2 in CLRS), so we change z
-          # to be its parent and then rotate. Now z is its parent's right child
-          if z == z.p.left:
-            z = z.p
-            self.Right_Rotate(z)
-          
-          # z is its parent's right child (Case 3 in CLRS)
-          z.p.color = BLACK
-          z.p.p.color = RED
-          self.Left_Rotate(z.p.p)
-        
-    self.root.color = BLACK
-  
-  def Delete_Fixup(self, x : Red_Black_Node) -> None:
-    """
-    Performs a sequence of re-colorings and rotations after a Delete to
-    maintain Red Black properties. Note this is only called if y was BLACK. If
-    y was RED, we could not have violated any of the Red Black Tree proeprties:
+          kept.append(x)
       
-      1. Every node is still RED or BLACK.
-      2. If y was RED, it was not the root, so the root remains BLACK.
-      3. y did not replace the sentinel leaf, so all leaves remain BLACK.
-      4. No red nodes are now adjacent. y took on z's color, so the color of
-         that node did not change. If y was RED, then its child x is BLACK, so
-         replacing y with x could not put two RED nodes adjacent to each other.
-      5. Since y was RED, no black heights in the tree have changed.
+      removed = self.num_nodes - len(kept)
+      if removed > 0:
+        self.Build(kept)
+      return removed
     
-    If, however, y was BLACK, several properties could have been violated:
+    removed = 0
+    finger = self.nil
+    for key in keys:
       
-      1. Every node is still RED or BLACK.
-      2. If y was the root node and x is RED, the root is now RED.
-      3. The sentinel leaf is still BLACK.
-      4. If y.p was RED and x is RED, then a RED node now has a RED child.
-      5. Moving y within the tree caused any simple paths containing y to have
-         one fewer BLACK node.
+      x = self.Finger(finger, key) if finger != self.nil else self.root
+      z = self.Search(x, key)
+      
+      if z == self.nil:
+        continue
+      
+      # z's parent stays in the tree, and is close to where the next key is
+      finger = z.p
+      self.Remove(z)
+      removed += 1
+    
+    return removed
+  
+  def DeleteNode(self, z : Red_Black_Node) -> None:
+    """
+    Deletes node z, which the caller already holds (from Search, Minimum, a
+    cursor and so on), without searching for its key again as Delete does
+    (see Remove).
 
     Parameters
     ----------
-    x : Red_Black_Node
-      The node that replaced y in the Delete.
+    z : Red_Black_Node
+      The node to be deleted. It must be a node in the tree.
 
     Returns
     -------
     None
 
     """
+    
+    self.Remove(z)
+  
+  def PopMin(self):
+    """
+    Deletes the node with the smallest key and returns its key (or its item,
+    if the tree has a key function). The descent to the minimum is the only
+    one: the minimum has no left child, so Remove splices it out without
+    looking for its successor.
 
-    # We convert the violation of Property 5 to a violation of Property 1 by
-    # adding y's BLACKness to x. Now x is either RED-BLACK or BLACK-BLACK. We
-    # keep track of this in x.color: if x is RED-BLACK, x.color is RED. If x is
-    # BLACK-BLACK, x.color is BLACK.We continue this while loop until:
-    #   1. x is RED-BLACK, at which point we simply make it BLACK
-    #   2. x is the root node, and we just remove the extra BLACK
-    #   3. We exit because the rotations and re-colorings have
-    #      solved the problem
+    Raises
+    ------
+    IndexError
+      If the tree is empty.
 
-    while x != self.root and x.color == BLACK:
+    Returns
+    -------
+    int
+      The smallest key.
+
+    """
+    
+    if self.root == self.nil:
+      raise IndexError("PopMin from an empty tree")
+    
+    z = self.Minimum(self.root)
+    self.DeleteNode(z)
+    return z.key if self.key_function is None else z.item
+  
+  def PopMax(self):
+    """
+    Deletes the node with the largest key and returns its key (or its item,
+    if the tree has a key function), the mirror image of PopMin.
+
+    Raises
+    ------
+    IndexError
+      If the tree is empty.
+
+    Returns
+    -------
+    int
+      The largest key.
+
+    """
+    
+    if self.root == self.nil:
+      raise IndexError("PopMax from an empty tree")
+    
+    z = self.Maximum(self.root)
+    self.DeleteNode(z)
+    return z.key if self.key_function is None else z.item
+  
+  @staticmethod
+  def Join(left : 'Red_Black_Tree', pivot, right : 'Red_Black_Tree') -> 'Red_Black_Tree':
+    """
+    Joins two trees, where every key in left is at most pivot and every key in
+    right is at least pivot, into one tree containing the keys of both and
+    pivot itself (see CLRS Problem 13-2). The shorter tree (by black height)
+    and a new RED node with the pivot are hung off the side of the taller one,
+    at a BLACK node with the same black height, after which Insert_Fixup
+    repairs the tree. This takes O(lg(n)) time.
+    
+    Both trees are emptied. Trees that came from the same tree through Split
+    share their sentinel leaf, which the result keeps. Joining trees with
+    different sentinels first moves the smaller tree onto the larger tree's
+    sentinel, which takes time proportional to its size.
+
+    Parameters
+    ----------
+    left : Red_Black_Tree
+      The tree with the smaller keys.
+    pivot : int
+      The key added between the two trees. If pivot is None, no key is added,
+      and the minimum node of right is used as the pivot instead.
+    right : Red_Black_Tree
+      The tree with the larger keys.
+
+    Raises
+    ------
+    ValueError
+      If a key in left is greater than pivot or a key in right is less than
+      pivot (or, without a pivot, than a key in left).
+
+    Returns
+    -------
+    Red_Black_Tree
+      A tree of the same class as left containing every key.
+
+    """
+    
+    if left.nil is not right.nil:
+      if left.num_nodes < right.num_nodes:
+        left.Adopt_Sentinel(right.nil)
+      else:
+        right.Adopt_Sentinel(left.nil)
+    
+    nil = left.nil
+    
+    # Check that the keys are in order, using the largest key of left and the
+    # smallest key of right
+    bounds = []
+    if left.root != nil:
+      bounds.append(left.Maximum(left.root).key)
+    if pivot is not None:
+      pivot = left.Item_Node(pivot)
+      bounds.append(pivot.key)
+    if right.root != nil:
+      bounds.append(right.Minimum(right.root).key)
+    for i in range(1, len(bounds)):
+      if bounds[i] < bounds[i-1]:
+        raise ValueError("Join() requires the keys of left to be at most pivot and the keys of right to be at least pivot")
+    
+    t = left.Empty_Copy()
+    
+    if pivot is not None:
+      x = pivot
+    elif right.root != nil:
+      x = right.Minimum(right.root)
+      right.Remove(x)
+    else:
       
-      # x is its parent's left child
-      if x == x.p.left:
-        
-        # We call x's sibling w
-        w = x.p.right
-        
-        # x is BLACK-BLACK and x's sibling w is RED (Case 1 in CLRS).
-        # Now w must have BLACK children. We swap the colors of w and x's
-        # parent, then do a left rotation on x's parent. At this point, x's
-        # new sibling (which was one of w's children before the rotation) is
-        # BLACK, so we have converted Case 1 into Case 2, 3, or 4.
-        if w.color == RED:
-          w.color = BLACK
-          x.p.color = RED
-          self.Left_Rotate(x.p)
-          w = x.p.right
-        
-        # x is BLACK-BLACK, x's sibling w is BLACK, and both of w's children
-        # are BLACK (Case 2 in CLRS). We remove one BLACK from w (making it
-        # RED) and push one BLACK from x to its parent (making x BLACK and x.p
-        # either RED-BLACK or BLACK-BLACK). We thus repeat the loop with
-        # x = x.p
-        if w.left.color == BLACK and w.right.color == BLACK:
-          w.color = RED
-          x = x.p
-        
-        # x is BLACK-BLACK, x's sibling w is BLACK, but one of w's children
-        # is RED
-        else:
-          
-          # w's left child is RED and w's right child is BLACK (Case 3 in
-          # CLRS). We swap the color of w and w's left child, then perform a 
-          # right rotation. Now x's new sibling (which was w's left child) is
-          # BLACK and has a RED right child (which was originally w). We have
-          # converted Case 3 to Case 4.
-          if w.right.color == BLACK:
-            w.left.color = BLACK
-            w.color = RED
-            self.Right_Rotate(w)
-            w = x.p.right
+      # Without a pivot, joining an empty right tree leaves left as it is
+      t.root, t.num_nodes = left.root, left.num_nodes
+      left.root, left.num_nodes = nil, 0
+      left.frozen = None
+      return t
+    
+    a, b = left.root, right.root
+    t.root, _ = t.Join_Nodes(a, t.Black_Height(a), x, b, t.Black_Height(b))
+    t.num_nodes = left.num_nodes + right.num_nodes + 1
+    
+    left.root, left.num_nodes = nil, 0
+    right.root, right.num_nodes = nil, 0
+    left.frozen = right.frozen = None
+    
+    return t
+  
+  def Split(self, key : int) -> tuple:
+    """
+    Splits the tree into a tree with every key less than key and a tree with
+    every key greater than or equal to key. We search for key from the root
+    and, on the way back up, join every subtree hanging off the search path
+    (with the node it hangs off as the pivot) onto the left or right tree with
+    Join_Nodes. Each join takes time proportional to the difference in black
+    height between the trees it joins, and these differences add up to
+    O(lg(n)) over the whole path.
+    
+    This tree is emptied. The two trees share its sentinel leaf, so joining
+    them again takes O(lg(n)) time. Red_Black_Tree does not store subtree
+    sizes, so finding the number of nodes in each tree takes time
+    proportional to the size of the smaller one (Order_Statistic_Tree reads
+    them off its nodes instead).
+
+    Parameters
+    ----------
+    key : int
+      The key to split at. It does not have to be in the tree.
+
+    Returns
+    -------
+    tuple
+      A pair (left, right) of trees of the same class as this tree.
+
+    """
+    
+    nil = self.nil
+    
+    # Search for key, recording each node on the path with its black height
+    path = []
+    x = self.root
+    h = self.Black_Height(x)
+    while x != nil:
+      path.append((x, h))
+      if x.color == BLACK:
+        h -= 1
+      if x.key < key:
+        x = x.right
+      else:
+        x = x.left
+    
+    # l and r are the roots of the left and right trees built so far, which
+    # hold the keys of the subtree below the node we are at, and hl and hr are
+    # their black heights
+    l, hl = nil, 0
+    r, hr = nil, 0
+    for x, h in reversed(path):
+      
+      # Black height of x's children
+      if x.color == BLACK:
+        h -= 1
+      
+      # The subtree hanging off the other side of x becomes a tree of its own,
+      # which needs a BLACK root
+      s = x.left if x.key < key else x.right
+      if s != nil:
+        s.p = nil
+        if s.color == RED:
+          s.color = BLACK
+          h += 1
+      
+      if x.key < key:
+        l, hl = self.Join_Nodes(s, h, x, l, hl)
+      else:
+        r, hr = self.Join_Nodes(r, hr, x, s, h)
+    
+    left, right = self.Empty_Copy(), self.Empty_Copy()
+    left.root, right.root = l, r
+    left.num_nodes, right.num_nodes = self.Split_Sizes(l, r)
+    
+    self.root, self.num_nodes = nil, 0
+    self.frozen = None
+    
+    return left, right
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Remove(self, z : Red_Black_Node) -> None:
+    """
+    Removes node z from the tree. Calls Delete_Fixup to maintain Red Black
+    properties.
+
+    Parameters
+    ----------
+    z : Red_Black_Node
+      The node to be removed. It must be a node in the tree.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    self.frozen = None
+    
+    # Throughout this algorithm, we keep track of z, the node to be deleted,
+    # y, a node that may cause violations of the Red Black properties, and x,
+    # the node that moves into y's original position (and may also cause
+    # violations)
+    y = z
+    y_original_color = y.color
+    
+    # If z only has one child, then we want y = z and x = y's child
+    if z.left == self.nil:
+      x = z.right
+      self.Transplant(z, x)
+    elif z.right == self.nil:
+      x = z.left
+      self.Transplant(z, x)
+    
+    # If z has two children, then y should be z's successor, the minimum of
+    # its right subtree. Now y replaces z in the tree and x replaces y
+    else:
+      y = self.Minimum(z.right)
+      y_original_color = y.color
+      
+      # A successor cannot have a left child, so we know y will be replaced by
+      # its right child
+      x = y.right
+      
+      # Take care of replacing y with x and z with y
+      if y.p == z:
+        x.p = y
+      else:
+        self.Transplant(y, x)
+        y.right = z.right
+        y.right.p = y
+      self.Transplant(z, y)
+      y.left = z.left
+      y.left.p = y
+      y.color = z.color
+    
+    # x's parent is the lowest node whose subtree lost a node, so the path up
+    # from it covers every node whose extra attributes (if any) have changed
+    self.Update_Path(x.p)
+    
+    # If y was originally RED, no Red Black violations could have occurred.
+    # We thus only have to fix the tree if y was originally black.
+    if y_original_color == BLACK:
+      self.Delete_Fixup(x)
+    
+    self.num_nodes -= 1
+  
+  def Insert_Node(self, z : Red_Black_Node, x : Red_Black_Node) -> None:
+    """
+    Inserts node z at the appropriate place in the subtree rooted at x, using
+    Insert_Fixup to maintain Red Black properties. The caller must make sure
+    that z.key belongs in that subtree (that searching for z.key from the root
+    would pass through x); Insert simply passes the root.
+
+    Parameters
+    ----------
+    z : Red_Black_Node
+      The node to be inserted.
+    x : Red_Black_Node
+      The root of the subtree where z is inserted.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if self.counters is not None:
+      self.Count_Descent(x, z.key)
+    self.frozen = None
+    
+    y = self.nil if x == self.root else x.p
+    while x != self.nil:
+      y = x
+      if z.key < x.key:
+        x = x.left
+      else:
+        x = x.right
+    
+    z.p = y
+    
+    if y == self.nil:
+      self.root = z
+    elif z.key < y.key:
+      y.left = z
+    else:
+      y.right = z
+    
+    z.left = self.nil
+    z.right = self.nil
+    z.color = RED
+    
+    # Give z and its new ancestors their extra attributes (if any) before
+    # Insert_Fixup rotates them
+    self.Update_Path(z)
+    self.Insert_Fixup(z)
+    
+    self.num_nodes += 1
+  
+  def Insert_Batch(self, batch : list) -> int:
+    """
+    Inserts the nodes in batch, which are sorted by key, as InsertMany
+    describes, and returns how many there were.
+    """
+    
+    # Relinking visits every node in the tree, so it only pays off once the
+    # batch is about half as large as the tree
+    if 2 * len(batch) >= self.num_nodes:
+      
+      # The tree's nodes and the batch are both sorted, so sorting their
+      # concatenation is a single linear merge. The sort is stable, so new
+      # nodes go after existing nodes with the same key, just as in Insert.
+      nodes = self.Nodes() + batch
+      self.Build(sorted(nodes, key=attrgetter('key')))
+      return len(batch)
+    
+    # z is the node inserted last, which has the largest key so far
+    z = self.nil
+    for y in batch:
+      x = self.Finger(z, y.key) if z != self.nil else self.root
+      z = y
+      self.Insert_Node(z, x)
+    
+    return len(batch)
+  
+  def Insert_From(self, x : Red_Black_Node, key) -> Red_Black_Node:
+    """
+    Inserts a new node with the key (or item, if the tree has a key function)
+    as Insert does, but starting from node x rather than from the root (see
+    Finger), and returns the node that holds the key. Subclasses that keep a
+    single node per key override this to reuse the node of a key that is
+    already in the tree.
+
+    Parameters
+    ----------
+    x : Red_Black_Node
+      A node in the tree, or the sentinel to start from the root.
+    key : int
+      The key to be inserted.
+
+    Returns
+    -------
+    Red_Black_Node
+      The new node.
+
+    """
+    
+    z = self.Item_Node(key)
+    self.Insert_Node(z, self.Finger(x, z.key) if x != self.nil else self.root)
+    return z
+  
+  def Finger(self, x : Red_Black_Node, k : int) -> Red_Black_Node:
+    """
+    Starting from node x, climbs towards the root until reaching a node whose
+    subtree k belongs in. If x.key is at most k, every key in x's subtree
+    is already at least as large as the keys to the left of it, so we only
+    need to climb until x is the left child of a node with a key greater than
+    k, which bounds the subtree from above. If x.key is greater than k, the
+    mirror image holds. We also stop at a node whose key is equal to k.
+    Searching or inserting from the returned node then gives the same result
+    as starting at the root. When k is close to x.key, the node is usually a
+    few levels above x, so far fewer nodes are visited than from the root
+    (although two neighboring keys can still be on opposite sides of the
+    root).
+
+    Parameters
+    ----------
+    x : Red_Black_Node
+      A node in the tree.
+    k : int
+      The key that will be searched for or inserted.
+
+    Returns
+    -------
+    Red_Black_Node
+      The node from which to search for or insert k.
+
+    """
+    
+    if k < x.key:
+      while x.p != self.nil and x.key != k and not (x == x.p.right and x.p.key < k):
+        x = x.p
+    else:
+      while x.p != self.nil and x.key != k and not (x == x.p.left and k < x.p.key):
+        x = x.p
+    return x
+  
+  def Join_Nodes(self, a : Red_Black_Node, ha : int, x : Red_Black_Node, b : Red_Black_Node, hb : int) -> tuple:
+    """
+    Joins the trees rooted at a and b, with node x between them, into one
+    tree (see Join). The roots a and b must be BLACK (or the sentinel) with no
+    parent, every key under a must be at most x.key and every key under b
+    must be at least x.key. The trees must share this tree's sentinel.
+
+    Parameters
+    ----------
+    a : Red_Black_Node
+      The root of the tree with the smaller keys.
+    ha : int
+      The black height of a (see Black_Height).
+    x : Red_Black_Node
+      The node placed between the two trees.
+    b : Red_Black_Node
+      The root of the tree with the larger keys.
+    hb : int
+      The black height of b.
+
+    Returns
+    -------
+    tuple
+      The root of the joined tree and its black height.
+
+    """
+    
+    nil = self.nil
+    
+    # If both trees have the same black height, x simply becomes a BLACK root
+    # above them
+    if ha == hb:
+      x.left, x.right, x.p = a, b, nil
+      x.color = BLACK
+      if a != nil:
+        a.p = x
+      if b != nil:
+        b.p = x
+      self.Update_Path(x)
+      return x, ha + 1
+    
+    # The taller tree hangs below a temporary BLACK node while Insert_Fixup
+    # runs, so that its root is treated like any other node. If Insert_Fixup
+    # leaves that root RED, making it BLACK adds one to the black height.
+    top = self.Node(None)
+    top.color = BLACK
+    top.p = nil
+    top.right = nil
+    
+    if ha > hb:
+      tall = a
+      h = ha
+      
+      # Follow the right spine of a down to a BLACK node y with the same black
+      # height as b. x takes y's place, with y and b as its children.
+      y = a
+      while not (y.color == BLACK and h == hb):
+        if y.color == BLACK:
+          h -= 1
+        parent = y
+        y = y.right
+      parent.right = x
+      x.left, x.right = y, b
+    else:
+      tall = b
+      h = hb
+      
+      # The mirror image: follow the left spine of b down to a BLACK node y
+      # with the same black height as a
+      y = b
+      while not (y.color == BLACK and h == ha):
+        if y.color == BLACK:
+          h -= 1
+        parent = y
+        y = y.left
+      parent.left = x
+      x.left, x.right = a, y
+    
+    x.p = parent
+    if x.left != nil:
+      x.left.p = x
+    if x.right != nil:
+      x.right.p = x
+    x.color = RED
+    
+    # The extra attributes (if any) of x and its new ancestors are updated
+    # before the taller tree is hung below top, so that the walk up stops at
+    # the tree's root and never reaches top, whose key is None
+    self.Update_Path(x)
+    top.left, tall.p = tall, top
+    
+    # x and its new children satisfy the Red Black properties except that x
+    # and its parent may both be RED, which is exactly what Insert_Fixup fixes
+    self.root = top
+    self.Insert_Fixup(x)
+    
+    root = top.left
+    root.p = nil
+    h = max(ha, hb)
+    if root.color == RED:
+      root.color = BLACK
+      h += 1
+    
+    self.root = root
+    return root, h
+  
+  def Black_Height(self, x : Red_Black_Node) -> int:
+    """
+    Returns the number of BLACK nodes on any path from x (including x) down to
+    a leaf (not including the leaf). Since every such path has the same
+    number, we simply follow left children.
+    """
+    
+    h = 0
+    while x != self.nil:
+      if x.color == BLACK:
+        h += 1
+      x = x.left
+    return h
+  
+  def Update_Path(self, x : Red_Black_Node) -> None:
+    """
+    Recomputes any extra attributes that a tree augmenting Red_Black_Tree
+    keeps in its nodes, for x and every ancestor of x, after x's children
+    have been changed directly. Red_Black_Tree keeps no extra attributes, so
+    there is nothing to do.
+    """
+    
+    pass
+  
+  def Split_Sizes(self, a : Red_Black_Node, b : Red_Black_Node) -> tuple:
+    """
+    Returns the number of nodes in the trees rooted at a and b, which together
+    hold every node in this tree. The nodes of both trees are counted one at a
+    time in turn, so we can stop as soon as the smaller tree has been counted.
+    """
+    
+    stack_a = [a] if a != self.nil else []
+    stack_b = [b] if b != self.nil else []
+    count_a = count_b = 0
+    
+    while stack_a and stack_b:
+      for stack in (stack_a, stack_b):
+        x = stack.pop()
+        if x.left != self.nil:
+          stack.append(x.left)
+        if x.right != self.nil:
+          stack.append(x.right)
+      count_a += 1
+      count_b += 1
+    
+    if not stack_a:
+      return count_a, self.num_nodes - count_a
+    return self.num_nodes - count_b, count_b
+  
+  def Empty_Copy(self) -> 'Red_Black_Tree':
+    """
+    Returns an empty tree of the same class and with the same settings as this
+    tree, which shares this tree's sentinel leaf.
+    """
+    
+    t = self.__class__.__new__(self.__class__)
+    t.__dict__.update(self.__dict__)
+    t.root = self.nil
+    t.num_nodes = 0
+    t.frozen = None
+    return t
+  
+  def Adopt_Sentinel(self, nil : Red_Black_Node) -> None:
+    """
+    Makes the tree use nil as its sentinel leaf instead of its own, by
+    replacing every reference to its old sentinel. This takes O(n) time.
+    """
+    
+    old = self.nil
+    
+    for x in self.Nodes():
+      if x.left == old:
+        x.left = nil
+      if x.right == old:
+        x.right = nil
+    
+    if self.root == old:
+      self.root = nil
+    else:
+      self.root.p = nil
+    self.nil = nil
+  
+  def Build(self, nodes : list) -> None:
+    """
+    Replaces the contents of the tree with the nodes, relinking them in O(n)
+    time. The middle node becomes the root and the two halves are built the
+    same way, so the result is a perfectly balanced Binary Search Tree whose
+    nil leaves all lie on its last two levels. Coloring every node on the
+    deepest level RED and all others BLACK then gives every path the same
+    number of BLACK nodes.
+    
+    If some keys repeat, the middle node may have equal keys on both sides,
+    while Insert puts a key equal to a node's key in its right subtree. The
+    nodes are then linked by Build_Repeats instead.
+
+    Parameters
+    ----------
+    nodes : list
+      The nodes to put in the tree, in non-decreasing order of their keys.
+      Their left, right, p and color attributes are overwritten.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    nil = self.nil
+    
+    if any(nodes[i].key == nodes[i+1].key for i in range(len(nodes) - 1)):
+      self.Build_Repeats(nodes)
+      return
+
+    # Depth of the deepest level. The root alone is never colored RED.
+    red_depth = len(nodes).bit_length() - 1 if len(nodes) > 1 else -1
+
+    def build(lo : int, hi : int, depth : int, parent : Red_Black_Node) -> Red_Black_Node:
+      # Builds the subtree holding nodes[lo:hi] and returns its root
+      if lo >= hi:
+        return nil
+
+      mid = (lo + hi) // 2
+      x = nodes[mid]
+      x.p = parent
+      x.color = RED if depth == red_depth else BLACK
+      x.left = build(lo, mid, depth + 1, x)
+      x.right = build(mid + 1, hi, depth + 1, x)
+      return x
+
+    self.root = build(0, len(nodes), 0, nil)
+    self.root.p = nil
+    self.num_nodes = len(nodes)
+    self.frozen = None
+  
+  def Build_Repeats(self, nodes : list) -> None:
+    """
+    Does the same as Build for nodes with repeated keys, also in O(n) time,
+    keeping every node with the same key as a node in that node's right
+    subtree wherever possible, as Insert does.
+    
+    Seen as a 2-3-4 tree (the B-tree a Red Black Tree stands for), a node
+    equal to the one before it only ends up in a left subtree if it is the
+    separator just after a leaf, or the middle key of a leaf holding three
+    keys (which becomes a BLACK node with two RED children). So the nodes are
+    split into leaves of one to three nodes with a single separator between
+    each two leaves, choosing the split with the fewest such nodes by a pass
+    from right to left. The separators are linked as a perfectly balanced
+    tree, exactly as in Build, and each of its nil leaves is replaced by one
+    leaf: a BLACK node with a RED right child, a RED left child or both.
+    Every path then gains a single BLACK node, so the tree stays valid.
+    
+    The split can always be made without any such node unless some key
+    appears more than three times, or the runs of equal keys leave no room
+    for it (as with 1, 1, 2, 3, 3, 3). The nodes that remain are then put in
+    left subtrees, just as rotations after Insert can move an equal key.
+    """
+    
+    nil = self.nil
+    n = len(nodes)
+    
+    def equal(i : int) -> int:
+      # 1 if node i has the same key as node i-1, 0 otherwise
+      return 1 if i > 0 and nodes[i].key == nodes[i-1].key else 0
+    
+    # cost[p] is the fewest nodes left of an equal node that nodes[p:] can
+    # be split with, starting with a leaf of size[p] nodes
+    cost = [0] * (n + 1)
+    size = [0] * (n + 1)
+    for p in range(n - 1, -1, -1):
+      best = None
+      for c in range(1, min(3, n - p) + 1):
+        here = equal(p + 1) if c == 3 else 0
+        if p + c < n:
+          # The separator after the leaf needs a leaf after it too
+          if p + c + 1 >= n:
+            continue
+          here += equal(p + c) + cost[p + c + 1]
+        if best is None or here < best:
+          best, size[p] = here, c
+      cost[p] = best
+    
+    # Each leaf's first node, and the separators
+    leaves = []
+    separators = []
+    p = 0
+    while p < n:
+      leaves.append(p)
+      p += size[p]
+      if p < n:
+        separators.append(nodes[p])
+        p += 1
+    
+    def leaf(i : int, parent : Red_Black_Node) -> Red_Black_Node:
+      # Links the i-th leaf below parent and returns its BLACK root
+      p = leaves[i]
+      c = size[p]
+      x = nodes[p] if c < 3 else nodes[p + 1]
+      x.p = parent
+      x.color = BLACK
+      x.left = x.right = nil
+      if c == 3:
+        x.left = nodes[p]
+      if c >= 2:
+        x.right = nodes[p + c - 1]
+      for y in (x.left, x.right):
+        if y != nil:
+          y.p = x
+          y.color = RED
+          y.left = y.right = nil
+      return x
+    
+    # Depth of the deepest level of separators, as in Build
+    m = len(separators)
+    red_depth = m.bit_length() - 1 if m > 1 else -1
+    
+    def build(lo : int, hi : int, depth : int, parent : Red_Black_Node) -> Red_Black_Node:
+      # Builds the subtree holding separators[lo:hi] and the leaves between
+      # them and returns its root
+      if lo >= hi:
+        return leaf(lo, parent) if n else nil
+      
+      mid = (lo + hi) // 2
+      x = separators[mid]
+      x.p = parent
+      x.color = RED if depth == red_depth else BLACK
+      x.left = build(lo, mid, depth + 1, x)
+      x.right = build(mid + 1, hi, depth + 1, x)
+      return x
+    
+    self.root = build(0, m, 0, nil)
+    self.root.p = nil
+    self.num_nodes = n
+    self.frozen = None
+  
+  def Nodes(self) -> list:
+    """
+    Returns a list of every node in the tree in sorted order, using an
+    in-order walk with an explicit stack.
+    """
+    
+    nodes = []
+    stack = []
+    x = self.root
+    while x != self.nil or stack:
+      while x != self.nil:
+        stack.append(x)
+        x = x.left
+      x = stack.pop()
+      nodes.append(x)
+      x = x.right
+    return nodes
+  
+  def Keys(self) -> list:
+    """
+    Returns a list of every key in the tree in sorted order.
+    """
+    
+    return [x.key for x in self.Nodes()]
+  
+  def Range_Nodes(self, lo : int = None, hi : int = None, inclusive : tuple = (True, True), reverse : bool = False):
+    """
+    A generator that yields every node whose key is between lo and hi, in
+    sorted order of the keys (see Range, which takes the same parameters).
+    """
+
+    lo_inclusive, hi_inclusive = inclusive
+    nil = self.nil
+    stack = []
+    x = self.root
+
+    if not reverse:
+
+      # Find the first key in the range. Every node we go left from is in the
+      # range (as far as lo is concerned) and comes after its left subtree.
+      while x != nil:
+        if lo is not None and (x.key < lo or (not lo_inclusive and x.key == lo)):
+          x = x.right
+        else:
+          stack.append(x)
+          x = x.left
+
+      while stack:
+        x = stack.pop()
+        if hi is not None and (hi < x.key or (not hi_inclusive and x.key == hi)):
+          return
+        yield x
+
+        # The next key is the minimum of x's right subtree, if it has one, and
+        # otherwise the node now on top of the stack
+        x = x.right
+        while x != nil:
+          stack.append(x)
+          x = x.left
+
+    else:
+
+      # The mirror image of the above, starting from the last key in the range
+      while x != nil:
+        if hi is not None and (hi < x.key or (not hi_inclusive and x.key == hi)):
+          x = x.left
+        else:
+          stack.append(x)
+          x = x.right
+
+      while stack:
+        x = stack.pop()
+        if lo is not None and (x.key < lo or (not lo_inclusive and x.key == lo)):
+          return
+        yield x
+
+        x = x.left
+        while x != nil:
+          stack.append(x)
+          x = x.right
+  
+  def Node_Values(self, nodes):
+    """
+    Returns an iterator over what Range yields for each of the nodes: its
+    key, or its item if the tree has a key function.
+    """
+    
+    return map(attrgetter('key' if self.key_function is None else 'item'), nodes)
+  
+  def Search_Frozen(self, keys) -> tuple:
+    """
+    Returns, for each key in keys, the position of the first key in freeze()
+    that is not less than it, and whether the key there is equal to it.
+    """
+    
+    frozen = self.freeze()
+    keys = np.asarray(keys)
+    
+    # Binary searches for keys in random order jump all over a large array
+    # and miss the cache on most steps, so a large batch is searched in
+    # sorted order and the positions are put back in the original order
+    if keys.ndim == 1 and len(keys) > 1024:
+      order = np.argsort(keys, kind='stable')
+      i = np.empty(len(keys), dtype=np.intp)
+      i[order] = np.searchsorted(frozen, keys[order], side='left')
+    else:
+      i = np.searchsorted(frozen, keys, side='left')
+    
+    if len(frozen) == 0:
+      return i, np.zeros(i.shape, dtype=bool)
+    
+    # Positions past the end are clamped so they can be read, and can only
+    # match if the last key is equal, which the first check rules out
+    found = (i < len(frozen)) & (frozen[np.minimum(i, len(frozen) - 1)] == keys)
+    return i, found
+  
+  def Sort_Key(self, item):
+    """
+    Returns the key of an item: the result of the key function, or the item
+    itself if the tree has none.
+    """
+    
+    return item if self.key_function is None else self.key_function(item)
+  
+  def Item_Node(self, item) -> Red_Black_Node:
+    """
+    Returns a new node holding the item (and its key, computed once here, if
+    the tree has a key function).
+    """
+    
+    if self.key_function is None:
+      return self.Node(item)
+    return self.Node(self.key_function(item), item)
+  
+  def Counted_Search(self, x : Red_Black_Node, k : int) -> Red_Black_Node:
+    """
+    The same search as Search, but counting its comparisons and the length of
+    its path (see stats). Search calls this instead while stats are enabled.
+    """
+    
+    counters = self.counters
+    length = 0
+    while x != self.nil:
+      length += 1
+      counters['comparisons'] += 1
+      if k == x.key:
+        break
+      counters['comparisons'] += 1
+      if k < x.key:
+        x = x.left
+      else:
+        x = x.right
+    
+    counters['searches'] += 1
+    counters['search_path_length'] += length
+    if length > counters['max_search_path_length']:
+      counters['max_search_path_length'] = length
+    return x
+  
+  def Count_Descent(self, x : Red_Black_Node, k : int) -> None:
+    """
+    Counts the nodes that Insert_Node visits, and the key comparisons it makes,
+    when it descends from x to the place for key k (see stats).
+    """
+    
+    counters = self.counters
+    length = 0
+    while x != self.nil:
+      length += 1
+      x = x.left if k < x.key else x.right
+    
+    # One comparison per node visited, and one more to pick the side of the
+    # last node that the new node hangs from
+    counters['inserts'] += 1
+    counters['insert_path_length'] += length
+    counters['comparisons'] += length + (1 if length else 0)
+  
+  def Left_Rotate(self, x : Red_Black_Node) -> None:
+    """
+    Performs a left rotation on node x, assuming that x's right child is not the sentinel.
+    This maintains the Binary Search Tree property, but not necessarily the
+    Red Black Tree properties.
+
+    Parameters
+    ----------
+    x : Red_Black_Node
+      The node on which we are performing a left rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if self.counters is not None:
+      self.counters['left_rotations'] += 1
+    
+    y = x.right
+    x.right = y.left
+    if y.left != self.nil:
+      y.left.p = x
+    y.p = x.p
+    if x.p == self.nil:
+      self.root = y
+    elif x == x.p.left:
+      x.p.left = y
+    else:
+      x.p.right = y
+    y.left = x
+    x.p = y
+  
+  def Right_Rotate(self, y : Red_Black_Node) -> None:
+    """
+    Performs a right rotation on node x, assuming that x's left child is not the sentinel.
+    This maintains the Binary Search Tree property, but not necessarily the
+    Red Black Tree properties.
+
+    Parameters
+    ----------
+    x : Red_Black_Node
+      The node on which we are performing a right rotation.
+
+    Returns
+    -------
+    None
+
+    """
+
+    if self.counters is not None:
+      self.counters['right_rotations'] += 1
+    
+    x = y.left
+    y.left = x.right
+    if x.right != self.nil:
+      x.right.p = y
+    x.p = y.p
+    if y.p == self.nil:
+      self.root = x
+    elif y == y.p.left:
+      y.p.left = x
+    else:
+      y.p.right = x
+    x.right = y
+    y.p = x
+
+  def Transplant(self, u : Red_Black_Node, v : Red_Black_Node) -> None:
+    """
+    Replaces the subtree rooted at node u with the subtree rooted at node v
+
+    Parameters
+    ----------
+    u : Red_Black_Node
+      The root of the subtree to be replaced.
+    v : Red_Black_Node
+      The root of the subtree doing the replacing.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if u.p == self.nil:
+      self.root = v
+    elif u == u.p.left:
+      u.p.left = v
+    else:
+      u.p.right = v
+    v.p = u.p
+  
+  def Insert_Fixup(self, z : Red_Black_Node) -> None:
+    """
+    Performs a sequence of re-colorings and rotations after an Insert to
+    maintain Red Black properties. Note that insertions may only violate
+    Property 2 or Property 4.
+
+    Parameters
+    ----------
+    z : Red_Black_Node
+      The node that was inserted.
+
+    Returns
+    -------
+    None
+
+    """
+    counters = self.counters
+    
+    # We are only violating Property 2 or 4 if both z and z's parent is RED
+    while z.p.color == RED:
+      
+      # z's uncle is its grandparent's right child
+      if z.p == z.p.p.left:
+        y = z.p.p.right
+        
+        # z, z's parent, and z's uncle are RED, but z's grandparent is BLACK.
+        # We fix this by making z's parent and z's uncle BLACK and z's
+        # grandparent RED, then set z equal to its grandparent. (Case 1 in CLRS)
+        if y.color == RED:
+          if counters is not None:
+            counters['insert_case_1'] += 1
+          z.p.color = BLACK
+          y.color = BLACK
+          z.p.p.color = RED
+          z = z.p.p
+        
+        # z and z's parent are RED, but z's uncle and grandparent are BLACK.
+        else:
+          
+          # z is its parent's right child (Case 2 in CLRS), so we change z
+          # to be its parent and then rotate. Now z is its parent's left child
+          if z == z.p.right:
+            if counters is not None:
+              counters['insert_case_2'] += 1
+            z = z.p
+            self.Left_Rotate(z)
+          
+          # z is its parent's left child (Case 3 in CLRS)
+          z.p.color = BLACK
+          z.p.p.color = RED
+          if counters is not None:
+            counters['insert_case_3'] += 1
+          self.Right_Rotate(z.p.p)
+
+      # z's uncle is its grandparent's left child
+      else: # z.p == z.p.p.right
+        y = z.p.p.left
+        
+        # z, z's parent, and z's uncle are RED, but z's grandparent is BLACK.
+        # We fix this by making z's parent and z's uncle BLACK and z's
+        # grandparent RED, then set z equal to its grandparent. (Case 1 in CLRS)
+        if y.color == RED:
+          if counters is not None:
+            counters['insert_case_1'] += 1
+          z.p.color = BLACK
+          y.color = BLACK
+          z.p.p.color = RED
+          z = z.p.p
+        
+        # z and z's parent are RED, but z's uncle and grandparent are BLACK.
+        else:
+          
+          # z is its parent's left child (Case 2 in CLRS), so we change z
+          # to be its parent and then rotate. Now z is its parent's right child
+          if z == z.p.left:
+            if counters is not None:
+              counters['insert_case_2'] += 1
+            z = z.p
+            self.Right_Rotate(z)
+          
+          # z is its parent's right child (Case 3 in CLRS)
+          z.p.color = BLACK
+          z.p.p.color = RED
+          if counters is not None:
+            counters['insert_case_3'] += 1
+          self.Left_Rotate(z.p.p)
+        
+    self.root.color = BLACK
+  
+  def Delete_Fixup(self, x : Red_Black_Node) -> None:
+    """
+    Performs a sequence of re-colorings and rotations after a Delete to
+    maintain Red Black properties. Note this is only called if y was BLACK. If
+    y was RED, we could not have violated any of the Red Black Tree proeprties:
+      
+      1. Every node is still RED or BLACK.
+      2. If y was RED, it was not the root, so the root remains BLACK.
+      3. y did not replace the sentinel leaf, so all leaves remain BLACK.
+      4. No red nodes are now adjacent. y took on z's color, so the color of
+         that node did not change. If y was RED, then its child x is BLACK, so
+         replacing y with x could not put two RED nodes adjacent to each other.
+      5. Since y was RED, no black heights in the tree have changed.
+    
+    If, however, y was BLACK, several properties could have been violated:
+      
+      1. Every node is still RED or BLACK.
+      2. If y was the root node and x is RED, the root is now RED.
+      3. The sentinel leaf is still BLACK.
+      4. If y.p was RED and x is RED, then a RED node now has a RED child.
+      5. Moving y within the tree caused any simple paths containing y to have
+         one fewer BLACK node.
+
+    Parameters
+    ----------
+    x : Red_Black_Node
+      The node that replaced y in the Delete.
+
+    Returns
+    -------
+    None
+
+    """
+
+    # We convert the violation of Property 5 to a violation of Property 1 by
+    # adding y's BLACKness to x. Now x is either RED-BLACK or BLACK-BLACK. We
+    # keep track of this in x.color: if x is RED-BLACK, x.color is RED. If x is
+    # BLACK-BLACK, x.color is BLACK.We continue this while loop until:
+    #   1. x is RED-BLACK, at which point we simply make it BLACK
+    #   2. x is the root node, and we just remove the extra BLACK
+    #   3. We exit because the rotations and re-colorings have
+    #      solved the problem
+
+    counters = self.counters
+    
+    while x != self.root and x.color == BLACK:
+      
+      # x is its parent's left child
+      if x == x.p.left:
+        
+        # We call x's sibling w
+        w = x.p.right
+        
+        # x is BLACK-BLACK and x's sibling w is RED (Case 1 in CLRS).
+        # Now w must have BLACK children. We swap the colors of w and x's
+        # parent, then do a left rotation on x's parent. At this point, x's
+        # new sibling (which was one of w's children before the rotation) is
+        # BLACK, so we have converted Case 1 into Case 2, 3, or 4.
+        if w.color == RED:
+          if counters is not None:
+            counters['delete_case_1'] += 1
+          w.color = BLACK
+          x.p.color = RED
+          self.Left_Rotate(x.p)
+          w = x.p.right
+        
+        # x is BLACK-BLACK, x's sibling w is BLACK, and both of w's children
+        # are BLACK (Case 2 in CLRS). We remove one BLACK from w (making it
+        # RED) and push one BLACK from x to its parent (making x BLACK and x.p
+        # either RED-BLACK or BLACK-BLACK). We thus repeat the loop with
+        # x = x.p
+        if w.left.color == BLACK and w.right.color == BLACK:
+          if counters is not None:
+            counters['delete_case_2'] += 1
+          w.color = RED
+          x = x.p
+        
+        # x is BLACK-BLACK, x's sibling w is BLACK, but one of w's children
+        # is RED
+        else:
+          
+          # w's left child is RED and w's right child is BLACK (Case 3 in
+          # CLRS). We swap the color of w and w's left child, then perform a 
+          # right rotation. Now x's new sibling (which was w's left child) is
+          # BLACK and has a RED right child (which was originally w). We have
+          # converted Case 3 to Case 4.
+          if w.right.color == BLACK:
+            if counters is not None:
+              counters['delete_case_3'] += 1
+            w.left.color = BLACK
+            w.color = RED
+            self.Right_Rotate(w)
+            w = x.p.right
+          
+          # w's left child is BLACK and w's right child is RED (Case 4 in
+          # CLRS). We can now perfectly "fix" the tree with a few re-colorings
+          # and rotations. We set x equal to the root node to exit the loop
+          if counters is not None:
+            counters['delete_case_4'] += 1
+          w.color = x.p.color
+          x.p.color = BLACK
+          w.right.color = BLACK
+          self.Left_Rotate(x.p)
+          x = self.root
+      
+      # x is its parent's right child
+      else: # x = x.p.right
+        w = x.p.left
+        
+        # x is BLACK-BLACK and x's sibling w is RED (Case 1 in CLRS).
+        # Now w must have BLACK children. We swap the colors of w and x's
+        # parent, then do a right rotation on x's parent. At this point, x's
+        # new sibling (which was one of w's children before the rotation) is
+        # BLACK, so we have converted Case 1 into Case 2, 3, or 4.
+        if w.color == RED:
+          if counters is not None:
+            counters['delete_case_1'] += 1
+          w.color = BLACK
+          x.p.color = RED
+          self.Right_Rotate(x.p)
+          w = x.p.left
+        
+        # x is BLACK-BLACK, x's sibling w is BLACK, and both of w's children
+        # are BLACK (Case 2 in CLRS). We remove one BLACK from w (making it
+        # RED) and push one BLACK from x to its parent (making x BLACK and x.p
+        # either RED-BLACK or BLACK-BLACK). We thus repeat the loop with
+        # x = x.p
+        if w.left.color == BLACK and w.right.color == BLACK:
+          if counters is not None:
+            counters['delete_case_2'] += 1
+          w.color = RED
+          x = x.p
+        
+        # x is BLACK-BLACK, x's sibling w is BLACK, but one of w's children
+        # is RED
+        else:
+          
+          # w's right child is RED and w's left child is BLACK (Case 3 in
+          # CLRS). We swap the color of w and w's right child, then perform a 
+          # left rotation. Now x's new sibling (which was w's right child) is
+          # BLACK and has a RED left child (which was originally w). We have
+          # converted Case 3 to Case 4.
+          if w.left.color == BLACK:
+            if counters is not None:
+              counters['delete_case_3'] += 1
+            w.right.color = BLACK
+            w.color = RED
+            self.Left_Rotate(w)
+            w = x.p.left
+          
+          # w's right child is BLACK and w's left child is RED (Case 4 in
+          # CLRS). We can now perfectly "fix" the tree with a few re-colorings
+          # and rotations. We set x equal to the root node to exit the loop
+          if counters is not None:
+            counters['delete_case_4'] += 1
+          w.color = x.p.color
+          x.p.color = BLACK
+          w.left.color = BLACK
+          self.Right_Rotate(x.p)
+          x = self.root
+    
+    x.color = BLACK
+
+# A position in a Red Black Tree
+class Red_Black_Cursor:
+  """
+  A position in a Red Black Tree, which is used as a finger: searches and
+  inserts start from the node the cursor is at rather than from the root, so
+  operations on keys close to the cursor's key visit few nodes. The cursor
+  has the following attributes:
+    
+    tree : The tree the cursor moves through
+    node : The node the cursor is at, or tree.nil if the cursor has moved past
+           either end of the tree
+  
+  The cursor's node must stay in the tree: if it is deleted other than
+  through the cursor, the cursor must be moved with seek before being used.
+  """
+  
+  __slots__ = ('tree', 'node')
+  
+  def __init__(self, tree : Red_Black_Tree, node : Red_Black_Node = None):
+    """
+    Places the cursor at node, or at the node with the minimum key if no node
+    is given.
+
+    Parameters
+    ----------
+    tree : Red_Black_Tree
+      The tree the cursor moves through.
+    node : Red_Black_Node, optional
+      The node the cursor starts at, which must be in tree. The default is
+      None, which starts at the node with the minimum key.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.tree = tree
+    
+    if node is not None:
+      self.node = node
+    elif tree.root != tree.nil:
+      self.node = tree.Minimum(tree.root)
+    else:
+      self.node = tree.nil
+  
+  @property
+  def key(self):
+    """
+    The key of the node the cursor is at (None if the cursor is past either
+    end of the tree, since that is the sentinel's key).
+    """
+    
+    return self.node.key
+  
+  def seek(self, key : int) -> Red_Black_Node:
+    """
+    Moves the cursor to the node with the smallest key that is at least key,
+    searching from the cursor's current node (see Red_Black_Tree.Finger).
+
+    Parameters
+    ----------
+    key : int
+      The key to move to. It does not have to be in the tree.
+
+    Returns
+    -------
+    Red_Black_Node
+      The node the cursor is now at, or tree.nil (if every key in the tree is
+                                                   less than key).
+
+    """
+    
+    t = self.tree
+    nil = t.nil
+    
+    x = self.node if self.node != nil else t.root
+    if x == nil:
+      return nil
+    
+    x = t.Finger(x, key)
+    
+    # The smallest key that is at least key is the last node we go left from
+    y = nil
+    z = x
+    while z != nil:
+      if z.key < key:
+        z = z.right
+      else:
+        y = z
+        z = z.left
+    
+    # If every key below x is less than key, the answer is the first ancestor
+    # that x is in the left subtree of, exactly as in Successor
+    if y == nil:
+      while x.p != nil and x == x.p.right:
+        x = x.p
+      y = x.p
+    
+    self.node = y
+    return y
+  
+  def next(self) -> Red_Black_Node:
+    """
+    Moves the cursor to the successor of its node and returns it (tree.nil if
+    the cursor moves past the node with the maximum key, or was already past
+    either end).
+    """
+    
+    if self.node != self.tree.nil:
+      self.node = self.tree.Successor(self.node)
+    return self.node
+  
+  def prev(self) -> Red_Black_Node:
+    """
+    Moves the cursor to the predecessor of its node and returns it (tree.nil
+    if the cursor moves past the node with the minimum key, or was already
+    past either end).
+    """
+    
+    if self.node != self.tree.nil:
+      self.node = self.tree.Predecessor(self.node)
+    return self.node
+  
+  def insert_here(self, key : int) -> Red_Black_Node:
+    """
+    Inserts the key into the tree, as Insert does, but starting from the
+    cursor's node rather than from the root (see
+    Red_Black_Tree.Insert_From). The cursor moves to the node holding the
+    key, which is a new node unless the tree keeps a single node per key
+    (as Red_Black_Map does) and the key was already there.
+
+    Parameters
+    ----------
+    key : int
+      The key to be inserted.
+
+    Returns
+    -------
+    Red_Black_Node
+      The node holding the key.
+
+    """
+    
+    self.node = self.tree.Insert_From(self.node, key)
+    return self.node
+
+# The keys of a Red Black Tree, memory-mapped from a file written by dump
+class Mapped_Red_Black_Tree:
+  """
+  A read-only view of a file written by Red_Black_Tree.dump. The file is
+  memory-mapped and its keys, which are stored in sorted order, are read
+  through a memoryview, so the operating system only pages in the parts of
+  the file that queries touch. Since the keys are sorted, the position of a
+  key in the file is its rank, and every query is a binary search (with the
+  bisect module) rather than a walk down a tree of nodes:
+    
+    Search(k)   : the 0-based position of a key equal to k, or None
+    Range(...)  : the keys between lo and hi, as Red_Black_Tree.Range
+    Select(i)   : the i-th smallest key, as Order_Statistic_Tree.Select
+    CountLess(k): the number of keys less than k
+  
+  The file must not be changed while it is mapped. Call close (or use the
+  object as a context manager) to unmap it.
+  """
+  
+  def __init__(self, path : str):
+    """
+    Memory-maps the file at path.
+
+    Parameters
+    ----------
+    path : str
+      A file written by Red_Black_Tree.dump.
+
+    Raises
+    ------
+    ValueError
+      If the file was not written by dump, or was written on a machine with a
+      different byte order.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    with open(path, 'rb') as f:
+      typecode, n = Read_Header(f.read(FILE_HEADER_SIZE), path)
+      if sys.byteorder != 'little':
+        raise ValueError("Memory-mapped loading needs a little-endian machine (use mmap=False)")
+      
+      # An empty file region cannot be mapped, but there is nothing to map
+      if n == 0:
+        self.map = None
+        self.keys = memoryview(array(typecode))
+        return
+      self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    size = array(typecode).itemsize
+    self.keys = memoryview(self.map)[FILE_HEADER_SIZE:FILE_HEADER_SIZE + n * size].cast(typecode)
+  
+  def __len__(self):
+    """
+    Returns the number of keys.
+    """
+    
+    return len(self.keys)
+  
+  def Size(self):
+    """
+    Returns the number of keys.
+    """
+    
+    return len(self.keys)
+  
+  def __contains__(self, key) -> bool:
+    """
+    Returns True if the key is in the file and False otherwise.
+    """
+    
+    return self.Search(key) is not None
+  
+  def __iter__(self):
+    """
+    A generator that yields every key in sorted order.
+    """
+    
+    return iter(self.keys)
+  
+  def __enter__(self):
+    return self
+  
+  def __exit__(self, *exc):
+    self.close()
+  
+  def close(self) -> None:
+    """
+    Releases the memoryview and unmaps the file.
+    """
+    
+    self.keys.release()
+    if self.map is not None:
+      self.map.close()
+      self.map = None
+  
+  def Search(self, key : int) -> int:
+    """
+    Returns the position (from 0) of a key equal to key, or None if there is
+    none.
+    """
+    
+    i = bisect.bisect_left(self.keys, key)
+    if i < len(self.keys) and self.keys[i] == key:
+      return i
+    return None
+  
+  def CountLess(self, key : int) -> int:
+    """
+    Returns the number of keys less than key.
+    """
+    
+    return bisect.bisect_left(self.keys, key)
+  
+  def Select(self, i : int):
+    """
+    Returns the i-th smallest key, where the smallest key has i = 1, or None
+    if i is out of range.
+    """
+    
+    if 1 <= i <= len(self.keys):
+      return self.keys[i - 1]
+    return None
+  
+  def Range(self, lo : int = None, hi : int = None, inclusive : tuple = (True, True), reverse : bool = False):
+    """
+    A generator that yields every key between lo and hi in sorted order (see
+    Red_Black_Tree.Range), after two binary searches for the ends of the
+    range.
+    """
+    
+    keys = self.keys
+    lo_inclusive, hi_inclusive = inclusive
+    
+    if lo is None:
+      start = 0
+    elif lo_inclusive:
+      start = bisect.bisect_left(keys, lo)
+    else:
+      start = bisect.bisect_right(keys, lo)
+    
+    if hi is None:
+      end = len(keys)
+    elif hi_inclusive:
+      end = bisect.bisect_right(keys, hi)
+    else:
+      end = bisect.bisect_left(keys, hi)
+    
+    if reverse:
+      for i in range(end - 1, start - 1, -1):
+        yield keys[i]
+    else:
+      for i in range(start, end):
+        yield keys[i]
+
+# The keys of a Red Black Tree, packed into an array in Eytzinger order
+class Eytzinger_Red_Black_Tree:
+  """
+  A read-only copy of the keys of a Red_Black_Tree (see
+  Red_Black_Tree.eytzinger), laid out in a list in Eytzinger (breadth-first)
+  order: the root is at position 1 and the children of position i are at 2i
+  and 2i + 1, so the tree's links are implied by the positions and no nodes
+  are stored. The keys fill a complete Binary Search Tree, whose nodes are
+  the positions 1 to n.
+  
+  A search only computes the next position, i = 2i + (keys[i] < k), until it
+  falls off the bottom, with no branch on the comparison. The top levels of
+  the tree, which every search visits, are packed together at the start of
+  the list. The position of the answer is then recovered from the final i by
+  dropping the trailing 1 bits (the steps to the right since the answer) and
+  one more. Walking to the next or previous key uses the same arithmetic on
+  positions that Successor and Predecessor use on parent pointers.
+  
+    Search(k)   : the key equal to k, or None
+    ceiling(k)  : the smallest key that is at least k, or None
+    floor(k)    : the largest key that is at most k, or None
+    Range(...)  : the keys between lo and hi, as Red_Black_Tree.Range
+  
+  If the tree had a key function, the items are stored in the same order and
+  are returned in place of the keys.
+  """
+  
+  def __init__(self, keys : list, values : list = None):
+    """
+    Lays out the keys in Eytzinger order.
+
+    Parameters
+    ----------
+    keys : list
+      The keys, in non-decreasing order.
+    values : list, optional
+      What to return for each key, in the same order as keys. The default is
+      None, which returns the keys themselves.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    n = len(keys)
+    self.n = n
+    
+    # Position 0 is unused, so the root is at position 1
+    self.keys = [None] * (n + 1)
+    self.values = self.keys if values is None else [None] * (n + 1)
+    
+    # Visiting the positions in order (as Next does) and giving each the next
+    # key fills the tree in sorted order
+    i = self.First()
+    for j in range(n):
+      self.keys[i] = keys[j]
+      if values is not None:
+        self.values[i] = values[j]
+      i = self.Next(i)
+  
+  def __len__(self):
+    """
+    Returns the number of keys.
+    """
+    
+    return self.n
+  
+  def Size(self):
+    """
+    Returns the number of keys.
+    """
+    
+    return self.n
+  
+  def __contains__(self, key) -> bool:
+    """
+    Returns True if the key is in the tree and False otherwise.
+    """
+    
+    i = self.Lower_Bound(key)
+    return i != 0 and self.keys[i] == key
+  
+  def __iter__(self):
+    """
+    Returns an iterator over every key in sorted order.
+    """
+    
+    return self.Range()
+  
+  def Search(self, key : int):
+    """
+    Returns the key equal to key (or its item), or None if there is none.
+    """
+    
+    i = self.Lower_Bound(key)
+    if i != 0 and self.keys[i] == key:
+      return self.values[i]
+    return None
+  
+  def ceiling(self, key : int):
+    """
+    Returns the smallest key that is at least key (or its item), or None if
+    there is none.
+    """
+    
+    i = self.Lower_Bound(key)
+    return self.values[i] if i != 0 else None
+  
+  def floor(self, key : int):
+    """
+    Returns the largest key that is at most key (or its item), or None if
+    there is none.
+    """
+    
+    # The largest key at most key comes just before the smallest key greater
+    # than it, or is the maximum if there is no greater key
+    i = self.Upper_Bound(key)
+    i = self.Prev(i) if i != 0 else self.Last()
+    return self.values[i] if i != 0 else None
+  
+  def Range(self, lo : int = None, hi : int = None, inclusive : tuple = (True, True), reverse : bool = False):
+    """
+    A generator that yields every key between lo and hi in sorted order (see
+    Red_Black_Tree.Range). The first key is found with one descent, and each
+    step after it moves to the next position in order.
+    """
+    
+    keys, values = self.keys, self.values
+    lo_inclusive, hi_inclusive = inclusive
+    
+    if not reverse:
+      if lo is None:
+        i = self.First()
+      else:
+        i = self.Lower_Bound(lo) if lo_inclusive else self.Upper_Bound(lo)
+      
+      while i != 0:
+        if hi is not None and (hi < keys[i] or (not hi_inclusive and keys[i] == hi)):
+          return
+        yield values[i]
+        i = self.Next(i)
+    
+    else:
+      if hi is None:
+        i = self.Last()
+      else:
+        i = self.Upper_Bound(hi) if hi_inclusive else self.Lower_Bound(hi)
+        i = self.Prev(i) if i != 0 else self.Last()
+      
+      while i != 0:
+        if lo is not None and (keys[i] < lo or (not lo_inclusive and keys[i] == lo)):
+          return
+        yield values[i]
+        i = self.Prev(i)
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Lower_Bound(self, key : int) -> int:
+    """
+    Returns the position of the smallest key that is at least key, or 0 if
+    there is none.
+    """
+    
+    keys, n = self.keys, self.n
+    i = 1
+    while i <= n:
+      i += i + (keys[i] < key)
+    
+    # Every step to the right after the last step to the left added a 1 bit,
+    # and the answer is where that last step to the left was taken from
+    j = i + 1
+    return i >> (j & -j).bit_length()
+  
+  def Upper_Bound(self, key : int) -> int:
+    """
+    Returns the position of the smallest key that is greater than key, or 0
+    if there is none.
+    """
+    
+    keys, n = self.keys, self.n
+    i = 1
+    while i <= n:
+      i += i + (keys[i] <= key)
+    
+    j = i + 1
+    return i >> (j & -j).bit_length()
+  
+  def First(self) -> int:
+    """
+    Returns the position of the smallest key, or 0 if there are no keys.
+    """
+    
+    if self.n == 0:
+      return 0
+    i = 1
+    while 2 * i <= self.n:
+      i *= 2
+    return i
+  
+  def Last(self) -> int:
+    """
+    Returns the position of the largest key, or 0 if there are no keys.
+    """
+    
+    if self.n == 0:
+      return 0
+    i = 1
+    while 2 * i + 1 <= self.n:
+      i = 2 * i + 1
+    return i
+  
+  def Next(self, i : int) -> int:
+    """
+    Returns the position of the key after the one at position i, or 0 if it
+    is the largest (see Red_Black_Tree.Successor).
+    """
+    
+    n = self.n
+    
+    # The minimum of the right subtree, if there is one
+    if 2 * i + 1 <= n:
+      i = 2 * i + 1
+      while 2 * i <= n:
+        i *= 2
+      return i
+    
+    # Otherwise climb while i is a right child (odd), then once more
+    while i & 1:
+      i >>= 1
+    return i >> 1
+  
+  def Prev(self, i : int) -> int:
+    """
+    Returns the position of the key before the one at position i, or 0 if it
+    is the smallest (see Red_Black_Tree.Predecessor).
+    """
+    
+    n = self.n
+    
+    # The maximum of the left subtree, if there is one
+    if 2 * i <= n:
+      i = 2 * i
+      while 2 * i + 1 <= n:
+        i = 2 * i + 1
+      return i
+    
+    # Otherwise climb while i is a left child (even), then once more
+    while i and not i & 1:
+      i >>= 1
+    return i >> 1
+
+# A node in an Order Statistic Tree as presented in the CLRS textbook
+class Order_Statistic_Node(Red_Black_Node):
+  """
+  A node in an Order Statistic Tree as presented in the CLRS textbook. In
+  addition to the attributes of a Red_Black_Node, the node has:
+    
+    size : The number of nodes in the subtree rooted at this node (including
+           the node itself). The size of the sentinel T.nil is 0.
+  """
+  
+  __slots__ = ('size',)
+  
+  def __init__(self, key : int):
+    """
+    Initializes the key to the value passed to the constructor, the size to 0
+    and all other values to None.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    
+    # Number of nodes in the subtree rooted at this node
+    self.size = 0
+
+# An Order Statistic Tree as presented in the CLRS textbook
+class Order_Statistic_Tree(Red_Black_Tree):
+  """
+  An Order Statistic Tree as presented in the CLRS textbook. This is a Red
+  Black Tree whose nodes also store the size of their subtree, which lets us
+  find the node with the i-th smallest key (Select) and the position of a key
+  in sorted order (Rank and CountLess) in O(lg(n)) time, rather than walking
+  through the tree with Successor.
+  
+  The sizes are updated on the way down in Insert_Node, along the path from
+  the removed position to the root by Update_Path (which Remove calls before
+  Delete_Fixup), and locally in Left_Rotate and Right_Rotate.
+  """
+  
+  Node = Order_Statistic_Node
+  
+  def Select(self, i : int) -> Order_Statistic_Node:
+    """
+    Finds the node with the i-th smallest key in the tree, where the node with
+    the smallest key has i = 1.
+
+    Parameters
+    ----------
+    i : int
+      The position of the node to be returned in sorted order.
+
+    Returns
+    -------
+    Order_Statistic_Node
+      The node with the i-th smallest key or self.nil (if i is not between 1
+                                                        and the tree's size).
+
+    """
+    
+    if i < 1 or i > self.root.size:
+      return self.nil
+    
+    x = self.root
+    
+    # r is the position of x within the subtree rooted at x
+    r = x.left.size + 1
+    while i != r:
+      if i < r:
+        x = x.left
+      else:
+        x = x.right
+        i -= r
+      r = x.left.size + 1
+    return x
+  
+  def CountLess(self, key : int) -> int:
+    """
+    Returns the number of nodes in the tree whose key is less than key. The key
+    does not have to be in the tree.
+
+    Parameters
+    ----------
+    key : int
+      The key to compare against.
+
+    Returns
+    -------
+    int
+      The number of keys in the tree that are less than key.
+
+    """
+    
+    count = 0
+    x = self.root
+    while x != self.nil:
+      
+      # x and everything in its left subtree are less than key
+      if x.key < key:
+        count += x.left.size + 1
+        x = x.right
+      else:
+        x = x.left
+    return count
+  
+  def Rank(self, key : int) -> int:
+    """
+    Returns the position of key in sorted order, where the smallest key has
+    rank 1. If several nodes have the key, the rank of the first one is
+    returned.
+
+    Parameters
+    ----------
+    key : int
+      The key whose rank will be returned.
+
+    Returns
+    -------
+    int
+      The rank of key or None (if no node has a key equal to key).
+
+    """
+    
+    # Same descent as CountLess, but we also remember the last node where we
+    # went left. That is the smallest key not less than key, so key is in the
+    # tree exactly when this node's key is equal to it.
+    count = 0
+    y = self.nil
+    x = self.root
+    while x != self.nil:
+      if x.key < key:
+        count += x.left.size + 1
+        x = x.right
+      else:
+        y = x
+        x = x.left
+    
+    if y == self.nil or y.key != key:
+      return None
+    return count + 1
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Insert_Node(self, z : Order_Statistic_Node, x : Order_Statistic_Node) -> None:
+    """
+    Inserts node z at the appropriate place in the subtree rooted at x (see
+    Red_Black_Tree.Insert_Node), adding one to the size of every node on the
+    path from the root to z's new position.
+
+    Parameters
+    ----------
+    z : Order_Statistic_Node
+      The node to be inserted.
+    x : Order_Statistic_Node
+      The root of the subtree where z is inserted.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if self.counters is not None:
+      self.Count_Descent(x, z.key)
+    self.frozen = None
+    
+    # z will be added to the subtree of every ancestor of x
+    y = x.p if x != self.nil else self.nil
+    while y != self.nil:
+      y.size += 1
+      y = y.p
+    
+    y = self.nil if x == self.root else x.p
+    while x != self.nil:
+      y = x
+      x.size += 1
+      if z.key < x.key:
+        x = x.left
+      else:
+        x = x.right
+    
+    z.p = y
+    
+    if y == self.nil:
+      self.root = z
+    elif z.key < y.key:
+      y.left = z
+    else:
+      y.right = z
+    
+    z.left = self.nil
+    z.right = self.nil
+    z.color = RED
+    z.size = 1
+    
+    self.Insert_Fixup(z)
+    
+    self.num_nodes += 1
+  
+  def Build(self, nodes : list) -> None:
+    """
+    Replaces the contents of the tree with the nodes (see
+    Red_Black_Tree.Build) and then sets the size of every node, children
+    before parents.
+
+    Parameters
+    ----------
+    nodes : list
+      The nodes to put in the tree, in non-decreasing order of their keys.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    super().Build(nodes)
+    
+    # Visiting nodes in reverse pre-order (root, right, left) visits every
+    # node after its children
+    order = []
+    stack = [self.root] if self.root != self.nil else []
+    while stack:
+      x = stack.pop()
+      order.append(x)
+      if x.left != self.nil:
+        stack.append(x.left)
+      if x.right != self.nil:
+        stack.append(x.right)
+    
+    for x in reversed(order):
+      x.size = x.left.size + x.right.size + 1
+  
+  def Update_Path(self, x : Order_Statistic_Node) -> None:
+    """
+    Recomputes the size of x and of every ancestor of x, after x's children
+    have been changed directly (see Red_Black_Tree.Update_Path).
+    """
+    
+    while x != self.nil:
+      x.size = x.left.size + x.right.size + 1
+      x = x.p
+  
+  def Split_Sizes(self, a : Order_Statistic_Node, b : Order_Statistic_Node) -> tuple:
+    """
+    Returns the number of nodes in the trees rooted at a and b, which are
+    simply their sizes.
+    """
+    
+    return a.size, b.size
+  
+  def Left_Rotate(self, x : Order_Statistic_Node) -> None:
+    """
+    Performs a left rotation on node x (see Red_Black_Tree.Left_Rotate). Only
+    x and its right child y change subtrees, and y's subtree is now the one x
+    had.
+
+    Parameters
+    ----------
+    x : Order_Statistic_Node
+      The node on which we are performing a left rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    super().Left_Rotate(x)
+    x.p.size = x.size
+    x.size = x.left.size + x.right.size + 1
+  
+  def Right_Rotate(self, y : Order_Statistic_Node) -> None:
+    """
+    Performs a right rotation on node y (see Red_Black_Tree.Right_Rotate). Only
+    y and its left child x change subtrees, and x's subtree is now the one y
+    had.
+
+    Parameters
+    ----------
+    y : Order_Statistic_Node
+      The node on which we are performing a right rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    super().Right_Rotate(y)
+    y.p.size = y.size
+    y.size = y.left.size + y.right.size + 1
+
+# A node in an Interval Tree as presented in the CLRS textbook
+class Interval_Node(Red_Black_Node):
+  """
+  A node in an Interval Tree as presented in Section 14.3 of CLRS. The node
+  stores the closed interval [key, high], so its key is the interval's low
+  endpoint. In addition to the attributes of a Red_Black_Node, the node has:
+    
+    high : The interval's high endpoint
+    max  : The largest high endpoint in the subtree rooted at this node. The
+           max of the sentinel T.nil is -INFINITY.
+  """
+  
+  __slots__ = ('high', 'max')
+  
+  def __init__(self, key : int, high : int = None):
+    """
+    Initializes the interval to [key, high] (or the single point [key, key]
+    if no high endpoint is given) and all other values to None.
+
+    Parameters
+    ----------
+    key : int
+      The interval's low endpoint.
+    high : int, optional
+      The interval's high endpoint. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    self.high = key if high is None else high
+    self.max = -INFINITY
+
+# An Interval Tree as presented in the CLRS textbook
+class Interval_Tree(Red_Black_Tree):
+  """
+  An Interval Tree as presented in Section 14.3 of CLRS: a Red Black Tree of
+  closed intervals keyed by their low endpoints, in which every node also
+  stores the largest high endpoint in its subtree.
+  
+  A node's max only depends on its own high endpoint and its children's max,
+  so it is recomputed along the path from the changed position to the root by
+  Update_Path (which Insert_Node calls before Insert_Fixup, and Remove calls
+  after its Transplants and before Delete_Fixup), and locally for the two
+  nodes that change subtrees in Left_Rotate and Right_Rotate. The fixups
+  otherwise only recolor nodes, which leaves max alone.
+  """
+  
+  Node = Interval_Node
+  Node_Fields = ('key', 'high')
+  
+  def Insert(self, low : int, high : int = None) -> Interval_Node:
+    """
+    Inserts the interval [low, high] into the tree.
+
+    Parameters
+    ----------
+    low : int
+      The interval's low endpoint.
+    high : int, optional
+      The interval's high endpoint, which must be at least low. The default
+      is None, which inserts the single point [low, low].
+
+    Raises
+    ------
+    ValueError
+      If high is less than low.
+
+    Returns
+    -------
+    Interval_Node
+      The new node.
+
+    """
+    
+    z = self.Node(low, high)
+    if z.high < low:
+      raise ValueError(f"Interval [{low}, {high}] is empty")
+    self.Insert_Node(z, self.root)
+    return z
+  
+  def Delete(self, low : int, high : int = None) -> None:
+    """
+    Deletes a node with the interval [low, high] (or [low, low] if no high
+    endpoint is given) from the tree, if there is one.
+    """
+    
+    high = low if high is None else high
+    
+    # Nodes with the same low endpoint can be on either side of each other
+    # after rotations, so we search every subtree that could hold low
+    stack = [self.root]
+    while stack:
+      x = stack.pop()
+      if x == self.nil:
+        continue
+      if x.key == low and x.high == high:
+        self.Remove(x)
+        return
+      if not x.key < low:
+        stack.append(x.left)
+      if not low < x.key:
+        stack.append(x.right)
+  
+  def Interval_Search(self, low : int, high : int) -> Interval_Node:
+    """
+    Finds a node whose interval overlaps [low, high], as INTERVAL-SEARCH in
+    CLRS, in O(lg(n)) time. If x's left subtree has an interval ending at or
+    after low, then either one of them overlaps [low, high] or all of them
+    start after high (as do all the intervals to the right of x), so it is
+    enough to search the left subtree. Otherwise, only the right subtree can
+    hold an overlapping interval.
+
+    Parameters
+    ----------
+    low : int
+      The low endpoint of the query interval.
+    high : int
+      The high endpoint of the query interval.
+
+    Returns
+    -------
+    Interval_Node
+      A node whose interval overlaps [low, high], or T.nil (if there is none).
+
+    """
+    
+    x = self.root
+    while x != self.nil and (high < x.key or x.high < low):
+      if x.left != self.nil and x.left.max >= low:
+        x = x.left
+      else:
+        x = x.right
+    return x
+  
+  def any_overlap(self, low : int, high : int) -> bool:
+    """
+    Returns True if some interval in the tree overlaps [low, high] and False
+    otherwise, in O(lg(n)) time (see Interval_Search).
+    """
+    
+    return self.Interval_Search(low, high) != self.nil
+  
+  def overlapping(self, low : int, high : int):
+    """
+    A generator that yields every interval in the tree that overlaps
+    [low, high], as (low, high) pairs in order of their low endpoints.
+    
+    It walks the tree in order, skipping every subtree whose max is less than
+    low (none of its intervals reach low) and every right subtree of a node
+    whose key is greater than high (all of its intervals start after high).
+    Every subtree that is entered holds an interval ending at or after low,
+    so yielding k intervals visits O(min(n, (k + 1) lg(n))) nodes.
+    
+    The tree must not be modified while the generator is in use.
+
+    Parameters
+    ----------
+    low : int
+      The low endpoint of the query interval.
+    high : int
+      The high endpoint of the query interval.
+
+    Yields
+    ------
+    tuple
+      The overlapping intervals.
+
+    """
+    
+    nil = self.nil
+    stack = []
+    x = self.root
+    while True:
+      
+      # Go left while the left subtrees can still reach low
+      while x != nil and x.max >= low:
+        stack.append(x)
+        x = x.left
+      if not stack:
+        return
+      
+      x = stack.pop()
+      if high < x.key:
+        
+        # x and everything after it start after high. Only the nodes left on
+        # the stack come before x, but they are all ancestors that we
+        # went left from, so they start after high too.
+        return
+      if low <= x.high:
+        yield x.key, x.high
+      x = x.right
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Update_Path(self, x : Interval_Node) -> None:
+    """
+    Recomputes the max of x and of every ancestor of x, after x's children
+    have been changed directly (see Red_Black_Tree.Update_Path).
+    """
+    
+    while x != self.nil:
+      x.max = max(x.high, x.left.max, x.right.max)
+      x = x.p
+  
+  def Build(self, nodes : list) -> None:
+    """
+    Replaces the contents of the tree with the nodes (see
+    Red_Black_Tree.Build) and then sets the max of every node, children
+    before parents.
+
+    Parameters
+    ----------
+    nodes : list
+      The nodes to put in the tree, in non-decreasing order of their keys.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().Build(nodes)
+    
+    # Visiting nodes in reverse pre-order (root, right, left) visits every
+    # node after its children
+    order = []
+    stack = [self.root] if self.root != self.nil else []
+    while stack:
+      x = stack.pop()
+      order.append(x)
+      if x.left != self.nil:
+        stack.append(x.left)
+      if x.right != self.nil:
+        stack.append(x.right)
+    
+    for x in reversed(order):
+      x.max = max(x.high, x.left.max, x.right.max)
+  
+  def Left_Rotate(self, x : Interval_Node) -> None:
+    """
+    Performs a left rotation on node x (see Red_Black_Tree.Left_Rotate). Only
+    x and its right child y change subtrees, and y's subtree now holds the
+    same intervals that x's did.
+
+    Parameters
+    ----------
+    x : Interval_Node
+      The node on which we are performing a left rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    super().Left_Rotate(x)
+    x.p.max = x.max
+    x.max = max(x.high, x.left.max, x.right.max)
+  
+  def Right_Rotate(self, y : Interval_Node) -> None:
+    """
+    Performs a right rotation on node y (see Red_Black_Tree.Right_Rotate). Only
+    y and its left child x change subtrees, and x's subtree now holds the same
+    intervals that y's did.
+
+    Parameters
+    ----------
+    y : Interval_Node
+      The node on which we are performing a right rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    super().Right_Rotate(y)
+    y.p.max = y.max
+    y.max = max(y.high, y.left.max, y.right.max)
+
+# A node in a Red Black Tree that maps its key to a value
+class Red_Black_Map_Node(Red_Black_Node):
+  """
+  A node in a Red_Black_Map. In addition to the attributes of a
+  Red_Black_Node, the node has:
+    
+    value : The value stored under the node's key
+  """
+  
+  __slots__ = ('value',)
+  
+  def __init__(self, key : int, value = None):
+    """
+    Initializes the key and value to the values passed to the constructor and
+    initializes all other values to None.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node.
+    value : optional
+      The value stored under the key. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    
+    # The value stored under the key
+    self.value = value
+
+# A sorted map built on a Red Black Tree
+class Red_Black_Map(Red_Black_Tree):
+  """
+  A Red Black Tree whose nodes store a value along with their key, used as a
+  map sorted by key. Unlike Red_Black_Tree, a key appears in the map at most
+  once: inserting a key that is already in the map replaces the value stored in
+  its node rather than adding a second node. The map supports the usual
+  operations of a Python dict:
+    
+    m[key], m[key] = value, del m[key], m.get(key), m.setdefault(key)
+  
+  and m.items() yields (key, value) pairs in sorted order of the keys.
+  """
+  
+  Node = Red_Black_Map_Node
+  Node_Fields = ('key', 'value')
+  
+  @classmethod
+  def from_sorted(cls, keys, sort : bool = False) -> 'Red_Black_Map':
+    """
+    Builds a map from keys in O(n) time (see Red_Black_Tree.from_sorted),
+    storing the value None under each key. Repeats of a key are given a
+    single node.
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to put in the map, in non-decreasing order.
+    sort : bool, optional
+      If True, keys are sorted first (in O(n lg(n)) time). The default is
+      False.
+
+    Raises
+    ------
+    ValueError
+      If sort is False and keys are not in non-decreasing order.
+
+    Returns
+    -------
+    Red_Black_Map
+      A map containing every key in keys.
+
+    """
+    
+    t = cls()
+    
+    nodes = []
+    for key in (sorted(keys) if sort else keys):
+      if nodes and key == nodes[-1].key:
+        continue
+      if nodes and key < nodes[-1].key:
+        raise ValueError("from_sorted() requires keys in non-decreasing order (pass sort=True to sort them)")
+      nodes.append(t.Node(key))
+    
+    t.Build(nodes)
+    return t
+  
+  def __getitem__(self, key : int):
+    """
+    Returns the value stored under key, raising KeyError if key is not in the
+    map.
+    """
+    
+    x = self.Search(self.root, key)
+    
+    if x == self.nil:
+      raise KeyError(key)
+    return x.value
+  
+  def __setitem__(self, key : int, value) -> None:
+    """
+    Stores value under key, replacing the previous value if key is already in
+    the map.
+    """
+    
+    self.Find_Or_Insert(key, value).value = value
+  
+  def __delitem__(self, key : int) -> None:
+    """
+    Deletes key and its value from the map, raising KeyError if key is not in
+    the map.
+    """
+    
+    x = self.Search(self.root, key)
+    
+    if x == self.nil:
+      raise KeyError(key)
+    self.Remove(x)
+  
+  def get(self, key : int, default = None):
+    """
+    Returns the value stored under key, or default if key is not in the map.
+    """
+    
+    x = self.Search(self.root, key)
+    
+    if x == self.nil:
+      return default
+    return x.value
+  
+  def setdefault(self, key : int, default = None):
+    """
+    Returns the value stored under key. If key is not in the map, default is
+    stored under it first.
+    """
+    
+    return self.Find_Or_Insert(key, default).value
+  
+  def items(self):
+    """
+    A generator that yields every (key, value) pair in the map in sorted order
+    of the keys. The map must not be modified while the generator is in use.
+    """
+    
+    stack = []
+    x = self.root
+    while x != self.nil or stack:
+      while x != self.nil:
+        stack.append(x)
+        x = x.left
+      x = stack.pop()
+      yield x.key, x.value
+      x = x.right
+  
+  def Insert(self, key : int, value = None) -> None:
+    """
+    Stores value under key, replacing the previous value if key is already in
+    the map (the same as m[key] = value).
+
+    Parameters
+    ----------
+    key : int
+      The key to be inserted.
+    value : optional
+      The value stored under the key. The default is None.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    self[key] = value
+  
+  def PopMin(self) -> tuple:
+    """
+    Deletes the smallest key from the map and returns it with its value, as a
+    (key, value) pair (see Red_Black_Tree.PopMin). Raises IndexError if the
+    map is empty.
+    """
+    
+    if self.root == self.nil:
+      raise IndexError("PopMin from an empty map")
+    
+    z = self.Minimum(self.root)
+    self.Remove(z)
+    return z.key, z.value
+  
+  def PopMax(self) -> tuple:
+    """
+    Deletes the largest key from the map and returns it with its value, as a
+    (key, value) pair (see Red_Black_Tree.PopMax). Raises IndexError if the
+    map is empty.
+    """
+    
+    if self.root == self.nil:
+      raise IndexError("PopMax from an empty map")
+    
+    z = self.Maximum(self.root)
+    self.Remove(z)
+    return z.key, z.value
+  
+  def InsertMany(self, keys) -> int:
+    """
+    Inserts every key in keys that is not already in the map, with the value
+    None. As in Red_Black_Tree.InsertMany, the keys are sorted first, and
+    keys already in the map are found as part of the insertion rather than by
+    a search from the root:
+      
+      - If the batch is less than half the size of the map, each key is
+        inserted starting from the node of the key before it (see
+        Insert_From), which stops at the key's node if it is already there.
+      - Otherwise, the keys are merged with the map's nodes in one pass,
+        skipping keys that have a node, and the nodes are relinked with
+        Build.
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to be inserted.
+
+    Returns
+    -------
+    int
+      The number of keys inserted. Keys that were already in the map, and
+      repeats of a key within the batch, are not counted.
+
+    """
+    
+    keys = sorted(keys)
+    
+    if 2 * len(keys) < self.num_nodes:
+      before = self.num_nodes
+      x = self.nil
+      for key in keys:
+        x = self.Insert_From(x, key)
+      return self.num_nodes - before
+    
+    existing = self.Nodes()
+    nodes = []
+    i = 0
+    for key in keys:
+      while i < len(existing) and existing[i].key < key:
+        nodes.append(existing[i])
+        i += 1
+      if (i < len(existing) and existing[i].key == key) or (nodes and nodes[-1].key == key):
+        continue
+      nodes.append(self.Node(key))
+    nodes.extend(existing[i:])
+    
+    self.Build(nodes)
+    return len(nodes) - len(existing)
+  
+  @staticmethod
+  def Join(left : 'Red_Black_Map', pivot, right : 'Red_Black_Map') -> 'Red_Black_Map':
+    """
+    Joins two maps (see Red_Black_Tree.Join). Since a key has a single node,
+    a pivot equal to the largest key of left or the smallest key of right is
+    not added again (the key keeps its value), and if those two keys are
+    equal, the node of the one in left takes the value of the one in right
+    and the node in right is removed, before the trees are joined.
+
+    Parameters
+    ----------
+    left : Red_Black_Map
+      The map with the smaller keys.
+    pivot : int
+      A key between the keys of left and those of right, or None. It is
+      added with the value None.
+    right : Red_Black_Map
+      The map with the larger keys.
+
+    Raises
+    ------
+    ValueError
+      If the keys of left, pivot and the keys of right are not in order.
+
+    Returns
+    -------
+    Red_Black_Map
+      The joined map. left and right are emptied.
+
+    """
+    
+    x = left.Maximum(left.root) if left.root != left.nil else None
+    y = right.Minimum(right.root) if right.root != right.nil else None
+    bounds = [z for z in (x and x.key, pivot, y and y.key) if z is not None]
+    for i in range(1, len(bounds)):
+      if bounds[i] < bounds[i-1]:
+        raise ValueError("Join() requires the keys of left to be at most pivot and the keys of right to be at least pivot")
+    
+    if pivot is not None and ((x is not None and x.key == pivot) or (y is not None and y.key == pivot)):
+      pivot = None
+    
+    if pivot is None and x is not None and y is not None and x.key == y.key:
+      x.value = y.value
+      right.Remove(y)
+    
+    return Red_Black_Tree.Join(left, pivot, right)
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Insert_From(self, x : Red_Black_Map_Node, key : int) -> Red_Black_Map_Node:
+    """
+    Inserts the key with the value None, starting from node x rather than
+    from the root (see Red_Black_Tree.Insert_From). If the key is already in
+    the map, its node is returned and keeps its value.
+    """
+    
+    return self.Find_Or_Insert(key, None, self.Finger(x, key) if x != self.nil else self.root)
+  
+  def Find_Or_Insert(self, key : int, value, x : Red_Black_Map_Node = None) -> Red_Black_Map_Node:
+    """
+    Searches for the node with the key in a single descent from the root. If
+    there is no such node, a new node with the key and value is inserted where
+    the search ended.
+
+    Parameters
+    ----------
+    key : int
+      The key that we are searching for.
+    value :
+      The value of the new node, if one is inserted.
+    x : Red_Black_Map_Node, optional
+      The node to descend from instead of the root, which must be one that
+      the search from the root would pass through (see Finger). The default
+      is None.
+
+    Returns
+    -------
+    Red_Black_Map_Node
+      The node with the key, whether it was found or inserted.
+
+    """
+    
+    y = self.nil
+    if x is None:
+      x = self.root
+    while x != self.nil:
+      if key == x.key:
+        return x
+      y = x
+      if key < x.key:
+        x = x.left
+      else:
+        x = x.right
+    
+    # The new node becomes a child of y, so inserting from y only takes a
+    # single step
+    z = self.Node(key, value)
+    self.Insert_Node(z, y if y != self.nil else self.root)
+    return z
+
+# A node in a Red Black Multiset
+class Red_Black_Multiset_Node(Red_Black_Node):
+  """
+  A node in a Red_Black_Multiset. In addition to the attributes of a
+  Red_Black_Node, the node has:
+    
+    count : The number of times the node's key is in the multiset
+  """
+  
+  __slots__ = ('count',)
+  
+  def __init__(self, key : int, count : int = 1):
+    """
+    Initializes the key and count to the values passed to the constructor and
+    initializes all other values to None.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node.
+    count : int, optional
+      The number of times the key is in the multiset. The default is 1.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    
+    # The multiplicity of the key
+    self.count = count
+
+# A multiset built on a Red Black Tree
+class Red_Black_Multiset(Red_Black_Tree):
+  """
+  A Red Black Tree that stores each distinct key in a single node, with a
+  count of how many times the key has been inserted. Inserting a key that is
+  already in the multiset increments its node's count instead of adding a
+  node (which Red_Black_Tree would put in the right subtree of the first),
+  and deleting it decrements the count, removing the node only when the
+  count reaches 0. The number of nodes, and so the memory used and the height
+  of the tree, depends only on the number of distinct keys, however many
+  times each is inserted.
+  
+  As with collections.Counter, len gives the number of distinct keys and
+  total_size the number of keys counting repeats. Iteration and Range yield
+  each key as many times as it is in the multiset, repeating it lazily from
+  its count.
+  """
+  
+  Node = Red_Black_Multiset_Node
+  Node_Fields = ('key', 'count')
+  
+  def __init__(self):
+    """
+    Creates an empty multiset.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__()
+    
+    # The number of keys counting repeats, the sum of the nodes' counts
+    self.num_items = 0
+  
+  def __iter__(self):
+    """
+    Returns an iterator over every key in sorted order, each repeated as many
+    times as it is in the multiset.
+    """
+    
+    return self.Node_Values(self.Range_Nodes())
+  
+  def __reversed__(self):
+    """
+    Returns an iterator over every key from largest to smallest, each
+    repeated as many times as it is in the multiset.
+    """
+    
+    return self.Node_Values(self.Range_Nodes(reverse=True))
+  
+  @classmethod
+  def from_sorted(cls, keys, sort : bool = False) -> 'Red_Black_Multiset':
+    """
+    Builds a multiset from keys in O(n) time (see Red_Black_Tree.from_sorted),
+    giving each run of equal keys a single node.
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to put in the multiset, in non-decreasing order.
+    sort : bool, optional
+      If True, keys are sorted first (in O(n lg(n)) time). The default is
+      False.
+
+    Raises
+    ------
+    ValueError
+      If sort is False and keys are not in non-decreasing order.
+
+    Returns
+    -------
+    Red_Black_Multiset
+      A multiset containing every key in keys.
+
+    """
+    
+    t = cls()
+    
+    nodes = []
+    for key in (sorted(keys) if sort else keys):
+      if nodes and key == nodes[-1].key:
+        nodes[-1].count += 1
+      elif nodes and key < nodes[-1].key:
+        raise ValueError("from_sorted() requires keys in non-decreasing order (pass sort=True to sort them)")
+      else:
+        nodes.append(t.Node(key))
+    
+    t.Build(nodes)
+    return t
+  
+  def count(self, key : int) -> int:
+    """
+    Returns the number of times key is in the multiset.
+    """
+    
+    x = self.Search(self.root, key)
+    return x.count if x != self.nil else 0
+  
+  def total_size(self) -> int:
+    """
+    Returns the number of keys in the multiset, counting repeats.
+    """
+    
+    return self.num_items
+  
+  def Insert(self, key : int, count : int = 1) -> None:
+    """
+    Adds count copies of key to the multiset. If key already has a node, its
+    count is increased, found in the same descent from the root that would
+    otherwise find where to insert a new node.
+
+    Parameters
+    ----------
+    key : int
+      The key to be inserted.
+    count : int, optional
+      The number of copies to insert. The default is 1.
+
+    Raises
+    ------
+    ValueError
+      If count is less than 1.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if count < 1:
+      raise ValueError(f"Cannot insert {count} copies of a key")
+    
+    self.Insert_From(self.nil, key, count)
+  
+  def InsertMany(self, keys) -> int:
+    """
+    Inserts every key in keys. The keys are sorted and counted first, and
+    keys already in the multiset are found as part of the insertion rather
+    than by a search from the root (see Red_Black_Map.InsertMany):
+      
+      - If the batch has fewer distinct keys than half the number of nodes,
+        each key is inserted starting from the node of the key before it (see
+        Insert_From), which adds to the count of the key's node if it is
+        already there.
+      - Otherwise, the keys are merged with the multiset's nodes in one pass,
+        adding to the counts of keys that have a node, and the nodes are
+        relinked with Build.
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to be inserted.
+
+    Returns
+    -------
+    int
+      The number of keys inserted, counting repeats.
+
+    """
+    
+    before = self.num_items
+    
+    # Each distinct key with the number of times it is in the batch
+    runs = []
+    for key in sorted(keys):
+      if runs and key == runs[-1][0]:
+        runs[-1][1] += 1
+      else:
+        runs.append([key, 1])
+    
+    if 2 * len(runs) < self.num_nodes:
+      x = self.nil
+      for key, count in runs:
+        x = self.Insert_From(x, key, count)
+      return self.num_items - before
+    
+    existing = self.Nodes()
+    nodes = []
+    i = 0
+    for key, count in runs:
+      while i < len(existing) and existing[i].key < key:
+        nodes.append(existing[i])
+        i += 1
+      if i < len(existing) and existing[i].key == key:
+        existing[i].count += count
+      else:
+        nodes.append(self.Node(key, count))
+    nodes.extend(existing[i:])
+    
+    # Build adds up the counts again
+    self.Build(nodes)
+    return self.num_items - before
+  
+  def Delete(self, key : int, count : int = 1) -> None:
+    """
+    Removes up to count copies of key from the multiset. The node of the key
+    is removed from the tree (see Red_Black_Tree.Remove) only once none are
+    left.
+
+    Parameters
+    ----------
+    key : int
+      The key to be deleted.
+    count : int, optional
+      The number of copies to delete. The default is 1.
+
+    Raises
+    ------
+    ValueError
+      If count is less than 1.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if count < 1:
+      raise ValueError(f"Cannot delete {count} copies of a key")
+    
+    x = self.Search(self.root, key)
+    
+    if x == self.nil:
+      return None
+    
+    self.DeleteNode(x, count)
+  
+  def DeleteNode(self, z : Red_Black_Multiset_Node, count : int = 1) -> None:
+    """
+    Removes up to count copies of z's key, given its node z, without
+    searching for the key (see Delete and Red_Black_Tree.DeleteNode).
+
+    Parameters
+    ----------
+    z : Red_Black_Multiset_Node
+      The node of the key. It must be a node in the multiset.
+    count : int, optional
+      The number of copies to delete. The default is 1.
+
+    Raises
+    ------
+    ValueError
+      If count is less than 1.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    if count < 1:
+      raise ValueError(f"Cannot delete {count} copies of a key")
+    
+    if z.count > count:
+      z.count -= count
+      self.num_items -= count
+      self.frozen = None
+    else:
+      self.num_items -= z.count
+      self.Remove(z)
+  
+  def DeleteMany(self, keys) -> int:
+    """
+    Deletes one copy of the key for every key in keys, as far as there are
+    copies left.
+
+    Parameters
+    ----------
+    keys : iterable
+      The keys to be deleted.
+
+    Returns
+    -------
+    int
+      The number of copies deleted.
+
+    """
+    
+    before = self.num_items
+    
+    keys = sorted(keys)
+    i = 0
+    while i < len(keys):
+      j = i + 1
+      while j < len(keys) and keys[j] == keys[i]:
+        j += 1
+      self.Delete(keys[i], j - i)
+      i = j
+    
+    return before - self.num_items
+  
+  @staticmethod
+  def Join(left : 'Red_Black_Multiset', pivot, right : 'Red_Black_Multiset') -> 'Red_Black_Multiset':
+    """
+    Joins two multisets (see Red_Black_Tree.Join). Since a key has a single
+    node, a pivot equal to the largest key of left or the smallest key of
+    right is added to that key's count, and if those two keys are equal, the
+    node of the one in right is merged into the node of the one in left,
+    before the trees are joined.
+
+    Parameters
+    ----------
+    left : Red_Black_Multiset
+      The multiset with the smaller keys.
+    pivot : int
+      A key between the keys of left and those of right, or None.
+    right : Red_Black_Multiset
+      The multiset with the larger keys.
+
+    Raises
+    ------
+    ValueError
+      If the keys of left, pivot and the keys of right are not in order.
+
+    Returns
+    -------
+    Red_Black_Multiset
+      The joined multiset. left and right are emptied.
+
+    """
+    
+    total = left.num_items + right.num_items + (pivot is not None)
+    
+    x = left.Maximum(left.root) if left.root != left.nil else None
+    y = right.Minimum(right.root) if right.root != right.nil else None
+    bounds = [z for z in (x and x.key, pivot, y and y.key) if z is not None]
+    for i in range(1, len(bounds)):
+      if bounds[i] < bounds[i-1]:
+        raise ValueError("Join() requires the keys of left to be at most pivot and the keys of right to be at least pivot")
+    
+    if pivot is not None and x is not None and x.key == pivot:
+      x.count += 1
+      pivot = None
+    elif pivot is not None and y is not None and y.key == pivot:
+      y.count += 1
+      pivot = None
+    
+    if pivot is None and x is not None and y is not None and x.key == y.key:
+      x.count += y.count
+      right.Remove(y)
+    
+    # Red_Black_Tree.Join clears the frozen arrays of all three multisets
+    t = Red_Black_Tree.Join(left, pivot, right)
+    t.num_items = total
+    left.num_items = right.num_items = 0
+    return t
+  
+  def Split(self, key : int) -> tuple:
+    """
+    Splits the multiset into a multiset with every key less than key and one
+    with every key greater than or equal to key (see Red_Black_Tree.Split).
+    The keys counted with repeats are found by adding up the counts of the
+    smaller of the two, so this takes time proportional to its size.
+
+    Parameters
+    ----------
+    key : int
+      The key to split at. It does not have to be in the multiset.
+
+    Returns
+    -------
+    tuple
+      A pair (left, right) of multisets. This multiset is emptied.
+
+    """
+    
+    total = self.num_items
+    
+    left, right = super().Split(key)
+    
+    smaller, larger = (left, right) if left.num_nodes <= right.num_nodes else (right, left)
+    smaller.num_items = sum(x.count for x in smaller.Nodes())
+    larger.num_items = total - smaller.num_items
+    self.num_items = 0
+    
+    return left, right
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Insert_From(self, x : Red_Black_Multiset_Node, key : int, count : int = 1) -> Red_Black_Multiset_Node:
+    """
+    Adds count copies of key, starting from node x rather than from the root
+    (see Red_Black_Tree.Insert_From). If key already has a node, its count is
+    increased, found in the same descent that would otherwise find where to
+    insert a new node. Returns the node of the key.
+    """
+    
+    self.num_items += count
+    self.frozen = None
+    
+    y = self.nil
+    x = self.Finger(x, key) if x != self.nil else self.root
+    while x != self.nil:
+      if key == x.key:
+        x.count += count
+        return x
+      y = x
+      if key < x.key:
+        x = x.left
+      else:
+        x = x.right
+    
+    # The new node becomes a child of y, so inserting from y only takes a
+    # single step
+    z = self.Node(key, count)
+    self.Insert_Node(z, y if y != self.nil else self.root)
+    return z
+  
+  def Build(self, nodes : list) -> None:
+    """
+    Replaces the contents of the multiset with the nodes (see
+    Red_Black_Tree.Build), which must have distinct keys, and adds up their
+    counts.
+    """
+    
+    super().Build(nodes)
+    self.num_items = sum(x.count for x in nodes)
+  
+  def Node_Values(self, nodes):
+    """
+    Returns an iterator over the key of each of the nodes, repeated as many
+    times as its count.
+    """
+    
+    return chain.from_iterable(starmap(repeat, map(attrgetter('key', 'count'), nodes)))
+
+# A node in a Persistent Red Black Tree
+class Persistent_Red_Black_Node:
+  """
+  A node in a Persistent Red Black Tree. It is a Red_Black_Node without the
+  parent pointer p: a node can be shared by many versions of the tree, each of
+  which may give it a different parent. The node has the following attributes:
+    
+    key   : The key used to compare this node against other nodes
+    left  : The node's left child
+    right : The node's right child
+    color : The node's color (either RED or BLACK)
+  
+  Once a node is reachable from a version of the tree it is never modified.
+  """
+  
+  __slots__ = ('key', 'left', 'right', 'color')
+  
+  def __init__(self, key : int, left = None, right = None, color : int = None):
+    """
+    Initializes the node's attributes to the values passed to the constructor.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node.
+    left : Persistent_Red_Black_Node, optional
+      The node's left child. The default is None.
+    right : Persistent_Red_Black_Node, optional
+      The node's right child. The default is None.
+    color : int, optional
+      The node's color. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.key = key
+    self.left = left
+    self.right = right
+    self.color = color
+
+# A Red Black Tree whose updates leave earlier versions intact
+class Persistent_Red_Black_Tree:
+  """
+  A persistent Red Black Tree. Insert and Delete do not modify the tree they
+  are called on. They copy the nodes on the path from the root to the changed
+  node, plus the O(1) siblings that the fixup recolors or rotates, and return a
+  new version of the tree that shares every other node with the old one. Each
+  update therefore takes O(lg(n)) time and memory, and every earlier version
+  remains a valid tree that can still be read.
+  
+  Nodes have no parent pointers, since a shared node has a different parent in
+  each version. Insert_Fixup and Delete_Fixup follow CLRS, but find a node's
+  parent and grandparent on the stack of copied ancestors that the descent
+  from the root builds, instead of following p.
+  
+  The read-only methods (Search, Minimum, Maximum, Range, iteration, len and
+  in) are those of Red_Black_Tree, since they only walk down from the root.
+  """
+  
+  def __init__(self):
+    """
+    Creates an empty tree with its sentinel leaf nil.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    # The sentinel T.nil, which every version of the tree shares
+    self.nil = Persistent_Red_Black_Node(None, color=BLACK)
+    self.root = self.nil
+    self.num_nodes = 0
+  
+  # Search is shared with Red_Black_Tree, which checks for stats and for a
+  # key function
+  counters = None
+  key_function = None
+  
+  isEmpty = Red_Black_Tree.isEmpty
+  Size = Red_Black_Tree.Size
+  __len__ = Red_Black_Tree.__len__
+  __contains__ = Red_Black_Tree.__contains__
+  __iter__ = Red_Black_Tree.__iter__
+  __reversed__ = Red_Black_Tree.__reversed__
+  Search = Red_Black_Tree.Search
+  Minimum = Red_Black_Tree.Minimum
+  Maximum = Red_Black_Tree.Maximum
+  Range = Red_Black_Tree.Range
+  Range_Nodes = Red_Black_Tree.Range_Nodes
+  Node_Values = Red_Black_Tree.Node_Values
+  
+  def Keys(self) -> list:
+    """
+    Returns a list of every key in the tree in sorted order.
+    """
+    
+    return list(self)
+  
+  def Insert(self, key : int) -> 'Persistent_Red_Black_Tree':
+    """
+    Returns a new version of the tree with a node with the key inserted. As in
+    Red_Black_Tree, a key equal to one already in the tree goes to its right.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node to be inserted.
+
+    Returns
+    -------
+    Persistent_Red_Black_Tree
+      The new version of the tree.
+
+    """
+    
+    t = self.New_Version()
+    nil = t.nil
+    
+    # Copy the path down to where the new node goes. stack holds the copies,
+    # so stack[-1] is the parent of the new node.
+    stack = []
+    y = None
+    x = self.root
+    while x != nil:
+      x = t.Copy_Node(x, y, y is not None and x is y.left)
+      stack.append(x)
+      y = x
+      x = x.left if key < x.key else x.right
+    
+    z = t.New_Node(key, nil, nil, RED)
+    t.Link(y, None, z, y is not None and key < y.key)
+    t.num_nodes += 1
+    
+    t.Insert_Fixup(z, stack)
+    return t
+  
+  def Delete(self, key : int) -> 'Persistent_Red_Black_Tree':
+    """
+    Returns a new version of the tree with a node with the key deleted, or the
+    tree itself if no node has the key.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node to be deleted.
+
+    Returns
+    -------
+    Persistent_Red_Black_Tree
+      The new version of the tree.
+
+    """
+    
+    nil = self.nil
+    
+    # Find the node before copying anything, so that a missing key costs
+    # nothing
+    if self.Search(self.root, key) == nil:
+      return self
+    
+    t = self.New_Version()
+    
+    # Copy the path down to z, the node with the key
+    stack = []
+    y = None
+    x = self.root
+    while True:
+      x = t.Copy_Node(x, y, y is not None and key < y.key)
+      stack.append(x)
+      if key == x.key:
+        break
+      y = x
+      x = x.left if key < x.key else x.right
+    z = x
+    
+    # If z has two children, copy the path on to z's successor y, move y's key
+    # into z (which is a copy, so no other version sees the change) and remove
+    # y instead. Either way, the node we remove has at most one child.
+    if z.left != nil and z.right != nil:
+      y = t.Copy_Node(z.right, z, False)
+      stack.append(y)
+      while y.left != nil:
+        y = t.Copy_Node(y.left, y, True)
+        stack.append(y)
+      z.key = y.key
+      z = y
+    
+    # Splice z out, replacing it with its only child x (which may be nil).
+    # x is copied because the fixup may color it BLACK.
+    stack.pop()
+    y = stack[-1] if stack else None
+    x = z.left if z.left != nil else z.right
+    if x != nil:
+      x = t.Own(x)
+    t.Link(y, z, x, y is not None and y.left is z)
+    t.num_nodes -= 1
+    
+    if z.color == BLACK:
+      t.Delete_Fixup(x, stack)
+    return t
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def New_Version(self) -> 'Persistent_Red_Black_Tree':
+    """
+    Returns a new version of the tree that shares all of its nodes with this
+    one, which Insert and Delete then modify by copying nodes.
+    """
+    
+    t = Persistent_Red_Black_Tree.__new__(type(self))
+    t.__dict__.update(self.__dict__)
+    return t
+  
+  def New_Node(self, key : int, left : Persistent_Red_Black_Node, right : Persistent_Red_Black_Node, color : int) -> Persistent_Red_Black_Node:
+    """
+    Returns a new node with the given attributes for this version to use.
+    """
+    
+    return Persistent_Red_Black_Node(key, left, right, color)
+  
+  def Own(self, x : Persistent_Red_Black_Node) -> Persistent_Red_Black_Node:
+    """
+    Returns a node with the same attributes as x that this version is free to
+    modify. Since x may be shared with other versions, this is a copy.
+    """
+    
+    return self.New_Node(x.key, x.left, x.right, x.color)
+  
+  def Copy_Node(self, x : Persistent_Red_Black_Node, y : Persistent_Red_Black_Node, left : bool) -> Persistent_Red_Black_Node:
+    """
+    Copies x (see Own) and links the copy in place of x as a child of y, which
+    must be a node of this version that was already copied (or None if x is
+    the root).
+
+    Parameters
+    ----------
+    x : Persistent_Red_Black_Node
+      The node to copy.
+    y : Persistent_Red_Black_Node
+      The (copied) parent of x, or None.
+    left : bool
+      True if x is y's left child.
+
+    Returns
+    -------
+    Persistent_Red_Black_Node
+      The copy of x.
+
+    """
+    
+    c = self.Own(x)
+    if c is not x:
+      self.Link(y, x, c, left)
+    return c
+  
+  def Link(self, y : Persistent_Red_Black_Node, u : Persistent_Red_Black_Node, v : Persistent_Red_Black_Node, left : bool) -> None:
+    """
+    Makes v the child of y that u was, or the root if y is None. This plays
+    the part of Transplant, with the parent passed in rather than read from
+    u.p.
+
+    Parameters
+    ----------
+    y : Persistent_Red_Black_Node
+      The parent of u, or None if u is the root.
+    u : Persistent_Red_Black_Node
+      The node being replaced.
+    v : Persistent_Red_Black_Node
+      The node replacing u.
+    left : bool
+      True if u is y's left child.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if y is None:
+      self.root = v
+    elif left:
+      y.left = v
+    else:
+      y.right = v
+  
+  def Left_Rotate(self, x : Persistent_Red_Black_Node, xp : Persistent_Red_Black_Node) -> Persistent_Red_Black_Node:
+    """
+    Performs a left rotation on x, whose parent is xp (None if x is the root).
+    x and its right child y must both be copies belonging to this version.
+    Returns y, which takes x's place.
+    """
+    
+    y = x.right
+    x.right = y.left
+    y.left = x
+    self.Link(xp, x, y, xp is not None and xp.left is x)
+    return y
+  
+  def Right_Rotate(self, y : Persistent_Red_Black_Node, yp : Persistent_Red_Black_Node) -> Persistent_Red_Black_Node:
+    """
+    Performs a right rotation on y, whose parent is yp (None if y is the
+    root). y and its left child x must both be copies belonging to this
+    version. Returns x, which takes y's place.
+    """
+    
+    x = y.left
+    y.left = x.right
+    x.right = y
+    self.Link(yp, y, x, yp is not None and yp.left is y)
+    return x
+  
+  def Insert_Fixup(self, z : Persistent_Red_Black_Node, stack : list) -> None:
+    """
+    Restores the Red Black properties after z is inserted, as in
+    Red_Black_Tree.Insert_Fixup. stack holds z's ancestors (all of them copies
+    belonging to this version), from the root down to z's parent.
+
+    Parameters
+    ----------
+    z : Persistent_Red_Black_Node
+      The node just inserted.
+    stack : list
+      z's ancestors, root first.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    while stack and stack[-1].color == RED:
+      
+      # z's parent is RED, so it is not the root and z has a grandparent
+      zp = stack.pop()
+      zpp = stack.pop()
+      
+      if zp is zpp.left:
+        y = zpp.right
+        
+        # z's uncle y is RED (Case 1 in CLRS). y is shared with other
+        # versions, so it is copied before being recolored. We continue from
+        # z's grandparent.
+        if y.color == RED:
+          y = self.Copy_Node(y, zpp, False)
+          zp.color = BLACK
+          y.color = BLACK
+          zpp.color = RED
+          z = zpp
+          continue
+        
+        # z's uncle is BLACK and z is a right child (Case 2 in CLRS). A left
+        # rotation turns it into Case 3.
+        if z is zp.right:
+          zp = self.Left_Rotate(zp, zpp)
+        
+        # z's uncle is BLACK and z is a left child (Case 3 in CLRS)
+        zp.color = BLACK
+        zpp.color = RED
+        self.Right_Rotate(zpp, stack[-1] if stack else None)
+      
+      else:
+        
+        # Same as above, but with "right" and "left" exchanged
+        y = zpp.left
+        
+        if y.color == RED:
+          y = self.Copy_Node(y, zpp, True)
+          zp.color = BLACK
+          y.color = BLACK
+          zpp.color = RED
+          z = zpp
+          continue
+        
+        if z is zp.left:
+          zp = self.Right_Rotate(zp, zpp)
+        
+        zp.color = BLACK
+        zpp.color = RED
+        self.Left_Rotate(zpp, stack[-1] if stack else None)
+      
+      break
+    
+    # The root is always a copy (or z itself), so it can be recolored
+    self.root.color = BLACK
+  
+  def Delete_Fixup(self, x : Persistent_Red_Black_Node, stack : list) -> None:
+    """
+    Restores the Red Black properties after a BLACK node is removed, as in
+    Red_Black_Tree.Delete_Fixup. x is the node that took its place, which is
+    either nil or a copy belonging to this version, and stack holds x's
+    ancestors (all of them copies), from the root down to x's parent. x's
+    sibling and nephews are copied before they are recolored or rotated.
+
+    Parameters
+    ----------
+    x : Persistent_Red_Black_Node
+      The node carrying the extra BLACK.
+    stack : list
+      x's ancestors, root first.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    while stack and x.color == BLACK:
+      xp = stack[-1]
+      
+      if x is xp.left:
+        w = self.Copy_Node(xp.right, xp, False)
+        
+        # x's sibling w is RED (Case 1 in CLRS). After the rotation, w is x's
+        # grandparent, so it goes on the stack below x's parent.
+        if w.color == RED:
+          w.color = BLACK
+          xp.color = RED
+          stack.pop()
+          self.Left_Rotate(xp, stack[-1] if stack else None)
+          stack.append(w)
+          stack.append(xp)
+          w = self.Copy_Node(xp.right, xp, False)
+        
+        # Both of w's children are BLACK (Case 2 in CLRS). We continue from
+        # x's parent.
+        if w.left.color == BLACK and w.right.color == BLACK:
+          w.color = RED
+          x = stack.pop()
+          continue
+        
+        # w's right child is BLACK and its left child is RED (Case 3 in CLRS),
+        # which a right rotation turns into Case 4
+        if w.right.color == BLACK:
+          wl = self.Copy_Node(w.left, w, True)
+          wl.color = BLACK
+          w.color = RED
+          w = self.Right_Rotate(w, xp)
+        
+        # w's right child is RED (Case 4 in CLRS)
+        wr = self.Copy_Node(w.right, w, False)
+        w.color = xp.color
+        xp.color = BLACK
+        wr.color = BLACK
+        stack.pop()
+        self.Left_Rotate(xp, stack[-1] if stack else None)
+      
+      else:
+        
+        # Same as above, but with "right" and "left" exchanged
+        w = self.Copy_Node(xp.left, xp, True)
+        
+        if w.color == RED:
+          w.color = BLACK
+          xp.color = RED
+          stack.pop()
+          self.Right_Rotate(xp, stack[-1] if stack else None)
+          stack.append(w)
+          stack.append(xp)
+          w = self.Copy_Node(xp.left, xp, True)
+        
+        if w.right.color == BLACK and w.left.color == BLACK:
+          w.color = RED
+          x = stack.pop()
+          continue
+        
+        if w.left.color == BLACK:
+          wr = self.Copy_Node(w.right, w, False)
+          wr.color = BLACK
+          w.color = RED
+          w = self.Left_Rotate(w, xp)
+        
+        wl = self.Copy_Node(w.left, w, True)
+        w.color = xp.color
+        xp.color = BLACK
+        wl.color = BLACK
+        stack.pop()
+        self.Right_Rotate(xp, stack[-1] if stack else None)
+      
+      x = self.root
+      break
+    
+    x.color = BLACK
+
+# A node in a Snapshot Red Black Tree
+class Snapshot_Red_Black_Node(Persistent_Red_Black_Node):
+  """
+  A Persistent_Red_Black_Node that also records the epoch in which it was
+  created (see Snapshot_Red_Black_Tree):
+    
+    epoch : The value of the tree's epoch when the node was created
+  """
+  
+  __slots__ = ('epoch',)
+
+# A Red Black Tree that hands out copy-on-write snapshots
+class Snapshot_Red_Black_Tree(Persistent_Red_Black_Tree):
+  """
+  A Red Black Tree that is updated in place, like Red_Black_Tree, but whose
+  snapshot() method returns an immutable view of the tree in O(1) time. The
+  view shares every node with the live tree. Afterwards, the live tree copies
+  a node the first time it has to modify it (together with the path from the
+  root to it), so nothing reachable from the view ever changes.
+  
+  The tree keeps an epoch counter that snapshot() increments, and stamps each
+  node with the epoch it was created in. Nodes from the current epoch belong
+  to the live tree alone and are modified in place. Older nodes may belong to
+  a snapshot and are copied first, exactly as Persistent_Red_Black_Tree
+  copies every node. Between snapshots, updates therefore only copy what the
+  last snapshot still shares.
+  
+  Insert, Delete and snapshot() hold a lock, so they may be called from
+  different threads. A snapshot can then be read by any thread, for as long
+  as it likes, without any locking and without delaying writers. The live
+  tree itself should only be read by the threads that write to it.
+  """
+  
+  def __init__(self):
+    """
+    Creates an empty tree in epoch 0.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__()
+    self.epoch = 0
+    self.lock = threading.Lock()
+  
+  def snapshot(self) -> Persistent_Red_Black_Tree:
+    """
+    Returns an immutable view of the tree as it is now, in O(1) time. The view
+    is a Persistent_Red_Black_Tree: it supports every read of the live tree,
+    and its Insert and Delete return new versions without changing the view
+    or the live tree.
+
+    Returns
+    -------
+    Persistent_Red_Black_Tree
+      The snapshot.
+
+    """
+    
+    with self.lock:
+      view = Persistent_Red_Black_Tree.__new__(Persistent_Red_Black_Tree)
+      view.nil = self.nil
+      view.root = self.root
+      view.num_nodes = self.num_nodes
+      
+      # Every node that exists now is shared with the view from here on
+      self.epoch += 1
+      return view
+  
+  def Insert(self, key : int) -> None:
+    """
+    Inserts a node with the key into the tree (see
+    Persistent_Red_Black_Tree.Insert), modifying the tree in place.
+    """
+    
+    with self.lock:
+      super().Insert(key)
+  
+  def Delete(self, key : int) -> None:
+    """
+    Deletes a node with the key from the tree, if there is one (see
+    Persistent_Red_Black_Tree.Delete), modifying the tree in place.
+    """
+    
+    with self.lock:
+      super().Delete(key)
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def New_Version(self) -> 'Snapshot_Red_Black_Tree':
+    """
+    Returns the tree itself, so that Insert and Delete update it in place.
+    """
+    
+    return self
+  
+  def New_Node(self, key : int, left : Snapshot_Red_Black_Node, right : Snapshot_Red_Black_Node, color : int) -> Snapshot_Red_Black_Node:
+    """
+    Returns a new node with the given attributes, stamped with the current
+    epoch.
+    """
+    
+    x = Snapshot_Red_Black_Node(key, left, right, color)
+    x.epoch = self.epoch
+    return x
+  
+  def Own(self, x : Snapshot_Red_Black_Node) -> Snapshot_Red_Black_Node:
+    """
+    Returns x itself if it was created in the current epoch, and otherwise a
+    copy of it, since a snapshot may share it.
+    """
+    
+    if x.epoch == self.epoch:
+      return x
+    return self.New_Node(x.key, x.left, x.right, x.color)
+
+# A lock that many readers or one writer can hold at a time
+class Readers_Writer_Lock:
+  """
+  A readers-writer lock. Any number of threads can hold it for reading at the
+  same time, but a thread holding it for writing excludes every other thread.
+  Writers take priority: once a writer is waiting, new readers wait until it
+  has finished, so a steady stream of readers cannot starve writers.
+  
+  The lock is not reentrant. A thread that already holds it must not acquire
+  it again, for reading or for writing.
+  """
+  
+  def __init__(self):
+    """
+    Creates an unlocked lock.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.cond = threading.Condition(threading.Lock())
+    
+    # The number of threads holding the lock for reading
+    self.readers = 0
+    
+    # Whether a thread holds the lock for writing
+    self.writer = False
+    
+    # The number of threads waiting to acquire the lock for writing
+    self.waiting_writers = 0
+  
+  def Acquire_Read(self) -> None:
+    """
+    Blocks until no writer holds or is waiting for the lock, then acquires it
+    for reading.
+    """
+    
+    with self.cond:
+      while self.writer or self.waiting_writers:
+        self.cond.wait()
+      self.readers += 1
+  
+  def Release_Read(self) -> None:
+    """
+    Releases the lock after Acquire_Read.
+    """
+    
+    with self.cond:
+      self.readers -= 1
+      if self.readers == 0:
+        self.cond.notify_all()
+  
+  def Acquire_Write(self) -> None:
+    """
+    Blocks until no other thread holds the lock, then acquires it for writing.
+    """
+    
+    with self.cond:
+      self.waiting_writers += 1
+      while self.writer or self.readers:
+        self.cond.wait()
+      self.waiting_writers -= 1
+      self.writer = True
+  
+  def Release_Write(self) -> None:
+    """
+    Releases the lock after Acquire_Write.
+    """
+    
+    with self.cond:
+      self.writer = False
+      self.cond.notify_all()
+  
+  @contextmanager
+  def Reading(self):
+    """
+    A context manager that holds the lock for reading.
+    """
+    
+    self.Acquire_Read()
+    try:
+      yield
+    finally:
+      self.Release_Read()
+  
+  @contextmanager
+  def Writing(self):
+    """
+    A context manager that holds the lock for writing.
+    """
+    
+    self.Acquire_Write()
+    try:
+      yield
+    finally:
+      self.Release_Write()
+
+# A Red Black Tree that can be shared between threads
+class Concurrent_Red_Black_Tree:
+  """
+  A wrapper that makes a Red Black Tree safe to share between threads. Reads
+  (Search, Minimum, Maximum, Range, iteration, len and in) hold a
+  Readers_Writer_Lock for reading, so any number of them can run at the same
+  time. Writes (Insert, Delete, InsertMany, DeleteMany, PopMin and PopMax)
+  hold it for writing, so no reader ever walks the tree in the middle of a
+  rotation.
+  
+  Range and iteration copy the keys into a list while they hold the lock, so
+  the lock is not held while the caller consumes them. Longer sequences of
+  operations can be run under a single acquisition of the lock with Read and
+  Batch, which hand out the underlying tree.
+  """
+  
+  def __init__(self, tree : Red_Black_Tree = None):
+    """
+    Wraps tree, or a new empty Red_Black_Tree if no tree is given. The tree
+    must not be used directly while it is wrapped.
+
+    Parameters
+    ----------
+    tree : Red_Black_Tree, optional
+      The tree to share. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.tree = tree if tree is not None else Red_Black_Tree()
+    self.lock = Readers_Writer_Lock()
+  
+  def __len__(self):
+    """
+    Returns the number of nodes in the tree.
+    """
+    
+    with self.lock.Reading():
+      return self.tree.num_nodes
+  
+  def Size(self):
+    """
+    Returns the number of nodes in the tree.
+    """
+    
+    return len(self)
+  
+  def __contains__(self, key) -> bool:
+    """
+    Returns True if a node with the key is in the tree and False otherwise.
+    """
+    
+    with self.lock.Reading():
+      return key in self.tree
+  
+  def __iter__(self):
+    """
+    Returns an iterator over a list of every key in the tree in sorted order,
+    taken while holding the lock.
+    """
+    
+    with self.lock.Reading():
+      return iter(list(self.tree))
+  
+  def Search(self, key : int) -> Red_Black_Node:
+    """
+    Returns a node with the key, or the tree's nil if there is none. Only the
+    node's key can be relied on after the call returns, since a later write
+    may move the node within the tree.
+    """
+    
+    with self.lock.Reading():
+      return self.tree.Search(self.tree.root, key)
+  
+  def Minimum(self):
+    """
+    Returns the minimum key in the tree, or None if the tree is empty.
+    """
+    
+    with self.lock.Reading():
+      t = self.tree
+      return t.Minimum(t.root).key if t.root != t.nil else None
+  
+  def Maximum(self):
+    """
+    Returns the maximum key in the tree, or None if the tree is empty.
+    """
+    
+    with self.lock.Reading():
+      t = self.tree
+      return t.Maximum(t.root).key if t.root != t.nil else None
+  
+  def Range(self, lo : int = None, hi : int = None, inclusive : tuple = (True, True), reverse : bool = False) -> list:
+    """
+    Returns a list of every key between lo and hi (see Red_Black_Tree.Range).
+    """
+    
+    with self.lock.Reading():
+      return list(self.tree.Range(lo, hi, inclusive, reverse))
+  
+  def Insert(self, key) -> None:
+    """
+    Inserts a node with the key into the tree.
+    """
+    
+    with self.lock.Writing():
+      self.tree.Insert(key)
+  
+  def Delete(self, key) -> None:
+    """
+    Deletes a node with the key from the tree, if there is one.
+    """
+    
+    with self.lock.Writing():
+      self.tree.Delete(key)
+  
+  def InsertMany(self, keys) -> int:
+    """
+    Inserts a batch of keys under a single acquisition of the lock (see
+    Red_Black_Tree.InsertMany).
+    """
+    
+    with self.lock.Writing():
+      return self.tree.InsertMany(keys)
+  
+  def DeleteMany(self, keys) -> int:
+    """
+    Deletes a batch of keys under a single acquisition of the lock (see
+    Red_Black_Tree.DeleteMany).
+    """
+    
+    with self.lock.Writing():
+      return self.tree.DeleteMany(keys)
+  
+  def PopMin(self):
+    """
+    Deletes and returns the smallest key (see Red_Black_Tree.PopMin). The
+    minimum is found and deleted under one acquisition of the lock, so two
+    threads never pop the same key.
+    """
+    
+    with self.lock.Writing():
+      return self.tree.PopMin()
+  
+  def PopMax(self):
+    """
+    Deletes and returns the largest key (see Red_Black_Tree.PopMax), under one
+    acquisition of the lock.
+    """
+    
+    with self.lock.Writing():
+      return self.tree.PopMax()
+  
+  @contextmanager
+  def Read(self):
+    """
+    A context manager that holds the lock for reading and gives the
+    underlying tree, for a series of reads that must see the same version of
+    the tree. The tree must not be modified inside the block.
+    """
+    
+    with self.lock.Reading():
+      yield self.tree
+  
+  @contextmanager
+  def Batch(self):
+    """
+    A context manager that holds the lock for writing and gives the
+    underlying tree, so that any mix of reads and writes can be made as one
+    atomic batch. For example:
+      
+      with shared.Batch() as t:
+        if t.Search(t.root, key) == t.nil:
+          t.Insert(key)
+    """
+    
+    with self.lock.Writing():
+      yield self.tree
+
+# A Red Black Tree stored as parallel typed arrays (struct-of-arrays)
+class Array_Red_Black_Tree:
+  """
+  A Red Black Tree with the same algorithms as Red_Black_Tree, but instead of
+  one Red_Black_Node object per node, the fields of every node are stored in
+  parallel typed arrays. A node is referred to by its integer index into these
+  arrays:
+    
+    key   : key[i] is the key of node i
+    left  : left[i] is the index of node i's left child
+    right : right[i] is the index of node i's right child
+    p     : p[i] is the index of node i's parent
+    color : color[i] is the color of node i (either RED or BLACK)
+  
+  Index 0 is reserved for the sentinel leaf (T.nil in CLRS), so self.nil == 0.
+  The slots of deleted nodes are kept on a free list and reused by later
+  inserts. Every method takes and returns node indices where Red_Black_Tree
+  takes and returns Red_Black_Nodes, and otherwise has the same semantics.
+  
+  Because the whole tree lives in a handful of flat arrays, it uses a fraction
+  of the memory of the pointer-based tree and can be copied with Copy() in a
+  few memory copies.
+  """
+  
+  def __init__(self, typecode : str = 'q'):
+    """
+    Creates the arrays, with the sentinel leaf T.nil at index 0, and sets root
+    equal to it.
+
+    Parameters
+    ----------
+    typecode : str, optional
+      The array typecode used to store keys (see the array module). The
+      default is 'q' (signed 64-bit integers).
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    # Create sentinel T.nil at index 0. Its key is never read.
+    self.nil = 0
+    self.key = array(typecode, [0])
+    self.left = array('q', [self.nil])
+    self.right = array('q', [self.nil])
+    self.p = array('q', [self.nil])
+    self.color = array('b', [BLACK])
+    
+    # Initialize self.root to the sentinel T.nil
+    self.root = self.nil
+    
+    # Indices of deleted nodes that can be reused by Insert
+    self.free = []
+    
+    # Some bookeeping information
+    self.num_nodes = 0
+
+  def isEmpty(self):
+    """
+    Returns True if there are nodes in the tree and False otherwise.
+    """
+    
+    return self.root == self.nil
+  
+  def Size(self):
+    """
+    Returns the number of nodes in the tree.
+    """
+    
+    return self.num_nodes
+  
+  def Copy(self) -> 'Array_Red_Black_Tree':
+    """
+    Returns an independent copy of the whole tree. Since the tree is stored in
+    flat arrays, this only copies the arrays and does not walk the tree.
+
+    Returns
+    -------
+    Array_Red_Black_Tree
+      A tree with the same nodes, at the same indices, as this one.
+
+    """
+    
+    t = Array_Red_Black_Tree.__new__(Array_Red_Black_Tree)
+    t.nil = self.nil
+    t.key = array(self.key.typecode, self.key)
+    t.left = array('q', self.left)
+    t.right = array('q', self.right)
+    t.p = array('q', self.p)
+    t.color = array('b', self.color)
+    t.root = self.root
+    t.free = list(self.free)
+    t.num_nodes = self.num_nodes
+    return t
+
+  def Search(self, x : int, k : int) -> int:
+    """
+    A performs a classic search through a Binary Search Tree for a node whose
+    key is equal to k.
+
+    Parameters
+    ----------
+    x : int
+      The index of the root of the subtree to be searched.
+    k : int
+      The key that we are searching for
+
+    Returns
+    -------
+    int
+      The index of a node whose key is equal to k or self.nil (if a node with
+      key equal to k is not found).
+
+    """
+    
+    key, left, right = self.key, self.left, self.right
+    while x != 0 and k != key[x]:
+      if k < key[x]:
+        x = left[x]
+      else:
+        x = right[x]
+    return x
+  
+  def Minimum(self, x : int) -> int:
+    """
+    Finds the node with the minimum key in the subtree rooted at x.
+
+    Parameters
+    ----------
+    x : int
+      The index of the root of the subtree whose minimum will be returned.
+
+    Returns
+    -------
+    int
+      The index of the node with the minimum key in the subtree rooted at x.
+
+    """
+    
+    left = self.left
+    while left[x] != 0:
+      x = left[x]
+    return x
+  
+  def Maximum(self, x : int) -> int:
+    """
+    Finds the node with the maximum key in the subtree rooted at x.
+
+    Parameters
+    ----------
+    x : int
+      The index of the root of the subtree whose maximum will be returned.
+
+    Returns
+    -------
+    int
+      The index of the node with the maximum key in the subtree rooted at x.
+
+    """
+    
+    right = self.right
+    while right[x] != 0:
+      x = right[x]
+    return x
+  
+  def Successor(self, x : int) -> int:
+    """
+    Returns the successor of x (the node with the smallest key greater than x).
+
+    Parameters
+    ----------
+    x : int
+      The index of the node whose successor will be returned.
+
+    Returns
+    -------
+    int
+      The index of the node that is the successor of x.
+
+    """
+    
+    right, p = self.right, self.p
+    if right[x] != 0:
+      return self.Minimum(right[x])
+    else:
+      y = p[x]
+      while y != 0 and x == right[y]:
+        x = y
+        y = p[y]
+      return y
+  
+  def Predecessor(self, x : int) -> int:
+    """
+    Returns the predecessor of x (the node with the largest key less than x).
+
+    Parameters
+    ----------
+    x : int
+      The index of the node whose predecessor will be returned.
+
+    Returns
+    -------
+    int
+      The index of the node that is the predecessor of x.
+
+    """
+    
+    left, p = self.left, self.p
+    if left[x] != 0:
+      return self.Maximum(left[x])
+    else:
+      y = p[x]
+      while y != 0 and x == left[y]:
+        x = y
+        y = p[y]
+      return y
+  
+  def Insert(self, key : int) -> None:
+    """
+    Allocates a new node z with the key and inserts it at the appropriate place
+    in the tree, using Insert_Fixup to maintain Red Black properties.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node to be inserted in the graph.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    keys, left, right = self.key, self.left, self.right
+    
+    # Reuse the slot of a deleted node if there is one, otherwise grow the
+    # arrays by one slot
+    if self.free:
+      z = self.free.pop()
+      keys[z] = key
+    else:
+      z = len(keys)
+      keys.append(key)
+      left.append(0)
+      right.append(0)
+      self.p.append(0)
+      self.color.append(RED)
+    
+    y = 0
+    x = self.root
+    while x != 0:
+      y = x
+      if key < keys[x]:
+        x = left[x]
+      else:
+        x = right[x]
+    
+    self.p[z] = y
+    
+    if y == 0:
+      self.root = z
+    elif key < keys[y]:
+      left[y] = z
+    else:
+      right[y] = z
+    
+    left[z] = 0
+    right[z] = 0
+    self.color[z] = RED
+    
+    self.Insert_Fixup(z)
+    
+    self.num_nodes += 1
+  
+  def Delete(self, key : int) -> None:
+    """
+    Deletes a node with the key from the tree and returns its slot to the free
+    list. Calls Delete_Fixup to maintain Red Black properties.
+
+    Parameters
+    ----------
+    key : int
+      The key of the node to be deleted.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    z = self.Search(self.root, key)
+    
+    if z == 0:
+      return None
+    
+    left, right, p, color = self.left, self.right, self.p, self.color
+    
+    # z, y and x play the same roles as in Red_Black_Tree.Delete
+    y = z
+    y_original_color = color[y]
+    
+    if left[z] == 0:
+      x = right[z]
+      self.Transplant(z, x)
+    elif right[z] == 0:
+      x = left[z]
+      self.Transplant(z, x)
+    else:
+      y = self.Successor(z)
+      y_original_color = color[y]
+      x = right[y]
+      
+      if p[y] == z:
+        p[x] = y
+      else:
+        self.Transplant(y, x)
+        right[y] = right[z]
+        p[right[y]] = y
+      self.Transplant(z, y)
+      left[y] = left[z]
+      p[left[y]] = y
+      color[y] = color[z]
+    
+    if y_original_color == BLACK:
+      self.Delete_Fixup(x)
+    
+    self.free.append(z)
+    self.num_nodes -= 1
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Left_Rotate(self, x : int) -> None:
+    """
+    Performs a left rotation on node x, assuming that x's right child is not the sentinel.
+    This maintains the Binary Search Tree property, but not necessarily the
+    Red Black Tree properties.
+
+    Parameters
+    ----------
+    x : int
+      The index of the node on which we are performing a left rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    left, right, p = self.left, self.right, self.p
+    y = right[x]
+    right[x] = left[y]
+    if left[y] != 0:
+      p[left[y]] = x
+    p[y] = p[x]
+    if p[x] == 0:
+      self.root = y
+    elif x == left[p[x]]:
+      left[p[x]] = y
+    else:
+      right[p[x]] = y
+    left[y] = x
+    p[x] = y
+  
+  def Right_Rotate(self, y : int) -> None:
+    """
+    Performs a right rotation on node y, assuming that y's left child is not the sentinel.
+    This maintains the Binary Search Tree property, but not necessarily the
+    Red Black Tree properties.
+
+    Parameters
+    ----------
+    y : int
+      The index of the node on which we are performing a right rotation.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    left, right, p = self.left, self.right, self.p
+    x = left[y]
+    left[y] = right[x]
+    if right[x] != 0:
+      p[right[x]] = y
+    p[x] = p[y]
+    if p[y] == 0:
+      self.root = x
+    elif y == left[p[y]]:
+      left[p[y]] = x
+    else:
+      right[p[y]] = x
+    right[x] = y
+    p[y] = x
+
+  def Transplant(self, u : int, v : int) -> None:
+    """
+    Replaces the subtree rooted at node u with the subtree rooted at node v
+
+    Parameters
+    ----------
+    u : int
+      The index of the root of the subtree to be replaced.
+    v : int
+      The index of the root of the subtree doing the replacing.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    p = self.p
+    if p[u] == 0:
+      self.root = v
+    elif u == self.left[p[u]]:
+      self.left[p[u]] = v
+    else:
+      self.right[p[u]] = v
+    p[v] = p[u]
+  
+  def Insert_Fixup(self, z : int) -> None:
+    """
+    Performs a sequence of re-colorings and rotations after an Insert to
+    maintain Red Black properties. The cases are the same as in
+    Red_Black_Tree.Insert_Fixup.
+
+    Parameters
+    ----------
+    z : int
+      The index of the node that was inserted.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    left, right, p, color = self.left, self.right, self.p, self.color
+    
+    while color[p[z]] == RED:
+      
+      # z's uncle is its grandparent's right child
+      if p[z] == left[p[p[z]]]:
+        y = right[p[p[z]]]
+        
+        # Case 1 in CLRS
+        if color[y] == RED:
+          color[p[z]] = BLACK
+          color[y] = BLACK
+          color[p[p[z]]] = RED
+          z = p[p[z]]
+        
+        else:
           
-          # w's left child is BLACK and w's right child is RED (Case 4 in
-          # CLRS). We can now perfectly "fix" the tree with a few re-colorings
-          # and rotations. We set x equal to the root node to exit the loop
-          w.color = x.p.color
-          x.p.color = BLACK
-          w.right.color = BLACK
-          self.Left_Rotate(x.p)
+          # Case 2 in CLRS
+          if z == right[p[z]]:
+            z = p[z]
+            self.Left_Rotate(z)
+          
+          # Case 3 in CLRS
+          color[p[z]] = BLACK
+          color[p[p[z]]] = RED
+          self.Right_Rotate(p[p[z]])
+      
+      # z's uncle is its grandparent's left child
+      else:
+        y = left[p[p[z]]]
+        
+        # Case 1 in CLRS
+        if color[y] == RED:
+          color[p[z]] = BLACK
+          color[y] = BLACK
+          color[p[p[z]]] = RED
+          z = p[p[z]]
+        
+        else:
+          
+          # Case 2 in CLRS
+          if z == left[p[z]]:
+            z = p[z]
+            self.Right_Rotate(z)
+          
+          # Case 3 in CLRS
+          color[p[z]] = BLACK
+          color[p[p[z]]] = RED
+          self.Left_Rotate(p[p[z]])
+    
+    color[self.root] = BLACK
+  
+  def Delete_Fixup(self, x : int) -> None:
+    """
+    Performs a sequence of re-colorings and rotations after a Delete to
+    maintain Red Black properties. The cases are the same as in
+    Red_Black_Tree.Delete_Fixup.
+
+    Parameters
+    ----------
+    x : int
+      The index of the node that replaced y in the Delete.
+
+    Returns
+    -------
+    None
+
+    """
+    
+    left, right, p, color = self.left, self.right, self.p, self.color
+    
+    while x != self.root and color[x] == BLACK:
+      
+      # x is its parent's left child
+      if x == left[p[x]]:
+        w = right[p[x]]
+        
+        # Case 1 in CLRS
+        if color[w] == RED:
+          color[w] = BLACK
+          color[p[x]] = RED
+          self.Left_Rotate(p[x])
+          w = right[p[x]]
+        
+        # Case 2 in CLRS
+        if color[left[w]] == BLACK and color[right[w]] == BLACK:
+          color[w] = RED
+          x = p[x]
+        
+        else:
+          
+          # Case 3 in CLRS
+          if color[right[w]] == BLACK:
+            color[left[w]] = BLACK
+            color[w] = RED
+            self.Right_Rotate(w)
+            w = right[p[x]]
+          
+          # Case 4 in CLRS
+          color[w] = color[p[x]]
+          color[p[x]] = BLACK
+          color[right[w]] = BLACK
+          self.Left_Rotate(p[x])
           x = self.root
       
       # x is its parent's right child
-      else: # x = x.p.right
-        w = x.p.left
+      else:
+        w = left[p[x]]
         
-        # x is BLACK-BLACK and x's sibling w is RED (Case 1 in CLRS).
-        # Now w must have BLACK children. We swap the colors of w and x's
-        # parent, then do a right rotation on x's parent. At this point, x's
-        # new sibling (which was one of w's children before the rotation) is
-        # BLACK, so we have converted Case 1 into Case 2, 3, or 4.
-        if w.color == RED:
-          w.color = BLACK
-          x.p.color = RED
-          self.Right_Rotate(x.p)
-          w = x.p.left
+        # Case 1 in CLRS
+        if color[w] == RED:
+          color[w] = BLACK
+          color[p[x]] = RED
+          self.Right_Rotate(p[x])
+          w = left[p[x]]
         
-        # x is BLACK-BLACK, x's sibling w is BLACK, and both of w's children
-        # are BLACK (Case 2 in CLRS). We remove one BLACK from w (making it
-        # RED) and push one BLACK from x to its parent (making x BLACK and x.p
-        # either RED-BLACK or BLACK-BLACK). We thus repeat the loop with
-        # x = x.p
-        if w.left.color == BLACK and w.right.color == BLACK:
-          w.color = RED
-          x = x.p
+        # Case 2 in CLRS
+        if color[left[w]] == BLACK and color[right[w]] == BLACK:
+          color[w] = RED
+          x = p[x]
         
-        # x is BLACK-BLACK, x's sibling w is BLACK, but one of w's children
-        # is RED
         else:
           
-          # w's right child is RED and w's left child is BLACK (Case 3 in
-          # CLRS). We swap the color of w and w's right child, then perform a 
-          # left rotation. Now x's new sibling (which was w's right child) is
-          # BLACK and has a RED left child (which was originally w). We have
-          # converted Case 3 to Case 4.
-          if w.left.color == BLACK:
-            w.right.color = BLACK
-            w.color = RED
+          # Case 3 in CLRS
+          if color[left[w]] == BLACK:
+            color[right[w]] = BLACK
+            color[w] = RED
             self.Left_Rotate(w)
-            w = x.p.left
+            w = left[p[x]]
           
-          # w's right child is BLACK and w's left child is RED (Case 4 in
-          # CLRS). We can now perfectly "fix" the tree with a few re-colorings
-          # and rotations. We set x equal to the root node to exit the loop
-          w.color = x.p.color
-          x.p.color = BLACK
-          w.left.color = BLACK
-          self.Right_Rotate(x.p)
+          # Case 4 in CLRS
+          color[w] = color[p[x]]
+          color[p[x]] = BLACK
+          color[left[w]] = BLACK
+          self.Right_Rotate(p[x])
           x = self.root
     
-    x.color = BLACK
+    color[x] = BLACK
+
+# An operation on a Retroactive Priority Queue, stored in its timeline
+class Retroactive_Operation_Node(Red_Black_Node):
+  """
+  A node in the timeline of a Retroactive_Priority_Queue. Its key is the time
+  of the operation. In addition to the attributes of a Red_Black_Node, the
+  node has:
+    
+    item        : The key inserted by the operation, or None for a DeleteMin
+    weight      : 0 for an insertion whose key is still in the queue now, 1 for
+                  an insertion whose key has since been deleted, and -1 for a
+                  DeleteMin
+    total       : The sum of the weights in the node's subtree
+    low         : The smallest sum of the weights of a non-empty prefix (in
+                  order of time) of the node's subtree
+    max_deleted : The largest key inserted and since deleted in the subtree
+    min_present : The smallest key inserted and still present in the subtree
+  
+  The sentinel keeps the values for an empty subtree: a total of 0 and
+  infinite low, max_deleted and min_present.
+  """
+  
+  __slots__ = ('item', 'weight', 'total', 'low', 'max_deleted', 'min_present')
+  
+  def __init__(self, key, item = None, weight : int = 0):
+    """
+    Initializes the time, item and weight to the values passed to the
+    constructor, and the subtree attributes to those of an empty subtree.
+
+    Parameters
+    ----------
+    key : int
+      The time of the operation.
+    item : int, optional
+      The key inserted by the operation. The default is None.
+    weight : int, optional
+      The weight of the operation. The default is 0.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    super().__init__(key)
+    self.item = item
+    self.weight = weight
+    self.total = 0
+    self.low = INFINITY
+    self.max_deleted = -INFINITY
+    self.min_present = INFINITY
+
+# The timeline of a Retroactive Priority Queue
+class Retroactive_Timeline(Red_Black_Tree):
+  """
+  A Red Black Tree of Retroactive_Operation_Nodes ordered by time, augmented
+  as in Chapter 14 of CLRS with each subtree's total weight, lowest prefix
+  weight, largest deleted key and smallest present key. Every attribute of a
+  node depends only on the node and its children, so it is recomputed along
+  the changed path by Update_Path and locally by Left_Rotate and Right_Rotate.
+  
+  With these, the queries that the bridge technique of Demaine, Iacono and
+  Langerman needs each take O(lg(n)) time. The prefix sum of the weights up
+  to a time t is the number of keys in the queue at time t that are no longer
+  in the queue now, and t is a bridge when it is 0.
+  """
+  
+  Node = Retroactive_Operation_Node
+  Node_Fields = ('key', 'item', 'weight')
+  
+  def Last_Bridge(self, t):
+    """
+    Returns the latest bridge strictly before time t, or -INFINITY (the start
+    of time, which is always a bridge) if there is none.
+    """
+    
+    nil = self.nil
+    
+    # Split the operations before t into O(lg(n)) pieces in order of time:
+    # the nodes on the search path for t that come before it, and their left
+    # subtrees. offset is the sum of the weights before each piece.
+    pieces = []
+    offset = 0
+    x = self.root
+    while x != nil:
+      if x.key < t:
+        pieces.append((x.left, offset, False))
+        offset += x.left.total
+        pieces.append((x, offset, True))
+        offset += x.weight
+        x = x.right
+      else:
+        x = x.left
+    
+    # Prefix sums are never negative, so a subtree holds a bridge exactly when
+    # its lowest prefix sum is 0. Take the last piece that does.
+    for x, offset, single in reversed(pieces):
+      if single:
+        if offset + x.weight == 0:
+          return x.key
+      elif offset + x.low == 0:
+        
+        # Find the last bridge inside x's subtree, trying later operations
+        # first
+        while True:
+          o = offset + x.left.total + x.weight
+          if o + x.right.low == 0:
+            offset = o
+            x = x.right
+          elif o == 0:
+            return x.key
+          else:
+            x = x.left
+    
+    return -INFINITY
+  
+  def First_Bridge(self, t):
+    """
+    Returns the earliest bridge at or after time t, or INFINITY (the present,
+    which is always a bridge) if there is none. Time t itself is a bridge if
+    the prefix sum of the operations up to and including it is 0.
+    """
+    
+    nil = self.nil
+    
+    # The mirror image of Last_Bridge, with the operations after t split into
+    # pieces in order of time
+    pieces = []
+    offset = 0
+    x = self.root
+    while x != nil:
+      if x.key <= t:
+        offset += x.left.total + x.weight
+        x = x.right
+      else:
+        pieces.append((x.right, offset + x.left.total + x.weight, False))
+        pieces.append((x, offset + x.left.total, True))
+        x = x.left
+    
+    if offset == 0:
+      return t
+    
+    for x, offset, single in reversed(pieces):
+      if single:
+        if offset + x.weight == 0:
+          return x.key
+      elif offset + x.low == 0:
+        
+        # Find the first bridge inside x's subtree, trying earlier operations
+        # first
+        while True:
+          if offset + x.left.low == 0:
+            x = x.left
+          else:
+            offset += x.left.total + x.weight
+            if offset == 0:
+              return x.key
+            x = x.right
+    
+    return INFINITY
+  
+  def Min_Present(self, t):
+    """
+    Returns the smallest key inserted at or before time t that is still in
+    the queue now, or INFINITY if there is none.
+    """
+    
+    best = INFINITY
+    x = self.root
+    while x != self.nil:
+      if x.key <= t:
+        best = min(best, x.left.min_present)
+        if x.weight == 0 and x.item < best:
+          best = x.item
+        x = x.right
+      else:
+        x = x.left
+    return best
+  
+  def Max_Deleted(self, t):
+    """
+    Returns the largest key inserted after time t that has since been deleted,
+    or -INFINITY if there is none.
+    """
+    
+    best = -INFINITY
+    x = self.root
+    while x != self.nil:
+      if x.key > t:
+        best = max(best, x.right.max_deleted)
+        if x.weight == 1 and x.item > best:
+          best = x.item
+        x = x.left
+      else:
+        x = x.right
+    return best
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Update_Node(self, x : Retroactive_Operation_Node) -> None:
+    """
+    Recomputes x's subtree attributes from its own and its children's.
+    """
+    
+    left, right = x.left, x.right
+    weight = x.weight
+    
+    # Written out with comparisons rather than min and max, since this runs
+    # for every node on every changed path
+    s = left.total + weight
+    x.total = s + right.total
+    low = left.low
+    if s < low:
+      low = s
+    if s + right.low < low:
+      low = s + right.low
+    x.low = low
+    
+    high = left.max_deleted
+    if right.max_deleted > high:
+      high = right.max_deleted
+    if weight == 1 and x.item > high:
+      high = x.item
+    x.max_deleted = high
+    
+    low = left.min_present
+    if right.min_present < low:
+      low = right.min_present
+    if weight == 0 and x.item < low:
+      low = x.item
+    x.min_present = low
+  
+  def Update_Path(self, x : Retroactive_Operation_Node) -> None:
+    """
+    Recomputes the subtree attributes of x and of every ancestor of x (see
+    Red_Black_Tree.Update_Path).
+    """
+    
+    while x != self.nil:
+      self.Update_Node(x)
+      x = x.p
+  
+  def Build(self, nodes : list) -> None:
+    """
+    Replaces the contents of the tree with the nodes (see
+    Red_Black_Tree.Build) and then recomputes the subtree attributes of every
+    node, children before parents.
+    """
+    
+    super().Build(nodes)
+    
+    # Visiting nodes in reverse pre-order (root, right, left) visits every
+    # node after its children
+    order = []
+    stack = [self.root] if self.root != self.nil else []
+    while stack:
+      x = stack.pop()
+      order.append(x)
+      if x.left != self.nil:
+        stack.append(x.left)
+      if x.right != self.nil:
+        stack.append(x.right)
+    
+    for x in reversed(order):
+      self.Update_Node(x)
+  
+  def Left_Rotate(self, x : Retroactive_Operation_Node) -> None:
+    """
+    Performs a left rotation on node x (see Red_Black_Tree.Left_Rotate), then
+    recomputes x and its new parent, the only nodes whose subtrees change.
+    """
+    
+    super().Left_Rotate(x)
+    self.Update_Node(x)
+    self.Update_Node(x.p)
+  
+  def Right_Rotate(self, y : Retroactive_Operation_Node) -> None:
+    """
+    Performs a right rotation on node y (see Red_Black_Tree.Right_Rotate), then
+    recomputes y and its new parent, the only nodes whose subtrees change.
+    """
+    
+    super().Right_Rotate(y)
+    self.Update_Node(y)
+    self.Update_Node(y.p)
 
+# A partially retroactive priority queue
 class Retroactive_Priority_Queue:
+  """
+  A partially retroactive min priority queue (Demaine, Iacono and Langerman,
+  "Retroactive Data Structures"). Insertions and DeleteMins can be added to
+  or removed from the queue's history at any time t in the past, and GetMin
+  answers for the present as if the history had always been that way. Each
+  change takes O(lg(n)) time, where n is the number of operations in the
+  history, instead of replaying the history.
+  
+  The queue keeps the history in a Retroactive_Timeline, the keys in the
+  queue now in a Red_Black_Tree, and a dictionary from each inserted key to
+  its operation. A change to the past adds or removes exactly one key in the
+  present queue, and which key it is can be found from the nearest bridge:
+  a time at which every key in the queue is still in the queue now.
+  
+  Keys must be distinct, and so must the times of the operations.
+  """
+  
   def __init__(self):
-    pass
+    """
+    Creates a queue with an empty history.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    # Every operation, ordered by time
+    self.timeline = Retroactive_Timeline()
+    
+    # The keys in the queue now
+    self.now = Red_Black_Tree()
+    
+    # The operation that inserted each key
+    self.inserts = {}
+  
+  def __getstate__(self) -> dict:
+    """
+    Returns the queue's state for pickle and copy. The dictionary of insert
+    operations refers to nodes of the timeline, which are rebuilt when the
+    timeline is restored, so it is left out and recreated by __setstate__.
+    """
+    
+    state = self.__dict__.copy()
+    del state['inserts']
+    return state
+  
+  def __setstate__(self, state : dict) -> None:
+    """
+    Restores a state returned by __getstate__, finding the operation that
+    inserted each key in the restored timeline.
+    """
+    
+    self.__dict__.update(state)
+    self.inserts = {x.item : x for x in self.timeline.Nodes() if x.weight != -1}
+  
+  def __len__(self):
+    """
+    Returns the number of keys in the queue now.
+    """
+    
+    return len(self.now)
+  
+  def GetMin(self):
+    """
+    Returns the smallest key in the queue now, or None if it is empty.
+    """
+    
+    if self.now.root == self.now.nil:
+      return None
+    return self.now.Minimum(self.now.root).key
+  
+  def Insert(self, t, key) -> None:
+    """
+    Adds an insertion of key at time t to the history.
+
+    Parameters
+    ----------
+    t : int
+      The time of the insertion.
+    key : int
+      The key inserted. No other insertion may have the same key.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if key in self.inserts:
+      raise ValueError(f"Key {key} has already been inserted")
+    self.Check_Time(t)
+    
+    # The new key survives unless a larger key, deleted after the last bridge
+    # before t, now survives in its place (the DeleteMin that took that key
+    # takes the new one instead)
+    k = self.timeline.Max_Deleted(self.timeline.Last_Bridge(t))
+    
+    z = Retroactive_Operation_Node(t, key, 0)
+    if k > key:
+      z.weight = 1
+      self.Set_Weight(self.inserts[k], 0)
+      self.now.Insert(k)
+    else:
+      self.now.Insert(key)
+    
+    self.timeline.Insert_Node(z, self.timeline.root)
+    self.inserts[key] = z
+  
+  def DeleteMin(self, t) -> None:
+    """
+    Adds a DeleteMin at time t to the history.
+
+    Parameters
+    ----------
+    t : int
+      The time of the DeleteMin.
+
+    Raises
+    ------
+    ValueError
+      If the queue would be empty at some DeleteMin.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.Check_Time(t)
+    
+    # The key that leaves the present queue is the smallest key still there
+    # that was inserted before the first bridge at or after t
+    k = self.Present_Until(self.timeline.First_Bridge(t))
+    
+    self.Set_Weight(self.inserts[k], 1)
+    self.now.Delete(k)
+    self.timeline.Insert_Node(Retroactive_Operation_Node(t, None, -1), self.timeline.root)
+  
+  def Remove(self, t) -> None:
+    """
+    Removes the operation at time t from the history.
+
+    Parameters
+    ----------
+    t : int
+      The time of the operation to remove.
+
+    Raises
+    ------
+    ValueError
+      If there is no operation at time t, or if the queue would be empty at
+      some DeleteMin.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    timeline = self.timeline
+    z = timeline.Search(timeline.root, t)
+    if z == timeline.nil:
+      raise ValueError(f"There is no operation at time {t}")
+    
+    # Removing an insertion whose key is still present only removes the key
+    if z.weight == 0:
+      self.now.Delete(z.item)
+    
+    # Removing an insertion whose key was deleted is like adding a DeleteMin
+    # at t: the DeleteMin that took z's key takes another key instead
+    elif z.weight == 1:
+      k = self.Present_Until(timeline.First_Bridge(t))
+      self.Set_Weight(self.inserts[k], 1)
+      self.now.Delete(k)
+    
+    # Removing a DeleteMin is like adding an insertion at t: the largest key
+    # deleted after the last bridge before t survives
+    else:
+      k = timeline.Max_Deleted(timeline.Last_Bridge(t))
+      self.Set_Weight(self.inserts[k], 0)
+      self.now.Insert(k)
+    
+    if z.item is not None:
+      del self.inserts[z.item]
+    timeline.Remove(z)
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Check_Time(self, t) -> None:
+    """
+    Raises a ValueError if there is already an operation at time t.
+    """
+    
+    if self.timeline.Search(self.timeline.root, t) != self.timeline.nil:
+      raise ValueError(f"There is already an operation at time {t}")
+  
+  def Present_Until(self, t):
+    """
+    Returns the smallest key inserted at or before time t that is still in
+    the queue now, raising a ValueError if there is none, since a DeleteMin
+    would then find the queue empty.
+    """
+    
+    k = self.timeline.Min_Present(t)
+    if k == INFINITY:
+      raise ValueError("The queue would be empty at a DeleteMin")
+    return k
+  
+  def Set_Weight(self, x : Retroactive_Operation_Node, weight : int) -> None:
+    """
+    Changes the weight of operation x and updates its ancestors.
+    """
+    
+    x.weight = weight
+    self.timeline.Update_Path(x)
 
+# A vertex in a Graph
 class Node:
-  def __init__(self):
-    pass
+  """
+  A vertex in a Graph that has not been frozen. The vertex has the following
+  attributes:
+    
+    id        : The vertex's index in the graph
+    neighbors : neighbors[i] is the index of the vertex at the end of the
+                vertex's i-th outgoing edge
+    weights   : weights[i] is the weight of the vertex's i-th outgoing edge
+  
+  The edges are kept in typed arrays (see the array module), so an edge
+  takes 16 bytes rather than a Python object of its own.
+  """
+  
+  __slots__ = ('id', 'neighbors', 'weights')
+  
+  def __init__(self, id : int):
+    """
+    Initializes the vertex with the index passed to the constructor and no
+    edges.
+
+    Parameters
+    ----------
+    id : int
+      The vertex's index in the graph.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.id = id
+    self.neighbors = array('q')
+    self.weights = array('d')
 
+# A directed graph with non-negative edge weights
 class Graph:
-  def __init__(self):
-    pass
+  """
+  A directed graph with non-negative edge weights, whose vertices are numbered
+  0 to n-1. It has two modes:
+    
+    Mutable : Each vertex is a Node holding its outgoing edges in typed
+              arrays. Vertices and edges can be added with Add_Node and
+              Add_Edge.
+    Frozen  : The edges are stored in compressed sparse row (CSR) form in
+              three NumPy arrays. The edges leaving vertex u are at positions
+              indptr[u] to indptr[u+1]-1 of indices (their ends) and weights.
+              The graph can no longer be changed.
+  
+  freeze() turns a mutable graph into a frozen one. from_edges builds a frozen
+  graph straight from arrays of edges, without creating a Python object per
+  edge, which is the way to load graphs with millions of edges.
+  """
+  
+  def __init__(self, n : int = 0):
+    """
+    Creates a mutable graph with n vertices and no edges.
+
+    Parameters
+    ----------
+    n : int, optional
+      The number of vertices. The default is 0.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.nodes = [Node(i) for i in range(n)]
+    
+    # The CSR arrays, once the graph is frozen
+    self.indptr = None
+    self.indices = None
+    self.weights = None
+  
+  @classmethod
+  def from_edges(cls, n : int, sources, targets, weights = None) -> 'Graph':
+    """
+    Builds a frozen graph with n vertices and an edge from sources[i] to
+    targets[i] with weight weights[i] for every i. The edges are sorted into
+    CSR form with NumPy, so no Python objects are created per edge.
+
+    Parameters
+    ----------
+    n : int
+      The number of vertices.
+    sources : array_like
+      The vertex each edge leaves.
+    targets : array_like
+      The vertex each edge enters.
+    weights : array_like, optional
+      The weight of each edge, which must not be negative. The default is None,
+      which gives every edge weight 1.
+
+    Raises
+    ------
+    ValueError
+      If the arrays have different lengths, a vertex is out of range or a
+      weight is negative.
+
+    Returns
+    -------
+    Graph
+      The frozen graph.
+
+    """
+    
+    if np is None:
+      raise ImportError("Graph.from_edges requires NumPy")
+    
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if weights is None:
+      weights = np.ones(len(sources))
+    weights = np.asarray(weights, dtype=np.float64)
+    
+    if not len(sources) == len(targets) == len(weights):
+      raise ValueError("sources, targets and weights must have the same length")
+    if len(sources) and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= n):
+      raise ValueError(f"Edges must join vertices between 0 and {n-1}")
+    if len(weights) and weights.min() < 0:
+      raise ValueError("Edge weights must not be negative")
+    
+    # A stable sort by source keeps each vertex's edges in the order given
+    order = np.argsort(sources, kind='stable')
+    
+    g = cls.__new__(cls)
+    g.nodes = None
+    g.indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=g.indptr[1:])
+    g.indices = targets[order]
+    g.weights = weights[order]
+    return g
+  
+  def Size(self) -> int:
+    """
+    Returns the number of vertices in the graph.
+    """
+    
+    return len(self.indptr) - 1 if self.nodes is None else len(self.nodes)
+  
+  def Edge_Count(self) -> int:
+    """
+    Returns the number of edges in the graph.
+    """
+    
+    if self.nodes is None:
+      return len(self.indices)
+    return sum(len(x.neighbors) for x in self.nodes)
+  
+  def isFrozen(self) -> bool:
+    """
+    Returns True if the graph is frozen and False otherwise.
+    """
+    
+    return self.nodes is None
+  
+  def Add_Node(self) -> int:
+    """
+    Adds a vertex with no edges to a mutable graph and returns its index.
+    """
+    
+    self.Check_Mutable()
+    self.nodes.append(Node(len(self.nodes)))
+    return len(self.nodes) - 1
+  
+  def Add_Edge(self, u : int, v : int, weight : float = 1.0) -> None:
+    """
+    Adds an edge from vertex u to vertex v to a mutable graph.
+
+    Parameters
+    ----------
+    u : int
+      The vertex the edge leaves.
+    v : int
+      The vertex the edge enters.
+    weight : float, optional
+      The weight of the edge, which must not be negative. The default is 1.0.
+
+    Raises
+    ------
+    ValueError
+      If the weight is negative or a vertex is out of range.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    self.Check_Mutable()
+    if weight < 0:
+      raise ValueError("Edge weights must not be negative")
+    if not (0 <= u < len(self.nodes) and 0 <= v < len(self.nodes)):
+      raise ValueError(f"Edges must join vertices between 0 and {len(self.nodes)-1}")
+    
+    self.nodes[u].neighbors.append(v)
+    self.nodes[u].weights.append(weight)
+  
+  def freeze(self) -> 'Graph':
+    """
+    Converts the graph to frozen (CSR) mode in place and returns it. Freezing
+    a frozen graph does nothing.
+    """
+    
+    if self.nodes is None:
+      return self
+    if np is None:
+      raise ImportError("Graph.freeze requires NumPy")
+    
+    nodes = self.nodes
+    self.indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum([len(x.neighbors) for x in nodes], out=self.indptr[1:])
+    
+    # Each vertex's arrays are copied into the CSR arrays as raw buffers
+    self.indices = np.empty(self.indptr[-1], dtype=np.int64)
+    self.weights = np.empty(self.indptr[-1], dtype=np.float64)
+    for x in nodes:
+      if len(x.neighbors):
+        start, end = self.indptr[x.id], self.indptr[x.id + 1]
+        self.indices[start:end] = np.frombuffer(x.neighbors, dtype=np.int64)
+        self.weights[start:end] = np.frombuffer(x.weights, dtype=np.float64)
+    
+    self.nodes = None
+    return self
+  
+  def Edges(self, u : int) -> tuple:
+    """
+    Returns two sequences: the ends of the edges leaving vertex u, and their
+    weights.
+    """
+    
+    if self.nodes is None:
+      start, end = self.indptr[u], self.indptr[u + 1]
+      return self.indices[start:end].tolist(), self.weights[start:end].tolist()
+    return self.nodes[u].neighbors, self.nodes[u].weights
+  
+  def shortest_paths(self, source : int, queue : str = 'tree') -> list:
+    """
+    Finds the length of the shortest path from source to every vertex with
+    Dijkstra's algorithm (Section 24.3 of CLRS).
+    
+    With queue='tree', the priority queue is a Red_Black_Tree holding one
+    (distance, vertex) key per vertex that has been reached but not
+    finished, so vertices at the same tentative distance still have distinct
+    keys. DECREASE-KEY deletes the vertex's key and inserts it again with
+    the smaller distance, so every queue operation takes O(lg(V)) time and
+    the queue never holds more than V keys. With queue='heap', the queue
+    is a binary heap from heapq instead, which has no DECREASE-KEY, so a
+    vertex is pushed again whenever its distance drops and stale entries are
+    skipped when they are popped.
+
+    Parameters
+    ----------
+    source : int
+      The vertex the paths start from.
+    queue : str, optional
+      The priority queue to use, either 'tree' or 'heap'. The default is
+      'tree'.
+
+    Raises
+    ------
+    ValueError
+      If source is not a vertex, or if queue is neither 'tree' nor 'heap'.
+
+    Returns
+    -------
+    list
+      The distance from source to each vertex, which is INFINITY for
+      vertices that cannot be reached.
+
+    """
+    
+    n = self.Size()
+    if not 0 <= source < n:
+      raise ValueError(f"Source must be a vertex between 0 and {n-1}")
+    
+    dist = [INFINITY] * n
+    dist[source] = 0.0
+    Edges = self.Edges
+    
+    if queue == 'tree':
+      
+      q = Red_Black_Tree()
+      q.Insert((0.0, source))
+      
+      while not q.isEmpty():
+        d, u = q.PopMin()
+        
+        targets, weights = Edges(u)
+        for v, w in zip(targets, weights):
+          
+          # Relax the edge (u, v). With non-negative weights a finished
+          # vertex never gets closer, so a finite dist[v] means v is queued.
+          if d + w < dist[v]:
+            if dist[v] < INFINITY:
+              q.Delete((dist[v], v))
+            dist[v] = d + w
+            q.Insert((d + w, v))
+    
+    elif queue == 'heap':
+      heap = [(0.0, source)]
+      while heap:
+        d, u = heapq.heappop(heap)
+        
+        # Skip entries left behind when u's distance dropped
+        if d > dist[u]:
+          continue
+        
+        targets, weights = Edges(u)
+        for v, w in zip(targets, weights):
+          if d + w < dist[v]:
+            dist[v] = d + w
+            heapq.heappush(heap, (d + w, v))
+    
+    else:
+      raise ValueError(f"Unknown queue {queue!r}, expected 'tree' or 'heap'")
+    
+    return dist
+  
+  ################## Auxiliary Funcntions ######################
+  
+  def Check_Mutable(self) -> None:
+    """
+    Raises a ValueError if the graph is frozen.
+    """
+    
+    if self.nodes is None:
+      raise ValueError("A frozen graph cannot be changed")
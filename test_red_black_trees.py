@@ -1,6 +1,13 @@
+import bisect
+import copy
+import heapq
 import numpy as np
+import os
+import pickle
+import tempfile
+import threading
 import unittest
-from red_black_trees import Red_Black_Node, Red_Black_Tree, BLACK, RED
+from red_black_trees import Red_Black_Node, Red_Black_Tree, Order_Statistic_Tree, Interval_Tree, Red_Black_Map, Red_Black_Multiset, Persistent_Red_Black_Tree, Snapshot_Red_Black_Tree, Readers_Writer_Lock, Concurrent_Red_Black_Tree, Retroactive_Priority_Queue, Graph, Array_Red_Black_Tree, BLACK, RED, INFINITY
 
 def Red_Black_Tree_Suite():
   suite = unittest.TestSuite()
@@ -8,9 +15,48 @@ def Red_Black_Tree_Suite():
   suite.addTest(Red_Black_Tree_Insert())
   suite.addTest(Red_Black_Tree_Delete())
   suite.addTest(Red_Black_Tree_Advanced())
+  suite.addTest(Red_Black_Tree_Bulk_Load())
+  suite.addTest(Red_Black_Tree_Batch())
+  suite.addTest(Red_Black_Tree_Pop())
+  suite.addTest(Red_Black_Tree_Range())
+  suite.addTest(Red_Black_Tree_Join_Split())
+  suite.addTest(Red_Black_Tree_Cursor())
+  suite.addTest(Red_Black_Tree_Iteration())
+  suite.addTest(Red_Black_Tree_Stats())
+  suite.addTest(Red_Black_Tree_Dump_Load())
+  suite.addTest(Red_Black_Tree_Pickle())
+  suite.addTest(Red_Black_Tree_Key_Function())
+  suite.addTest(Red_Black_Tree_Freeze())
+  suite.addTest(Eytzinger_Red_Black_Tree_Tests())
+  suite.addTest(Order_Statistic_Tree_Tests())
+  suite.addTest(Interval_Tree_Tests())
+  suite.addTest(Red_Black_Map_Tests())
+  suite.addTest(Red_Black_Multiset_Tests())
+  suite.addTest(Persistent_Red_Black_Tree_Tests())
+  suite.addTest(Snapshot_Red_Black_Tree_Tests())
+  suite.addTest(Concurrent_Red_Black_Tree_Tests())
+  suite.addTest(Retroactive_Priority_Queue_Tests())
+  suite.addTest(Graph_Tests())
+  suite.addTest(Array_Red_Black_Tree_Basic())
+  suite.addTest(Array_Red_Black_Tree_Advanced())
   return suite
 
 class Common_Functions(unittest.TestCase):
+  # The property checks below work on both Red_Black_Tree, whose nodes are
+  # Red_Black_Node objects, and Array_Red_Black_Tree, whose nodes are indices
+  # into the tree's arrays. These accessors hide the difference.
+  def get_key(self, g, n):
+    return g.key[n] if isinstance(g, Array_Red_Black_Tree) else n.key
+  
+  def get_left(self, g, n):
+    return g.left[n] if isinstance(g, Array_Red_Black_Tree) else n.left
+  
+  def get_right(self, g, n):
+    return g.right[n] if isinstance(g, Array_Red_Black_Tree) else n.right
+  
+  def get_color(self, g, n):
+    return g.color[n] if isinstance(g, Array_Red_Black_Tree) else n.color
+  
   def recursive_bst(self, g, n):
     """
     Method to recursively verify that the tree has the Binary Search Tree
@@ -19,15 +65,19 @@ class Common_Functions(unittest.TestCase):
               greater than or equal to n's key)
     """
 
-    if n.left != g.nil:
-      max_left = g.Maximum(n.left).key
-      self.assertLess(max_left, n.key, f"BST Property Violated : A node with key {max_left} is in the left subtree of a node with key {n.key}")
-      self.recursive_bst(g, n.left)
-    
-    if n.right != g.nil:
-      min_right = g.Minimum(n.right).key
-      self.assertGreaterEqual(min_right, n.key, f"BST Property Violated : A node with key {min_right} is in the right subtree of a node with key {n.key}")
-      self.recursive_bst(g, n.right)
+    n_key = self.get_key(g, n)
+    n_left = self.get_left(g, n)
+    n_right = self.get_right(g, n)
+
+    if n_left != g.nil:
+      max_left = self.get_key(g, g.Maximum(n_left))
+      self.assertLess(max_left, n_key, f"BST Property Violated : A node with key {max_left} is in the left subtree of a node with key {n_key}")
+      self.recursive_bst(g, n_left)
+    
+    if n_right != g.nil:
+      min_right = self.get_key(g, g.Minimum(n_right))
+      self.assertGreaterEqual(min_right, n_key, f"BST Property Violated : A node with key {min_right} is in the right subtree of a node with key {n_key}")
+      self.recursive_bst(g, n_right)
   
   def test_bst(self, g):
     
@@ -38,37 +88,40 @@ class Common_Functions(unittest.TestCase):
       self.recursive_bst(g, g.root)
 
   def recursive_property_one(self, g, n):
-    self.assertIn(n.color, [RED, BLACK], f"Property 1 Violated : Node with key {n.key} is neither RED nor BLACK")
+    self.assertIn(self.get_color(g, n), [RED, BLACK], f"Property 1 Violated : Node with key {self.get_key(g, n)} is neither RED nor BLACK")
     
-    if n.left != g.nil:
-      self.recursive_property_one(g, n.left)
+    if self.get_left(g, n) != g.nil:
+      self.recursive_property_one(g, self.get_left(g, n))
     
-    if n.right != g.nil:
-      self.recursive_property_one(g, n.right)
+    if self.get_right(g, n) != g.nil:
+      self.recursive_property_one(g, self.get_right(g, n))
   
   def test_property_one(self, g):
-    self.assertIn(g.nil.color, [RED, BLACK], "Property 1 Violated : Leaf node is neither RED nor BLACK")
+    self.assertIn(self.get_color(g, g.nil), [RED, BLACK], "Property 1 Violated : Leaf node is neither RED nor BLACK")
 
     # Don't recurse on empty tree
     if g.root != g.nil:
       self.recursive_property_one(g, g.root)
   
   def test_property_two(self, g):
-    self.assertEqual(g.root.color, BLACK, "Property 2 Violated : Root node is not BLACK")
+    self.assertEqual(self.get_color(g, g.root), BLACK, "Property 2 Violated : Root node is not BLACK")
   
   def test_property_three(self, g):
-    self.assertEqual(g.nil.color, BLACK, "Property 3 Violated : Leaf node is not BLACK")
+    self.assertEqual(self.get_color(g, g.nil), BLACK, "Property 3 Violated : Leaf node is not BLACK")
   
   def recursive_property_four(self, g, n):
-    if n.color == RED:
-      self.assertNotEqual(n.left.color, RED, f"Property 4 Violated : node with key {n.key} is RED and has RED left child with key {n.left.key}")
-      self.assertNotEqual(n.right.color, RED, f"Property 4 Violated : node with key {n.key} is RED and has RED right child with key {n.right.key}")
+    n_left = self.get_left(g, n)
+    n_right = self.get_right(g, n)
     
-    if n.left != g.nil:
-      self.recursive_property_four(g, n.left)
+    if self.get_color(g, n) == RED:
+      self.assertNotEqual(self.get_color(g, n_left), RED, f"Property 4 Violated : node with key {self.get_key(g, n)} is RED and has RED left child with key {self.get_key(g, n_left)}")
+      self.assertNotEqual(self.get_color(g, n_right), RED, f"Property 4 Violated : node with key {self.get_key(g, n)} is RED and has RED right child with key {self.get_key(g, n_right)}")
     
-    if n.right != g.nil:
-      self.recursive_property_four(g, n.right)
+    if n_left != g.nil:
+      self.recursive_property_four(g, n_left)
+    
+    if n_right != g.nil:
+      self.recursive_property_four(g, n_right)
   
   def test_property_four(self, g):
     # Do not recurse on empty tree
@@ -81,12 +134,12 @@ class Common_Functions(unittest.TestCase):
     if n == g.nil:
       return bh + 1
     
-    if n.color == BLACK:
+    if self.get_color(g, n) == BLACK:
       bh += 1
       
-    left_bh = self.recursive_property_five(g, n.left, bh)  
-    right_bh = self.recursive_property_five(g, n.right, bh)
-    self.assertEqual(left_bh, right_bh, f"Property 5 Violated : node with key {n.key} black height is not consistent (left bh ({left_bh}) != right_bh ({right_bh})")
+    left_bh = self.recursive_property_five(g, self.get_left(g, n), bh)  
+    right_bh = self.recursive_property_five(g, self.get_right(g, n), bh)
+    self.assertEqual(left_bh, right_bh, f"Property 5 Violated : node with key {self.get_key(g, n)} black height is not consistent (left bh ({left_bh}) != right_bh ({right_bh})")
     
     return left_bh # equal to right_bh
   
@@ -116,7 +169,8 @@ class Red_Black_Tree_Basic(Common_Functions):
             self.test_predecessor,
             self.test_delete_empty,
             self.test_insert_delete,
-            self.test_insert_delete2
+            self.test_insert_delete2,
+            self.test_slots
             ]
     
     for test in tests:
@@ -257,6 +311,21 @@ class Red_Black_Tree_Basic(Common_Functions):
 
     self.assertNotEqual(g.Search(g.root, 5), g.nil, "Inserting a node then deleting a different node results in Search() not finding the inserted node")
 
+  def test_slots(self):
+    """
+    Tests that nodes use __slots__ and do not carry a per-instance __dict__
+    """
+    
+    g = Red_Black_Tree()
+    g.Insert(5) # arbitrary number
+    
+    self.assertFalse(hasattr(g.root, "__dict__"), "Red_Black_Node has a per-instance __dict__")
+    self.assertFalse(hasattr(g.nil, "__dict__"), "Sentinel leaf has a per-instance __dict__")
+    
+    # Nodes only accept the attributes declared in __slots__
+    with self.assertRaises(AttributeError):
+      g.root.l = g.nil
+
   def test_min(self):
     """
     Test the min function
@@ -1292,6 +1361,9 @@ class Red_Black_Tree_Advanced(Common_Functions):
   Performs high-level black box functionality tests
   """
   
+  # The tree implementation under test
+  Tree = Red_Black_Tree
+  
   def runTest(self):
     tests = [
             self.test_100,
@@ -1307,7 +1379,7 @@ class Red_Black_Tree_Advanced(Common_Functions):
     Trees are maintained.
     """
     
-    g = Red_Black_Tree()
+    g = self.Tree()
     
     for i in range(100):
       self.test_bst(g)
@@ -1333,7 +1405,7 @@ class Red_Black_Tree_Advanced(Common_Functions):
     properties of Red Black Trees are maintained
     """
     
-    g = Red_Black_Tree()
+    g = self.Tree()
     
     insert_order = np.random.permutation(100)
     delete_order = np.random.permutation(100)
@@ -1355,6 +1427,2829 @@ class Red_Black_Tree_Advanced(Common_Functions):
     
     self.assertTrue(g.isEmpty())
     
+class Red_Black_Tree_Bulk_Load(Common_Functions):
+  """
+  Tests that from_sorted builds valid Red Black Trees
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_sizes,
+            self.test_sort,
+            self.test_unsorted,
+            self.test_repeats,
+            self.test_insert_delete
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Test that building from no keys gives an empty tree
+    """
+    
+    g = Red_Black_Tree.from_sorted([])
+    
+    self.assertTrue(g.isEmpty(), "Building from no keys gives a non-empty tree")
+    self.assertEqual(g.root, g.nil, "Root node in empty tree is not equal to leaf")
+    self.assertEqual(g.root.p, g.nil, "Root node's parent in empty tree is not leaf")
+  
+  def test_sizes(self):
+    """
+    Tests that trees of every size up to 300 have all 5 properties of Red
+    Black Trees and contain every key
+    """
+    
+    for n in range(300):
+      g = Red_Black_Tree.from_sorted(range(n))
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Size(), n)
+      
+      for i in range(n):
+        self.assertNotEqual(g.Search(g.root, i), g.nil, f"Tree built from {n} keys is missing key {i}")
+  
+  def test_sort(self):
+    """
+    Tests that sort=True accepts keys in any order
+    """
+    
+    g = Red_Black_Tree.from_sorted(np.random.permutation(100), sort=True)
+    
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Size(), 100)
+    self.assertEqual(g.Minimum(g.root).key, 0)
+    self.assertEqual(g.Maximum(g.root).key, 99)
+  
+  def test_unsorted(self):
+    """
+    Tests that unsorted keys are rejected unless sort=True
+    """
+    
+    with self.assertRaises(ValueError):
+      Red_Black_Tree.from_sorted([2, 1, 3])
+  
+  def test_repeats(self):
+    """
+    Tests that repeated keys are put in the right subtree of an equal key,
+    as Insert puts them, whenever a Red Black Tree can hold them that way
+    """
+    
+    for n in range(300):
+      keys = sorted(list(range(n)) + list(range(1, n, 4)))
+      g = Red_Black_Tree.from_sorted(keys)
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), keys)
+    
+    for keys in [[0, 1, 1, 2, 3, 3, 3, 4, 5], sorted(list(range(1000)) + list(range(3, 1000, 10)) * 2)]:
+      g = Red_Black_Tree.from_sorted(keys)
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), keys)
+    
+    # No Red Black Tree holds these with every equal key on the right (a key
+    # can have at most three nodes that way), so only the properties hold
+    for keys in [[1, 1, 2, 3, 3, 3], [5] * 100]:
+      g = Red_Black_Tree.from_sorted(keys)
+      
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), keys)
+  
+  def test_insert_delete(self):
+    """
+    Tests that Insert and Delete maintain all 5 properties of Red Black Trees
+    on a bulk loaded tree
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(0, 200, 2))
+    
+    for i in np.random.permutation(range(1, 200, 2)):
+      g.Insert(i)
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Size(), 200)
+    
+    for i in np.random.permutation(200):
+      g.Delete(i)
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertTrue(g.isEmpty())
+
+class Red_Black_Tree_Batch(Common_Functions):
+  """
+  Tests that InsertMany and DeleteMany maintain Red Black Properties
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_insert_many_small,
+            self.test_insert_many_large,
+            self.test_insert_many_repeats,
+            self.test_delete_many_small,
+            self.test_delete_many_large,
+            self.test_delete_many_missing
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_insert_many_small(self):
+    """
+    Tests inserting batches smaller than the tree, which insert one key at a
+    time
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(0, 400, 4))
+    
+    for batch in np.array_split(np.random.permutation(range(1, 400, 4)), 10):
+      inserted = g.InsertMany(batch)
+      
+      self.assertEqual(inserted, len(batch), f"InsertMany returned {inserted} (Expected {len(batch)})")
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Keys(), sorted(list(range(0, 400, 4)) + list(range(1, 400, 4))))
+  
+  def test_insert_many_large(self):
+    """
+    Tests inserting batches at least half as large as the tree, which relink
+    all of its nodes
+    """
+    
+    g = Red_Black_Tree()
+    
+    inserted = g.InsertMany(np.random.permutation(100))
+    
+    self.assertEqual(inserted, 100, f"InsertMany returned {inserted} (Expected 100)")
+    self.test_bst(g)
+    self.test_properties(g)
+    
+    inserted = g.InsertMany(np.random.permutation(range(100, 300)))
+    
+    self.assertEqual(inserted, 200, f"InsertMany returned {inserted} (Expected 200)")
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Size(), 300)
+    self.assertEqual(g.Keys(), list(range(300)))
+  
+  def test_insert_many_repeats(self):
+    """
+    Tests that a large batch with keys already in the tree, and keys that
+    repeat within the batch, keeps equal keys in right subtrees when all of
+    the nodes are relinked
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(0, 400, 2))
+    batch = list(range(1, 400, 4)) + list(range(2, 400, 8)) + list(range(3, 400, 20)) * 2
+    
+    inserted = g.InsertMany(np.random.permutation(batch))
+    
+    self.assertEqual(inserted, len(batch), f"InsertMany returned {inserted} (Expected {len(batch)})")
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Keys(), sorted(list(range(0, 400, 2)) + batch))
+  
+  def test_delete_many_small(self):
+    """
+    Tests deleting batches smaller than the tree, which delete one key at a
+    time
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(400))
+    
+    for batch in np.array_split(np.random.permutation(range(0, 400, 2)), 10):
+      deleted = g.DeleteMany(batch)
+      
+      self.assertEqual(deleted, len(batch), f"DeleteMany returned {deleted} (Expected {len(batch)})")
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Keys(), list(range(1, 400, 2)))
+  
+  def test_delete_many_large(self):
+    """
+    Tests deleting batches at least as large as the tree, which relink the
+    nodes that are kept
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(100))
+    
+    deleted = g.DeleteMany(np.random.permutation(range(50, 300)))
+    
+    self.assertEqual(deleted, 50, f"DeleteMany returned {deleted} (Expected 50)")
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Keys(), list(range(50)))
+  
+  def test_delete_many_missing(self):
+    """
+    Tests that keys not in the tree are not counted, and that a key in the
+    batch twice only deletes it once
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(0, 100, 2))
+    
+    deleted = g.DeleteMany([1, 3, 4, 4, 10])
+    
+    self.assertEqual(deleted, 2, f"DeleteMany returned {deleted} (Expected 2)")
+    self.assertEqual(g.Size(), 48)
+    self.assertEqual(g.Search(g.root, 4), g.nil, "DeleteMany did not delete key 4")
+    self.assertEqual(g.Search(g.root, 10), g.nil, "DeleteMany did not delete key 10")
+    self.test_bst(g)
+    self.test_properties(g)
+
+class Red_Black_Tree_Pop(Common_Functions):
+  """
+  Tests DeleteNode, PopMin and PopMax
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_delete_node,
+            self.test_pop,
+            self.test_other_trees
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_delete_node(self):
+    """
+    Tests deleting nodes found by Search and by a cursor, including one of
+    several nodes with the same key
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.permutation(100):
+      g.Insert(int(i))
+    g.Insert(50)
+    
+    for k in [k for k in np.random.permutation(100) if k != 50][:40]:
+      g.DeleteNode(g.Search(g.root, int(k)))
+      self.test_properties(g)
+    self.assertEqual(g.Size(), 61)
+    
+    # Only the node passed in is deleted, not the other node with its key
+    c = g.Cursor(50)
+    g.DeleteNode(c.node)
+    self.assertEqual(g.Size(), 60)
+    self.assertIn(50, g)
+    self.test_properties(g)
+  
+  def test_pop(self):
+    """
+    Tests draining a tree from both ends against a sorted list
+    """
+    
+    g = Red_Black_Tree()
+    keys = [int(i) for i in np.random.randint(0, 50, 200)]
+    for k in keys:
+      g.Insert(k)
+    keys.sort()
+    
+    while keys:
+      if len(keys) % 3:
+        self.assertEqual(g.PopMin(), keys.pop(0))
+      else:
+        self.assertEqual(g.PopMax(), keys.pop())
+      self.assertEqual(g.Size(), len(keys))
+      self.test_properties(g)
+    
+    with self.assertRaises(IndexError):
+      g.PopMin()
+    with self.assertRaises(IndexError):
+      g.PopMax()
+  
+  def test_other_trees(self):
+    """
+    Tests popping from an Order Statistic Tree, a map, a multiset, a tree
+    with a key function and a Concurrent_Red_Black_Tree
+    """
+    
+    g = Order_Statistic_Tree()
+    for i in np.random.permutation(30):
+      g.Insert(int(i))
+    self.assertEqual([g.PopMin() for _ in range(5)], list(range(5)))
+    self.assertEqual(g.PopMax(), 29)
+    self.assertEqual(g.Select(1).key, 5)
+    self.assertEqual(g.root.size, 24)
+    
+    m = Red_Black_Map()
+    for i in range(5):
+      m[i] = str(i)
+    self.assertEqual(m.PopMin(), (0, '0'))
+    self.assertEqual(m.PopMax(), (4, '4'))
+    self.assertEqual(list(m.items()), [(1, '1'), (2, '2'), (3, '3')])
+    
+    s = Red_Black_Multiset.from_sorted([1, 1, 2])
+    self.assertEqual([s.PopMin(), s.PopMin(), s.PopMin()], [1, 1, 2])
+    self.assertEqual(s.total_size(), 0)
+    s = Red_Black_Multiset.from_sorted([1, 1, 1, 2])
+    s.DeleteNode(s.Search(s.root, 1), 2)
+    self.assertEqual(list(s), [1, 2])
+    
+    k = Red_Black_Tree(key=len)
+    for w in ['ccc', 'a', 'bb']:
+      k.Insert(w)
+    self.assertEqual(k.PopMin(), 'a')
+    self.assertEqual(k.PopMax(), 'ccc')
+    
+    c = Concurrent_Red_Black_Tree()
+    c.InsertMany(range(1000))
+    popped = []
+    def worker():
+      for _ in range(250):
+        popped.append(c.PopMin())
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    self.assertEqual(sorted(popped), list(range(1000)))
+    self.assertEqual(len(c), 0)
+
+class Red_Black_Tree_Range(Common_Functions):
+  """
+  Tests that Range yields the keys in a range in sorted order
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_range,
+            self.test_bounds_not_keys,
+            self.test_inclusive,
+            self.test_unbounded,
+            self.test_reverse,
+            self.test_lazy
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Tests that a range on an empty tree yields nothing
+    """
+    
+    g = Red_Black_Tree()
+    
+    self.assertEqual(list(g.Range(1, 10)), [])
+    self.assertEqual(list(g.Range(1, 10, reverse=True)), [])
+  
+  def test_range(self):
+    """
+    Tests ranges whose bounds are keys in the tree
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(100):
+      g.Insert(i)
+    
+    for lo in range(0, 100, 7):
+      for hi in range(lo, 100, 11):
+        keys = list(g.Range(lo, hi))
+        self.assertEqual(keys, list(range(lo, hi+1)), f"Range({lo}, {hi}) returned {keys}")
+  
+  def test_bounds_not_keys(self):
+    """
+    Tests ranges whose bounds are not keys in the tree
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(range(0, 100, 2)):
+      g.Insert(i)
+    
+    self.assertEqual(list(g.Range(3, 11)), [4, 6, 8, 10])
+    self.assertEqual(list(g.Range(-5, 3)), [0, 2])
+    self.assertEqual(list(g.Range(95, 200)), [96, 98])
+    self.assertEqual(list(g.Range(5, 5)), [])
+    self.assertEqual(list(g.Range(10, 4)), [])
+  
+  def test_inclusive(self):
+    """
+    Tests excluding keys equal to the bounds
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(10):
+      g.Insert(i)
+    
+    self.assertEqual(list(g.Range(2, 5, inclusive=(True, True))), [2, 3, 4, 5])
+    self.assertEqual(list(g.Range(2, 5, inclusive=(False, True))), [3, 4, 5])
+    self.assertEqual(list(g.Range(2, 5, inclusive=(True, False))), [2, 3, 4])
+    self.assertEqual(list(g.Range(2, 5, inclusive=(False, False))), [3, 4])
+  
+  def test_unbounded(self):
+    """
+    Tests ranges with no lower or upper end
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(10):
+      g.Insert(i)
+    
+    self.assertEqual(list(g.Range()), list(range(10)))
+    self.assertEqual(list(g.Range(lo=7)), [7, 8, 9])
+    self.assertEqual(list(g.Range(hi=2)), [0, 1, 2])
+  
+  def test_reverse(self):
+    """
+    Tests yielding keys from largest to smallest
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(range(0, 100, 2)):
+      g.Insert(i)
+    
+    self.assertEqual(list(g.Range(3, 11, reverse=True)), [10, 8, 6, 4])
+    self.assertEqual(list(g.Range(4, 10, inclusive=(False, False), reverse=True)), [8, 6])
+    self.assertEqual(list(g.Range(reverse=True)), list(range(98, -1, -2)))
+  
+  def test_lazy(self):
+    """
+    Tests that keys are produced one at a time
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(100):
+      g.Insert(i)
+    
+    keys = g.Range(10, 90)
+    
+    self.assertEqual(next(keys), 10)
+    self.assertEqual(next(keys), 11)
+    self.assertEqual(next(keys), 12)
+
+class Red_Black_Tree_Join_Split(Common_Functions):
+  """
+  Tests that Join and Split produce valid Red Black Trees
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_split,
+            self.test_split_empty,
+            self.test_join,
+            self.test_join_uneven,
+            self.test_join_without_pivot,
+            self.test_join_out_of_order,
+            self.test_split_join,
+            self.test_order_statistic
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_split(self):
+    """
+    Tests splitting at every key and between every pair of keys
+    """
+    
+    for k in range(-1, 102):
+      g = Red_Black_Tree()
+      
+      for i in np.random.permutation(range(0, 100, 2)):
+        g.Insert(i)
+      
+      left, right = g.Split(k)
+      
+      self.assertTrue(g.isEmpty(), "Split did not empty the tree")
+      
+      for t in (left, right):
+        self.test_bst(t)
+        self.test_properties(t)
+      
+      self.assertEqual(left.Keys(), [i for i in range(0, 100, 2) if i < k], f"Left tree of Split({k}) has the wrong keys")
+      self.assertEqual(right.Keys(), [i for i in range(0, 100, 2) if i >= k], f"Right tree of Split({k}) has the wrong keys")
+      self.assertEqual(left.Size(), len(left.Keys()))
+      self.assertEqual(right.Size(), len(right.Keys()))
+  
+  def test_split_empty(self):
+    """
+    Tests splitting an empty tree
+    """
+    
+    left, right = Red_Black_Tree().Split(5)
+    
+    self.assertTrue(left.isEmpty())
+    self.assertTrue(right.isEmpty())
+  
+  def test_join(self):
+    """
+    Tests joining trees of equal size
+    """
+    
+    left = Red_Black_Tree()
+    right = Red_Black_Tree()
+    
+    for i in np.random.permutation(50):
+      left.Insert(i)
+      right.Insert(i + 51)
+    
+    g = Red_Black_Tree.Join(left, 50, right)
+    
+    self.assertTrue(left.isEmpty() and right.isEmpty(), "Join did not empty the trees")
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Keys(), list(range(101)))
+    self.assertEqual(g.Size(), 101)
+  
+  def test_join_uneven(self):
+    """
+    Tests joining trees whose black heights differ, in both directions
+    """
+    
+    for small in range(0, 20):
+      big_left = Red_Black_Tree.from_sorted(range(200))
+      small_right = Red_Black_Tree.from_sorted(range(201, 201 + small))
+      g = Red_Black_Tree.Join(big_left, 200, small_right)
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), list(range(201 + small)))
+      
+      small_left = Red_Black_Tree.from_sorted(range(small))
+      big_right = Red_Black_Tree.from_sorted(range(small + 1, small + 201))
+      g = Red_Black_Tree.Join(small_left, small, big_right)
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), list(range(small + 201)))
+      
+      # The trees stay valid under later inserts and deletes
+      for i in np.random.permutation(small + 201):
+        g.Delete(i)
+        self.test_properties(g)
+      self.assertTrue(g.isEmpty())
+  
+  def test_join_without_pivot(self):
+    """
+    Tests joining trees without adding a key between them
+    """
+    
+    left = Red_Black_Tree.from_sorted(range(30))
+    right = Red_Black_Tree.from_sorted(range(30, 40))
+    g = Red_Black_Tree.Join(left, None, right)
+    
+    self.test_bst(g)
+    self.test_properties(g)
+    self.assertEqual(g.Keys(), list(range(40)))
+    self.assertEqual(g.Size(), 40)
+    
+    g = Red_Black_Tree.Join(Red_Black_Tree.from_sorted(range(5)), None, Red_Black_Tree())
+    
+    self.assertEqual(g.Keys(), list(range(5)))
+  
+  def test_join_out_of_order(self):
+    """
+    Tests that joining trees whose keys are out of order is rejected
+    """
+    
+    with self.assertRaises(ValueError):
+      Red_Black_Tree.Join(Red_Black_Tree.from_sorted([1, 5]), 3, Red_Black_Tree.from_sorted([4]))
+    
+    with self.assertRaises(ValueError):
+      Red_Black_Tree.Join(Red_Black_Tree.from_sorted([1, 5]), None, Red_Black_Tree.from_sorted([4]))
+  
+  def test_split_join(self):
+    """
+    Tests splitting a tree and joining the two trees back together
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(200):
+      g.Insert(i)
+    
+    for k in np.random.permutation(200)[:20]:
+      left, right = g.Split(k)
+      self.assertIs(left.nil, right.nil, "Trees from Split do not share their sentinel")
+      
+      g = Red_Black_Tree.Join(left, None, right)
+      
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), list(range(200)))
+  
+  def test_order_statistic(self):
+    """
+    Tests that Join and Split maintain the sizes in Order Statistic Trees
+    """
+    
+    g = Order_Statistic_Tree.from_sorted(range(100))
+    left, right = g.Split(37)
+    
+    self.assertEqual(left.Size(), 37)
+    self.assertEqual(right.Size(), 63)
+    self.assertEqual(right.Select(1).key, 37)
+    
+    g = Order_Statistic_Tree.Join(right, 100, Order_Statistic_Tree.from_sorted(range(101, 150)))
+    g = Order_Statistic_Tree.Join(left, None, g)
+    
+    self.test_properties(g)
+    
+    for i in range(1, 151):
+      self.assertEqual(g.Select(i).key, i - 1, f"Select({i}) returned {g.Select(i).key} (Expected {i - 1})")
+
+class Red_Black_Tree_Cursor(Common_Functions):
+  """
+  Tests that a Cursor seeks, steps and inserts from its current position
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_seek,
+            self.test_next_prev,
+            self.test_insert_here
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Tests a cursor on an empty tree
+    """
+    
+    g = Red_Black_Tree()
+    c = g.Cursor()
+    
+    self.assertEqual(c.node, g.nil)
+    self.assertEqual(c.seek(5), g.nil)
+    self.assertEqual(c.next(), g.nil)
+    self.assertEqual(c.prev(), g.nil)
+  
+  def test_seek(self):
+    """
+    Tests that seek finds the smallest key at least the sought key, from any
+    starting position and in either direction
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(0, 200, 2))
+    c = g.Cursor()
+    
+    for key in list(np.random.randint(-5, 205, 500)) + list(range(-5, 205)) + list(range(205, -5, -1)):
+      key = int(key)
+      expected = key + key % 2 if 0 <= key <= 198 else (0 if key < 0 else None)
+      c.seek(key)
+      self.assertEqual(c.key, expected, f"seek({key}) moved to {c.key}")
+      
+      # A seek from past the end of the tree starts at the root again
+      if expected is None:
+        self.assertEqual(c.node, g.nil)
+  
+  def test_next_prev(self):
+    """
+    Tests that next and prev step through the keys in order
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.permutation(50):
+      g.Insert(i)
+    
+    c = g.Cursor()
+    keys = []
+    while c.node != g.nil:
+      keys.append(c.key)
+      c.next()
+    self.assertEqual(keys, list(range(50)))
+    
+    c = g.Cursor(49)
+    keys = []
+    while c.node != g.nil:
+      keys.append(c.key)
+      c.prev()
+    self.assertEqual(keys, list(range(49, -1, -1)))
+  
+  def test_insert_here(self):
+    """
+    Tests that inserting at the cursor keeps the Red Black Tree properties
+    and leaves the cursor on the new node
+    """
+    
+    g = Red_Black_Tree()
+    c = g.Cursor()
+    keys = []
+    
+    for i in np.random.randint(0, 100, 300):
+      i = int(i)
+      if np.random.rand() < 0.5:
+        c.seek(int(np.random.randint(0, 100)))
+      
+      z = c.insert_here(i)
+      keys.append(i)
+      self.assertEqual(c.node, z)
+      self.assertEqual(c.key, i)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Keys(), sorted(keys))
+    self.assertEqual(g.Size(), len(keys))
+
+class Red_Black_Tree_Iteration(Common_Functions):
+  """
+  Tests iteration, len and membership on a Red Black Tree
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_iter,
+            self.test_len_contains
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Tests the iteration protocol on an empty tree
+    """
+    
+    g = Red_Black_Tree()
+    
+    self.assertEqual(list(g), [])
+    self.assertEqual(list(reversed(g)), [])
+    self.assertEqual(len(g), 0)
+    self.assertNotIn(1, g)
+  
+  def test_iter(self):
+    """
+    Tests that iter and reversed agree with the Minimum/Successor walk
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in np.random.randint(0, 200, 300):
+      g.Insert(int(i))
+    
+    keys = []
+    x = g.Minimum(g.root)
+    while x != g.nil:
+      keys.append(x.key)
+      x = g.Successor(x)
+    
+    self.assertEqual(list(g), keys)
+    self.assertEqual(list(reversed(g)), keys[::-1])
+  
+  def test_len_contains(self):
+    """
+    Tests that len and in follow inserts and deletes
+    """
+    
+    g = Red_Black_Tree()
+    keys = set()
+    
+    for i in np.random.permutation(100):
+      g.Insert(int(i))
+      keys.add(int(i))
+      self.assertEqual(len(g), len(keys))
+    
+    for i in np.random.permutation(100)[:50]:
+      g.Delete(int(i))
+      keys.remove(int(i))
+      self.assertEqual(len(g), len(keys))
+    
+    for i in range(-1, 101):
+      self.assertEqual(i in g, i in keys, f"{i} in tree is {i in g}")
+
+class Red_Black_Tree_Stats(Common_Functions):
+  """
+  Tests the counts kept while stats are enabled
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_off,
+            self.test_rotations,
+            self.test_search,
+            self.test_fixup_cases
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_off(self):
+    """
+    Tests that nothing is counted until stats are enabled, and that reset and
+    disable work
+    """
+    
+    g = Red_Black_Tree()
+    
+    for i in range(10):
+      g.Insert(i)
+    self.assertEqual(g.stats(), {})
+    
+    g.enable_stats()
+    self.assertTrue(all(v == 0 for v in g.stats().values()))
+    g.Insert(10)
+    self.assertEqual(g.stats()['inserts'], 1)
+    
+    g.reset_stats()
+    self.assertEqual(g.stats()['inserts'], 0)
+    
+    g.disable_stats()
+    g.Insert(11)
+    self.assertEqual(g.stats(), {})
+  
+  def test_rotations(self):
+    """
+    Tests the counts for sequential inserts, which rotate at every other
+    insert once the tree has three nodes
+    """
+    
+    g = Red_Black_Tree()
+    g.enable_stats()
+    
+    for i in range(3):
+      g.Insert(i)
+    
+    # Inserting 0, 1, 2 makes one left rotation (Case 3 with z a right child)
+    stats = g.stats()
+    self.assertEqual(stats['left_rotations'], 1)
+    self.assertEqual(stats['right_rotations'], 0)
+    self.assertEqual(stats['insert_case_3'], 1)
+    self.assertEqual(stats['inserts'], 3)
+    self.assertEqual(stats['insert_path_length'], 0 + 1 + 2)
+    self.assertEqual(stats['comparisons'], 0 + 2 + 3)
+  
+  def test_search(self):
+    """
+    Tests the search path lengths and comparisons
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(7))
+    g.enable_stats()
+    
+    # The tree is perfectly balanced with 3 at the root
+    g.Search(g.root, 3)
+    g.Search(g.root, 0)
+    g.Search(g.root, 10)
+    
+    stats = g.stats()
+    self.assertEqual(stats['searches'], 3)
+    self.assertEqual(stats['search_path_length'], 1 + 3 + 3)
+    self.assertEqual(stats['max_search_path_length'], 3)
+    self.assertEqual(stats['comparisons'], 1 + 5 + 6)
+  
+  def test_fixup_cases(self):
+    """
+    Tests that the rotation counts agree with the fixup case counts on random
+    inserts and deletes
+    """
+    
+    g = Red_Black_Tree()
+    g.enable_stats()
+    
+    for i in np.random.permutation(500):
+      g.Insert(int(i))
+    for i in np.random.permutation(500):
+      g.Delete(int(i))
+    
+    stats = g.stats()
+    rotations = stats['left_rotations'] + stats['right_rotations']
+    self.assertEqual(rotations, stats['insert_case_2'] + stats['insert_case_3'] + stats['delete_case_1'] + stats['delete_case_3'] + stats['delete_case_4'])
+    self.assertGreater(stats['insert_case_1'], 0)
+    self.assertGreater(stats['delete_case_2'], 0)
+    self.assertEqual(stats['searches'], 500)
+    self.assertEqual(stats['inserts'], 500)
+
+class Red_Black_Tree_Dump_Load(Common_Functions):
+  """
+  Tests writing a Red Black Tree to a file and loading it back, both as a tree
+  and memory-mapped
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_round_trip,
+            self.test_mapped_queries,
+            self.test_floats_and_empty,
+            self.test_errors
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_round_trip(self):
+    """
+    Tests that loading without mmap builds a valid tree with the same keys
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.permutation(300):
+      g.Insert(int(i) - 100)
+    
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'tree.rbt')
+      g.dump(path)
+      h = Red_Black_Tree.load(path, mmap=False)
+    
+    self.assertEqual(list(h), list(g))
+    self.test_properties(h)
+  
+  def test_mapped_queries(self):
+    """
+    Tests Search, Select and Range on a memory-mapped file against the tree
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.choice(1000, 200, replace=False):
+      g.Insert(int(i))
+    keys = list(g)
+    
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'tree.rbt')
+      g.dump(path)
+      
+      with Red_Black_Tree.load(path) as m:
+        self.assertEqual(len(m), len(keys))
+        self.assertEqual(list(m), keys)
+        
+        for k in range(-1, 1001):
+          i = m.Search(k)
+          if k in keys:
+            self.assertEqual(i, keys.index(k))
+          else:
+            self.assertIsNone(i)
+          self.assertEqual(k in m, k in keys)
+        
+        for i in range(len(keys) + 2):
+          self.assertEqual(m.Select(i), keys[i - 1] if 1 <= i <= len(keys) else None)
+        
+        for lo, hi in [(None, None), (100, 500), (None, 300), (700, None), (500, 100)]:
+          for inclusive in [(True, True), (False, False), (True, False)]:
+            for reverse in [False, True]:
+              self.assertEqual(list(m.Range(lo, hi, inclusive, reverse)), list(g.Range(lo, hi, inclusive, reverse)))
+  
+  def test_floats_and_empty(self):
+    """
+    Tests float keys and an empty tree
+    """
+    
+    g = Red_Black_Tree.from_sorted([-2.5, 0.0, 1.25, 3.75])
+    
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'floats.rbt')
+      g.dump(path, typecode='d')
+      with Red_Black_Tree.load(path) as m:
+        self.assertEqual(list(m), [-2.5, 0.0, 1.25, 3.75])
+        self.assertEqual(m.Search(1.25), 2)
+      
+      path = os.path.join(d, 'empty.rbt')
+      Red_Black_Tree().dump(path)
+      with Red_Black_Tree.load(path) as m:
+        self.assertEqual(len(m), 0)
+        self.assertIsNone(m.Search(0))
+        self.assertIsNone(m.Select(1))
+        self.assertEqual(list(m.Range()), [])
+      self.assertTrue(Red_Black_Tree.load(path, mmap=False).isEmpty())
+  
+  def test_errors(self):
+    """
+    Tests that bad typecodes, keys and files are rejected
+    """
+    
+    g = Red_Black_Tree.from_sorted([0.5, 1.5])
+    
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'tree.rbt')
+      
+      with self.assertRaises(ValueError):
+        g.dump(path, typecode='s')
+      with self.assertRaises(TypeError):
+        g.dump(path)
+      
+      with open(path, 'wb') as f:
+        f.write(b'not a tree file at all')
+      with self.assertRaises(ValueError):
+        Red_Black_Tree.load(path)
+      with self.assertRaises(ValueError):
+        Red_Black_Tree.load(path, mmap=False)
+
+class Red_Black_Tree_Pickle(Common_Functions):
+  """
+  Tests pickling and copying Red Black Trees and the structures built on them
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_tree,
+            self.test_augmented,
+            self.test_retroactive
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_tree(self):
+    """
+    Tests that pickle, copy and deepcopy give valid, independent trees with
+    the same keys and settings
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.randint(0, 100, 300):
+      g.Insert(int(i))
+    g.enable_stats()
+    g.Insert(50)
+    
+    for h in [pickle.loads(pickle.dumps(g)), copy.copy(g), copy.deepcopy(g)]:
+      self.assertIs(type(h), Red_Black_Tree)
+      self.assertEqual(list(h), list(g))
+      self.assertEqual(h.Size(), g.Size())
+      self.assertEqual(h.stats(), g.stats())
+      self.test_properties(h)
+      
+      h.Insert(1000)
+      self.assertNotIn(1000, list(g))
+      self.assertEqual(g.stats()['inserts'], 1)
+    
+    h = pickle.loads(pickle.dumps(Red_Black_Tree()))
+    self.assertTrue(h.isEmpty())
+    h.Insert(1)
+    self.test_properties(h)
+  
+  def test_augmented(self):
+    """
+    Tests that the subclasses keep their node attributes and augmentations
+    """
+    
+    g = Order_Statistic_Tree()
+    for i in np.random.permutation(100):
+      g.Insert(int(i))
+    h = pickle.loads(pickle.dumps(g))
+    for x in h.Nodes():
+      self.assertEqual(x.size, x.left.size + x.right.size + 1)
+    self.assertEqual([h.Select(i).key for i in range(1, 101)], list(range(100)))
+    
+    g = Interval_Tree()
+    for low in np.random.permutation(50):
+      g.Insert(int(low), int(low) + 10)
+    h = copy.deepcopy(g)
+    for x in h.Nodes():
+      self.assertEqual(x.max, max(x.high, x.left.max, x.right.max))
+    self.assertEqual(sorted(h.overlapping(20, 22)), [(low, low + 10) for low in range(10, 23)])
+    
+    g = Red_Black_Map()
+    for i in range(20):
+      g[i] = [i]
+    h = copy.deepcopy(g)
+    self.assertEqual(list(h.items()), list(g.items()))
+    self.assertIsNot(h[5], g[5])
+    self.test_properties(h)
+  
+  def test_retroactive(self):
+    """
+    Tests that a pickled Retroactive_Priority_Queue goes on answering like
+    the original
+    """
+    
+    q = Retroactive_Priority_Queue()
+    for t in range(0, 60, 2):
+      q.Insert(t, int(np.random.randint(0, 1000000)))
+    for t in range(1, 60, 6):
+      q.DeleteMin(t)
+    
+    r = pickle.loads(pickle.dumps(q))
+    self.assertEqual(r.GetMin(), q.GetMin())
+    
+    for t in [7, 20, 31]:
+      q.Remove(t)
+      r.Remove(t)
+      self.assertEqual(r.GetMin(), q.GetMin())
+      self.assertEqual(len(r), len(q))
+    
+    q.Insert(45.5, -1)
+    r.Insert(45.5, -1)
+    self.assertEqual(r.GetMin(), q.GetMin())
+    self.assertEqual(list(r.now), list(q.now))
+
+class Red_Black_Tree_Key_Function(Common_Functions):
+  """
+  Tests Red Black Trees created with a key function
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_insert_search_delete,
+            self.test_key_computed_once,
+            self.test_bulk,
+            self.test_pickle,
+            self.test_unsupported
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_insert_search_delete(self):
+    """
+    Tests that items are ordered by their keys and can be found and deleted
+    by item or by key
+    """
+    
+    g = Red_Black_Tree(key=len)
+    words = ['pear', 'fig', 'banana', 'kiwifruit', 'apricots', 'plum', 'a']
+    
+    for w in words:
+      g.Insert(w)
+    
+    self.test_properties(g)
+    self.assertEqual(list(g), sorted(words, key=len))
+    self.assertEqual(list(reversed(g)), sorted(words, key=len)[::-1])
+    self.assertEqual(g.Keys(), sorted(map(len, words)))
+    self.assertEqual(list(g.Range(3, 6)), ['fig', 'pear', 'plum', 'banana'])
+    
+    self.assertEqual(g.Search(g.root, 6).item, 'banana')
+    self.assertEqual(g.Search(g.root, item='orange').item, 'banana')
+    self.assertEqual(g.Search(g.root, 5), g.nil)
+    self.assertIn(9, g)
+    
+    g.Delete(item='zucchini')
+    self.assertNotIn(8, g)
+    g.Delete(1)
+    self.assertNotIn('a', list(g))
+    self.assertEqual(g.DeleteMany(['xyz', 'wxyz'], items=True), 2)
+    self.assertEqual(g.DeleteMany([4, 6, 7]), 2)
+    self.assertEqual(list(g), ['kiwifruit'])
+    self.test_properties(g)
+  
+  def test_key_computed_once(self):
+    """
+    Tests that the key function is called once per inserted item, and never
+    by searches for keys
+    """
+    
+    calls = []
+    def key(item):
+      calls.append(item)
+      return item[0]
+    
+    g = Red_Black_Tree(key=key)
+    items = [(int(i), str(i)) for i in np.random.permutation(200)]
+    for item in items:
+      g.Insert(item)
+    self.assertEqual(len(calls), 200)
+    
+    for i in range(200):
+      self.assertEqual(g.Search(g.root, i).item, (i, str(i)))
+    for i in range(0, 200, 2):
+      g.Delete(i)
+    self.assertEqual(len(calls), 200)
+    
+    self.assertEqual(list(g), sorted(items)[1::2])
+    self.test_properties(g)
+  
+  def test_bulk(self):
+    """
+    Tests from_sorted, InsertMany, the cursor, Join and Split with items
+    """
+    
+    items = [(int(i), -int(i)) for i in np.random.permutation(100)]
+    key = lambda item: item[0]
+    
+    g = Red_Black_Tree.from_sorted(items, sort=True, key=key)
+    self.assertEqual(list(g), sorted(items))
+    self.test_properties(g)
+    with self.assertRaises(ValueError):
+      Red_Black_Tree.from_sorted(items, key=key)
+    
+    h = Red_Black_Tree(key=key)
+    h.InsertMany(items[:10])
+    h.InsertMany(items[10:])
+    self.assertEqual(list(h), sorted(items))
+    self.test_properties(h)
+    
+    c = h.Cursor(50)
+    c.insert_here((50, 'new'))
+    self.assertEqual(c.node.item, (50, 'new'))
+    self.assertEqual(h.Size(), 101)
+    
+    left, right = g.Split(50)
+    j = Red_Black_Tree.Join(left, (50, 'pivot'), right)
+    self.assertEqual(j.Keys(), sorted(list(range(101)) + [50])[:101])
+    self.assertIn((50, 'pivot'), list(j))
+    self.test_properties(j)
+  
+  def test_pickle(self):
+    """
+    Tests that a tree with a picklable key function can be pickled
+    """
+    
+    g = Red_Black_Tree(key=len)
+    for w in ['ccc', 'a', 'bb']:
+      g.Insert(w)
+    
+    h = pickle.loads(pickle.dumps(g))
+    self.assertEqual(list(h), ['a', 'bb', 'ccc'])
+    h.Insert('dddd')
+    self.assertEqual(h.Search(h.root, 4).item, 'dddd')
+    self.test_properties(h)
+  
+  def test_unsupported(self):
+    """
+    Tests that trees with other kinds of nodes reject a key function
+    """
+    
+    with self.assertRaises(TypeError):
+      Order_Statistic_Tree(key=len)
+    with self.assertRaises(TypeError):
+      Red_Black_Map(key=len)
+
+class Red_Black_Tree_Freeze(Common_Functions):
+  """
+  Tests freeze and the batch lookups answered from the frozen array
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_lookups,
+            self.test_invalidation,
+            self.test_other_trees
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_lookups(self):
+    """
+    Tests search_many, contains_many and rank_many against Search, for small
+    and large batches
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.randint(0, 3000, 2000):
+      g.Insert(int(i))
+    keys = list(g)
+    
+    frozen = g.freeze()
+    self.assertEqual(frozen.tolist(), keys)
+    self.assertFalse(frozen.flags.writeable)
+    
+    for n in [10, 5000]:
+      probes = np.random.randint(-10, 3010, n)
+      found = g.search_many(probes)
+      contains = g.contains_many(probes)
+      ranks = g.rank_many(probes)
+      
+      for k, i, c, r in zip(probes.tolist(), found.tolist(), contains.tolist(), ranks.tolist()):
+        self.assertEqual(c, g.Search(g.root, k) != g.nil)
+        self.assertEqual(i, keys.index(k) if c else -1)
+        self.assertEqual(r, sum(1 for key in keys if key < k))
+    
+    g = Red_Black_Tree()
+    self.assertEqual(len(g.freeze()), 0)
+    self.assertEqual(g.search_many([1, 2]).tolist(), [-1, -1])
+    self.assertEqual(g.contains_many([1]).tolist(), [False])
+    self.assertEqual(g.rank_many([1]).tolist(), [0])
+  
+  def test_invalidation(self):
+    """
+    Tests that the array is reused until the tree is modified
+    """
+    
+    g = Red_Black_Tree.from_sorted(range(10))
+    frozen = g.freeze()
+    self.assertIs(g.freeze(), frozen)
+    
+    g.Insert(20)
+    self.assertTrue(g.contains_many([20])[0])
+    g.Delete(3)
+    self.assertFalse(g.contains_many([3])[0])
+    g.InsertMany(range(30, 40))
+    self.assertEqual(g.rank_many([100])[0], 20)
+    
+    left, right = g.Split(5)
+    self.assertEqual(left.freeze().tolist(), [0, 1, 2, 4])
+    self.assertEqual(len(g.freeze()), 0)
+    j = Red_Black_Tree.Join(left, 5, right)
+    self.assertEqual(j.freeze().tolist(), [0, 1, 2, 4, 5] + list(range(5, 10)) + [20] + list(range(30, 40)))
+    self.assertEqual(len(left.freeze()), 0)
+    
+    h = pickle.loads(pickle.dumps(j))
+    self.assertEqual(h.freeze().tolist(), j.freeze().tolist())
+  
+  def test_other_trees(self):
+    """
+    Tests freezing a multiset, a tree with a key function and an Order
+    Statistic Tree
+    """
+    
+    g = Red_Black_Multiset.from_sorted([1, 2, 2, 2, 5])
+    self.assertEqual(g.freeze().tolist(), [1, 2, 2, 2, 5])
+    self.assertEqual(g.rank_many([2, 3]).tolist(), [1, 4])
+    g.Insert(2)
+    self.assertEqual(g.rank_many([3]).tolist(), [5])
+    g.Delete(2, 3)
+    self.assertEqual(g.freeze().tolist(), [1, 2, 5])
+    
+    g = Red_Black_Tree(key=len)
+    for w in ['ccc', 'a', 'bb']:
+      g.Insert(w)
+    self.assertEqual(g.freeze().tolist(), [1, 2, 3])
+    self.assertEqual(g.search_many([2, 4]).tolist(), [1, -1])
+    
+    g = Order_Statistic_Tree()
+    for i in np.random.permutation(50):
+      g.Insert(int(i))
+    self.assertEqual(g.rank_many([10]).tolist(), [g.CountLess(10)])
+    g.Insert(100)
+    self.assertTrue(g.contains_many([100])[0])
+
+class Eytzinger_Red_Black_Tree_Tests(Common_Functions):
+  """
+  Tests the Eytzinger export of a Red Black Tree against the tree and a
+  sorted list
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_sizes,
+            self.test_range,
+            self.test_items
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_sizes(self):
+    """
+    Tests Search, floor, ceiling and iteration for every size up to 70, so
+    that every shape of the last level is covered
+    """
+    
+    for n in range(70):
+      keys = sorted(int(i) for i in np.random.randint(0, 3 * n + 3, n))
+      e = Red_Black_Tree.from_sorted(keys).eytzinger()
+      
+      self.assertEqual(len(e), n)
+      self.assertEqual(list(e), keys)
+      
+      for k in range(-1, 3 * n + 5):
+        i = bisect.bisect_left(keys, k)
+        j = bisect.bisect_right(keys, k)
+        self.assertEqual(e.ceiling(k), keys[i] if i < n else None)
+        self.assertEqual(e.floor(k), keys[j - 1] if j > 0 else None)
+        self.assertEqual(e.Search(k), k if k in keys else None)
+        self.assertEqual(k in e, k in keys)
+  
+  def test_range(self):
+    """
+    Tests Range against Red_Black_Tree.Range
+    """
+    
+    g = Red_Black_Tree()
+    for i in np.random.randint(0, 100, 200):
+      g.Insert(int(i))
+    e = g.eytzinger()
+    
+    for lo, hi in [(None, None), (20, 60), (None, 30), (70, None), (60, 20), (-5, 200), (150, 160)]:
+      for inclusive in [(True, True), (False, False), (True, False), (False, True)]:
+        for reverse in [False, True]:
+          self.assertEqual(list(e.Range(lo, hi, inclusive, reverse)), list(g.Range(lo, hi, inclusive, reverse)))
+    
+    # The export is a copy, which later changes to the tree do not affect
+    keys = list(g)
+    g.Insert(1000)
+    self.assertEqual(list(e), keys)
+  
+  def test_items(self):
+    """
+    Tests exporting a tree with a key function and a multiset
+    """
+    
+    g = Red_Black_Tree(key=len)
+    for w in ['ccc', 'a', 'eeeee', 'bb']:
+      g.Insert(w)
+    e = g.eytzinger()
+    
+    self.assertEqual(list(e), ['a', 'bb', 'ccc', 'eeeee'])
+    self.assertEqual(e.Search(3), 'ccc')
+    self.assertEqual(e.floor(4), 'ccc')
+    self.assertEqual(e.ceiling(4), 'eeeee')
+    self.assertIsNone(e.Search(4))
+    
+    e = Red_Black_Multiset.from_sorted([1, 2, 2, 2, 5]).eytzinger()
+    self.assertEqual(list(e), [1, 2, 2, 2, 5])
+    self.assertEqual(e.floor(4), 2)
+    self.assertEqual(list(e.Range(2, 2)), [2, 2, 2])
+
+class Order_Statistic_Tree_Tests(Common_Functions):
+  """
+  Tests that Order Statistic Trees maintain subtree sizes and answer Select,
+  Rank and CountLess correctly
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_select,
+            self.test_rank,
+            self.test_count_less,
+            self.test_100_random,
+            self.test_batch
+            ]
+    
+    for test in tests:
+      test()
+  
+  def recursive_size(self, g, n):
+    """
+    Method to recursively verify that every node's size is the number of nodes
+    in its subtree
+    """
+    
+    if n == g.nil:
+      return 0
+    
+    size = self.recursive_size(g, n.left) + self.recursive_size(g, n.right) + 1
+    self.assertEqual(n.size, size, f"Node with key {n.key} has size {n.size} (Expected {size})")
+    return size
+  
+  def test_sizes(self, g):
+    self.assertEqual(g.nil.size, 0, "Leaf node's size is not 0")
+    self.assertEqual(self.recursive_size(g, g.root), g.Size())
+  
+  def test_empty(self):
+    """
+    Test Select, Rank and CountLess on an empty tree
+    """
+    
+    g = Order_Statistic_Tree()
+    
+    self.assertEqual(g.Select(1), g.nil, "Select(1) on an empty tree did not return the leaf")
+    self.assertIsNone(g.Rank(5), "Rank on an empty tree did not return None")
+    self.assertEqual(g.CountLess(5), 0, "CountLess on an empty tree did not return 0")
+  
+  def test_select(self):
+    """
+    Test the select function
+    """
+    
+    g = Order_Statistic_Tree()
+    
+    for i in np.random.permutation(range(1, 101)):
+      g.Insert(i)
+    
+    for i in range(1, 101):
+      selected = g.Select(i).key
+      self.assertEqual(selected, i, f"Select({i}) returned {selected} (Expected {i})")
+    
+    self.assertEqual(g.Select(0), g.nil, "Select(0) did not return the leaf")
+    self.assertEqual(g.Select(101), g.nil, "Select past the end of the tree did not return the leaf")
+  
+  def test_rank(self):
+    """
+    Test the rank function
+    """
+    
+    g = Order_Statistic_Tree()
+    
+    for i in np.random.permutation(range(0, 200, 2)):
+      g.Insert(i)
+    
+    for i in range(0, 200, 2):
+      rank = g.Rank(i)
+      self.assertEqual(rank, i // 2 + 1, f"Rank({i}) returned {rank} (Expected {i // 2 + 1})")
+      self.assertIsNone(g.Rank(i + 1), f"Rank({i + 1}) of a key not in the tree did not return None")
+  
+  def test_count_less(self):
+    """
+    Test the count less function, including keys not in the tree
+    """
+    
+    g = Order_Statistic_Tree()
+    
+    for i in np.random.permutation(range(0, 200, 2)):
+      g.Insert(i)
+    
+    for i in range(-1, 201):
+      count = g.CountLess(i)
+      expected = (i + 1) // 2 if i > 0 else 0
+      self.assertEqual(count, expected, f"CountLess({i}) returned {count} (Expected {expected})")
+  
+  def test_100_random(self):
+    """
+    Inserts and deletes 100 nodes in random order, verifying that sizes and
+    all 5 properties of Red Black Trees are maintained
+    """
+    
+    g = Order_Statistic_Tree()
+    
+    for i in np.random.permutation(100):
+      g.Insert(i)
+      self.test_sizes(g)
+      self.test_properties(g)
+    
+    for i in np.random.permutation(100):
+      g.Delete(i)
+      self.test_sizes(g)
+      self.test_properties(g)
+    
+    self.assertTrue(g.isEmpty())
+  
+  def test_batch(self):
+    """
+    Tests that from_sorted, InsertMany and DeleteMany maintain sizes
+    """
+    
+    g = Order_Statistic_Tree.from_sorted(range(0, 300, 3))
+    self.test_sizes(g)
+    
+    g.InsertMany(np.random.permutation(range(1, 300, 3)))
+    self.test_sizes(g)
+    self.test_properties(g)
+    
+    g.InsertMany(np.random.permutation(range(2, 300, 3)))
+    self.test_sizes(g)
+    self.test_properties(g)
+    
+    g.DeleteMany(np.random.permutation(range(0, 300, 2)))
+    self.test_sizes(g)
+    self.test_properties(g)
+    
+    for i in range(1, g.Size() + 1):
+      self.assertEqual(g.Select(i).key, 2 * i - 1)
+
+class Interval_Tree_Tests(Common_Functions):
+  """
+  Tests that an Interval Tree maintains max and answers overlap queries
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_max,
+            self.test_overlapping,
+            self.test_join_split
+            ]
+    
+    for test in tests:
+      test()
+  
+  def check_max(self, g, x):
+    """
+    Recursively verifies that every node's max is the largest high endpoint
+    in its subtree, returning it
+    """
+    
+    if x == g.nil:
+      return -INFINITY
+    
+    expected = max(x.high, self.check_max(g, x.left), self.check_max(g, x.right))
+    self.assertEqual(x.max, expected, f"Node [{x.key}, {x.high}] has max {x.max}, expected {expected}")
+    return expected
+  
+  def test_empty(self):
+    """
+    Tests queries on an empty tree and an empty interval
+    """
+    
+    g = Interval_Tree()
+    
+    self.assertEqual(list(g.overlapping(0, 10)), [])
+    self.assertFalse(g.any_overlap(0, 10))
+    self.assertRaises(ValueError, g.Insert, 5, 4)
+  
+  def test_max(self):
+    """
+    Tests that max is maintained through inserts, deletes and rotations
+    """
+    
+    g = Interval_Tree()
+    intervals = []
+    
+    for low in np.random.permutation(200):
+      low = int(low)
+      high = low + int(np.random.randint(0, 50))
+      g.Insert(low, high)
+      intervals.append((low, high))
+      self.check_max(g, g.root)
+    self.test_properties(g)
+    
+    for i in np.random.permutation(200)[:150]:
+      g.Delete(*intervals[i])
+      self.check_max(g, g.root)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Size(), 50)
+  
+  def test_overlapping(self):
+    """
+    Tests overlapping and any_overlap against a scan of every interval,
+    including intervals that share low endpoints
+    """
+    
+    g = Interval_Tree()
+    intervals = []
+    
+    for _ in range(300):
+      low = int(np.random.randint(0, 1000))
+      high = low + int(np.random.exponential(20))
+      g.Insert(low, high)
+      intervals.append((low, high))
+    
+    for _ in range(200):
+      low = int(np.random.randint(-50, 1050))
+      high = low + int(np.random.randint(0, 30))
+      expected = sorted(i for i in intervals if i[0] <= high and low <= i[1])
+      
+      self.assertEqual(sorted(g.overlapping(low, high)), expected)
+      self.assertEqual(g.any_overlap(low, high), len(expected) > 0)
+      
+      x = g.Interval_Search(low, high)
+      if expected:
+        self.assertIn((x.key, x.high), expected)
+      else:
+        self.assertEqual(x, g.nil)
+  
+  def test_join_split(self):
+    """
+    Tests that max stays correct and overlap queries still work after Join
+    and Split, including a Join of trees with different black heights
+    """
+    
+    a = Interval_Tree()
+    b = Interval_Tree()
+    for i in range(10):
+      a.Insert(i, i + 3)
+    b.Insert(100, 200)
+    
+    g = Interval_Tree.Join(a, None, b)
+    self.check_max(g, g.root)
+    self.test_properties(g)
+    self.assertEqual(g.Size(), 11)
+    self.assertEqual(sorted(g.overlapping(11, 150)), [(8, 11), (9, 12), (100, 200)])
+    
+    intervals = []
+    for low in np.random.permutation(300):
+      low = int(low)
+      intervals.append((low, low + int(np.random.randint(0, 40))))
+    
+    for split in [0, 57, 150, 299, 400]:
+      g = Interval_Tree()
+      for low, high in intervals:
+        g.Insert(low, high)
+      
+      left, right = g.Split(split)
+      for t, part in [(left, [i for i in intervals if i[0] < split]), (right, [i for i in intervals if i[0] >= split])]:
+        self.check_max(t, t.root)
+        self.test_properties(t)
+        self.assertEqual(sorted(t.overlapping(0, 1000)), sorted(part))
+      
+      g = Interval_Tree.Join(left, None, right)
+      self.check_max(g, g.root)
+      self.test_properties(g)
+      self.assertEqual(sorted(g.overlapping(100, 120)), sorted(i for i in intervals if i[0] <= 120 and 100 <= i[1]))
+
+class Red_Black_Map_Tests(Common_Functions):
+  """
+  Tests that Red Black Maps store one value per key and behave like a dict
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_set_get,
+            self.test_upsert,
+            self.test_delete,
+            self.test_setdefault,
+            self.test_items,
+            self.test_batch,
+            self.test_duplicate_keys,
+            self.test_100_random
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Tests reading from an empty map
+    """
+    
+    m = Red_Black_Map()
+    
+    self.assertTrue(m.isEmpty())
+    self.assertIsNone(m.get(5), "get on an empty map did not return None")
+    self.assertEqual(m.get(5, "default"), "default", "get on an empty map did not return the default")
+    self.assertEqual(list(m.items()), [])
+    
+    with self.assertRaises(KeyError):
+      m[5]
+    
+    with self.assertRaises(KeyError):
+      del m[5]
+  
+  def test_set_get(self):
+    """
+    Tests storing and reading values
+    """
+    
+    m = Red_Black_Map()
+    
+    for i in np.random.permutation(50):
+      m[i] = str(i)
+    
+    for i in range(50):
+      self.assertEqual(m[i], str(i), f"m[{i}] returned {m[i]} (Expected {str(i)})")
+      self.assertEqual(m.get(i), str(i), f"m.get({i}) returned {m.get(i)} (Expected {str(i)})")
+    
+    self.assertEqual(m.Size(), 50)
+  
+  def test_upsert(self):
+    """
+    Tests that storing a key that is already in the map replaces its value in
+    place instead of adding a second node
+    """
+    
+    m = Red_Black_Map()
+    
+    m[5] = "a"
+    node = m.Search(m.root, 5)
+    m[5] = "b"
+    m.Insert(5, "c")
+    
+    self.assertEqual(m.Size(), 1, "Storing a key twice added a second node")
+    self.assertIs(m.Search(m.root, 5), node, "Storing a key twice replaced its node")
+    self.assertEqual(m[5], "c")
+  
+  def test_delete(self):
+    """
+    Tests deleting keys
+    """
+    
+    m = Red_Black_Map()
+    
+    for i in range(10):
+      m[i] = i * i
+    
+    del m[3]
+    
+    self.assertEqual(m.Size(), 9)
+    self.assertIsNone(m.get(3), "Deleted key is still in the map")
+    
+    with self.assertRaises(KeyError):
+      del m[3]
+  
+  def test_setdefault(self):
+    """
+    Tests that setdefault only stores the default for keys not in the map
+    """
+    
+    m = Red_Black_Map()
+    
+    self.assertEqual(m.setdefault(1, []), [])
+    m.setdefault(1, []).append("a")
+    m.setdefault(1, []).append("b")
+    
+    self.assertEqual(m[1], ["a", "b"])
+    self.assertEqual(m.Size(), 1)
+  
+  def test_items(self):
+    """
+    Tests that items yields (key, value) pairs in sorted order of the keys
+    """
+    
+    m = Red_Black_Map()
+    
+    for i in np.random.permutation(100):
+      m[i] = -i
+    
+    self.assertEqual(list(m.items()), [(i, -i) for i in range(100)])
+  
+  def test_batch(self):
+    """
+    Tests that InsertMany only adds keys not already in the map and that
+    DeleteMany keeps the values of the remaining keys
+    """
+    
+    m = Red_Black_Map()
+    
+    for i in range(0, 100, 2):
+      m[i] = str(i)
+    
+    inserted = m.InsertMany([1, 2, 3, 3, 4, 5])
+    
+    self.assertEqual(inserted, 3, f"InsertMany returned {inserted} (Expected 3)")
+    self.assertEqual(m.Size(), 53)
+    self.assertEqual(m[2], "2", "InsertMany replaced the value of a key already in the map")
+    self.assertIsNone(m[3])
+    
+    deleted = m.DeleteMany(range(0, 100, 4))
+    
+    self.assertEqual(deleted, 25)
+    self.assertEqual(list(m.items()), sorted([(1, None), (3, None), (5, None)] + [(i, str(i)) for i in range(2, 100, 4)]))
+    self.test_bst(m)
+    self.test_properties(m)
+    
+    # A batch larger than the map is merged with its nodes
+    inserted = m.InsertMany(list(range(0, 120, 3)) * 2)
+    
+    self.assertEqual(inserted, 40 - len([i for i in range(2, 100, 4) if i % 3 == 0]) - 1)
+    self.assertEqual(m[6], "6", "InsertMany replaced the value of a key already in the map")
+    self.assertEqual(list(m), sorted(set(range(0, 120, 3)) | {1, 5} | set(range(2, 100, 4))))
+    self.test_bst(m)
+    self.test_properties(m)
+  
+  def test_duplicate_keys(self):
+    """
+    Tests that from_sorted, load, Join and a cursor's insert_here keep a
+    single node per key
+    """
+    
+    m = Red_Black_Map.from_sorted([1, 1, 2, 2, 2, 5])
+    self.assertEqual(list(m.items()), [(1, None), (2, None), (5, None)])
+    self.assertEqual(m.Size(), 3)
+    self.test_properties(m)
+    
+    m = Red_Black_Map.from_sorted([3, 1, 3, 2], sort=True)
+    self.assertEqual(list(m), [1, 2, 3])
+    self.assertRaises(ValueError, Red_Black_Map.from_sorted, [2, 2, 1])
+    
+    g = Red_Black_Tree.from_sorted([0, 1, 1, 2, 3, 3, 3, 4, 5])
+    self.test_bst(g)
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'tree.rbt')
+      g.dump(path)
+      m = Red_Black_Map.load(path, mmap=False)
+    self.assertEqual(list(m), [0, 1, 2, 3, 4, 5])
+    self.test_properties(m)
+    
+    # Equal keys at the seam: the value of the one in right wins
+    a = Red_Black_Map()
+    a[1] = 'a'
+    b = Red_Black_Map()
+    b[1] = 'b'
+    m = Red_Black_Map.Join(a, None, b)
+    self.assertEqual(list(m.items()), [(1, 'b')])
+    
+    # A pivot equal to a key keeps the key's value
+    for pivot in [49, 50]:
+      a = Red_Black_Map()
+      b = Red_Black_Map()
+      for i in range(50):
+        a[i] = -i
+      for i in range(50, 60):
+        b[i] = -i
+      m = Red_Black_Map.Join(a, pivot, b)
+      self.assertEqual(list(m.items()), [(i, -i) for i in range(60)])
+      self.assertEqual(m.Size(), 60)
+      self.test_bst(m)
+      self.test_properties(m)
+    
+    a = Red_Black_Map()
+    b = Red_Black_Map()
+    for i in range(30):
+      a[i] = 'a'
+    for i in range(29, 40):
+      b[i] = 'b'
+    m = Red_Black_Map.Join(a, 29, b)
+    self.assertEqual(m.Size(), 40)
+    self.assertEqual(m[29], 'b')
+    self.test_properties(m)
+    self.assertRaises(ValueError, Red_Black_Map.Join, Red_Black_Map.from_sorted([5]), 3, Red_Black_Map())
+    
+    m = Red_Black_Map()
+    for i in range(0, 20, 2):
+      m[i] = str(i)
+    c = m.Cursor(4)
+    x = c.insert_here(4)
+    self.assertEqual((x.key, x.value), (4, "4"))
+    self.assertEqual(c.key, 4)
+    x = c.insert_here(7)
+    self.assertIsNone(x.value)
+    self.assertEqual(list(m), sorted(list(range(0, 20, 2)) + [7]))
+    self.assertEqual(m.Size(), 11)
+    self.test_bst(m)
+    self.test_properties(m)
+  
+  def test_100_random(self):
+    """
+    Stores and deletes 100 keys in random order, verifying that all 5
+    properties of Red Black Trees are maintained
+    """
+    
+    m = Red_Black_Map()
+    
+    for i in np.random.permutation(100):
+      m[i] = i
+      self.test_bst(m)
+      self.test_properties(m)
+    
+    for i in np.random.permutation(100):
+      del m[i]
+      self.test_bst(m)
+      self.test_properties(m)
+    
+    self.assertTrue(m.isEmpty())
+
+class Red_Black_Multiset_Tests(Common_Functions):
+  """
+  Tests the counts, iteration and bulk operations of a Red_Black_Multiset
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_counts,
+            self.test_random,
+            self.test_bulk,
+            self.test_join_split,
+            self.test_cursor_and_invalid_counts
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_counts(self):
+    """
+    Tests that repeated keys share a node and are counted
+    """
+    
+    g = Red_Black_Multiset()
+    
+    for i in range(1000):
+      g.Insert(7)
+    g.Insert(3)
+    g.Insert(9, 5)
+    
+    self.assertEqual(len(g), 3)
+    self.assertEqual(g.total_size(), 1006)
+    self.assertEqual(g.count(7), 1000)
+    self.assertEqual(g.count(9), 5)
+    self.assertEqual(g.count(8), 0)
+    self.assertEqual(list(g.Range(8, None)), [9] * 5)
+    self.assertEqual(list(reversed(g))[:6], [9] * 5 + [7])
+    self.test_properties(g)
+    
+    g.Delete(7, 999)
+    self.assertEqual(g.count(7), 1)
+    self.assertEqual(len(g), 3)
+    g.Delete(7)
+    self.assertNotIn(7, g)
+    self.assertEqual(len(g), 2)
+    g.Delete(9, 100)
+    g.Delete(4)
+    self.assertEqual(list(g), [3])
+    self.assertEqual(g.total_size(), 1)
+    self.test_properties(g)
+  
+  def test_random(self):
+    """
+    Tests random inserts and deletes against a dictionary of counts
+    """
+    
+    g = Red_Black_Multiset()
+    counts = {}
+    
+    for i in np.random.randint(0, 30, 1000):
+      g.Insert(int(i))
+      counts[int(i)] = counts.get(int(i), 0) + 1
+    for i in np.random.randint(0, 30, 800):
+      g.Delete(int(i))
+      if counts.get(int(i), 0) > 0:
+        counts[int(i)] -= 1
+    
+    expected = sorted(k for k, c in counts.items() for _ in range(c))
+    self.assertEqual(list(g), expected)
+    self.assertEqual(g.total_size(), len(expected))
+    self.assertEqual(len(g), len(set(expected)))
+    self.test_properties(g)
+  
+  def test_bulk(self):
+    """
+    Tests from_sorted, InsertMany, DeleteMany and pickling
+    """
+    
+    keys = sorted(int(i) for i in np.random.randint(0, 50, 500))
+    
+    g = Red_Black_Multiset.from_sorted(keys)
+    self.assertEqual(list(g), keys)
+    self.assertEqual(len(g), len(set(keys)))
+    self.test_properties(g)
+    with self.assertRaises(ValueError):
+      Red_Black_Multiset.from_sorted([2, 1])
+    
+    # A small batch is inserted node by node, a large one by rebuilding
+    for batch in [[3, 60, 60, 3], list(range(0, 200, 2)) * 3]:
+      self.assertEqual(g.InsertMany(batch), len(batch))
+      keys = sorted(keys + batch)
+      self.assertEqual(list(g), keys)
+      self.assertEqual(g.total_size(), len(keys))
+      self.test_properties(g)
+    
+    # 60 is in the multiset 5 times: twice from the first batch and three
+    # times from the second
+    self.assertEqual(g.DeleteMany([60, 60, 60, 60, 1000]), 4)
+    for _ in range(4):
+      keys.remove(60)
+    self.assertEqual(list(g), keys)
+    self.assertEqual(g.total_size(), len(keys))
+    
+    h = pickle.loads(pickle.dumps(g))
+    self.assertEqual(list(h), keys)
+    self.assertEqual(h.total_size(), len(keys))
+    self.test_properties(h)
+  
+  def test_join_split(self):
+    """
+    Tests that Join merges equal keys at the seam and Split counts both sides
+    """
+    
+    g = Red_Black_Multiset.from_sorted([1, 2, 2, 3, 3, 3, 4])
+    
+    left, right = g.Split(3)
+    self.assertEqual(list(left), [1, 2, 2])
+    self.assertEqual(list(right), [3, 3, 3, 4])
+    self.assertEqual(left.total_size() + right.total_size(), 7)
+    self.assertEqual(g.total_size(), 0)
+    
+    left.Insert(3)
+    j = Red_Black_Multiset.Join(left, 3, right)
+    self.assertEqual(list(j), [1, 2, 2, 3, 3, 3, 3, 3, 4])
+    self.assertEqual(len(j), 4)
+    self.assertEqual(j.total_size(), 9)
+    self.test_properties(j)
+    
+    with self.assertRaises(ValueError):
+      Red_Black_Multiset.Join(Red_Black_Multiset.from_sorted([5]), 4, Red_Black_Multiset())
+  
+  def test_cursor_and_invalid_counts(self):
+    """
+    Tests that a cursor's insert_here adds to the count of a key's node and
+    that counts less than 1 are rejected
+    """
+    
+    g = Red_Black_Multiset()
+    g.Insert(1)
+    
+    x = g.Cursor(1).insert_here(1)
+    self.assertEqual((x.key, x.count), (1, 2))
+    self.assertEqual(list(g), [1, 1])
+    self.assertEqual((len(g), g.total_size()), (1, 2))
+    
+    c = g.Cursor(1)
+    for key in [5, 3, 5, 0]:
+      c.insert_here(key)
+    self.assertEqual(list(g), [0, 1, 1, 3, 5, 5])
+    self.assertEqual((len(g), g.total_size()), (4, 6))
+    self.test_properties(g)
+    
+    for count in [0, -3]:
+      self.assertRaises(ValueError, g.Insert, 5, count)
+      self.assertRaises(ValueError, g.Delete, 5, count)
+      self.assertRaises(ValueError, g.DeleteNode, g.Search(g.root, 5), count)
+    self.assertEqual(list(g), [0, 1, 1, 3, 5, 5])
+    self.assertEqual(g.total_size(), 6)
+
+class Persistent_Red_Black_Tree_Tests(Common_Functions):
+  """
+  Tests that a Persistent Red Black Tree keeps every version intact
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_insert,
+            self.test_delete,
+            self.test_versions,
+            self.test_sharing
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Tests an empty tree and deleting a key that is not in the tree
+    """
+    
+    g = Persistent_Red_Black_Tree()
+    
+    self.assertTrue(g.isEmpty())
+    self.assertEqual(list(g), [])
+    self.assertIs(g.Delete(1), g)
+    self.test_properties(g)
+  
+  def test_insert(self):
+    """
+    Tests that every version produced by Insert is a Red Black Tree
+    """
+    
+    g = Persistent_Red_Black_Tree()
+    
+    for i in np.random.permutation(200):
+      g = g.Insert(int(i))
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertEqual(g.Keys(), list(range(200)))
+    self.assertEqual(g.Size(), 200)
+  
+  def test_delete(self):
+    """
+    Tests that every version produced by Delete is a Red Black Tree
+    """
+    
+    g = Persistent_Red_Black_Tree()
+    
+    for i in np.random.permutation(200):
+      g = g.Insert(int(i))
+    
+    keys = set(range(200))
+    for i in np.random.permutation(200):
+      g = g.Delete(int(i))
+      keys.remove(int(i))
+      self.test_bst(g)
+      self.test_properties(g)
+      self.assertEqual(g.Keys(), sorted(keys))
+    
+    self.assertTrue(g.isEmpty())
+  
+  def test_versions(self):
+    """
+    Tests that old versions are unchanged by later inserts and deletes
+    """
+    
+    g = Persistent_Red_Black_Tree()
+    keys = []
+    versions = [(g, [])]
+    
+    for i in np.random.randint(0, 100, 500):
+      i = int(i)
+      if i in keys:
+        g = g.Delete(i)
+        keys.remove(i)
+      else:
+        g = g.Insert(i)
+        keys.append(i)
+      versions.append((g, sorted(keys)))
+    
+    for g, keys in versions:
+      self.assertEqual(g.Keys(), keys)
+      self.assertEqual(len(g), len(keys))
+      self.test_properties(g)
+  
+  def test_sharing(self):
+    """
+    Tests that an update only copies O(lg(n)) nodes
+    """
+    
+    g = Persistent_Red_Black_Tree()
+    
+    for i in range(1024):
+      g = g.Insert(i)
+    
+    def nodes(g):
+      found = set()
+      stack = [g.root]
+      while stack:
+        x = stack.pop()
+        if x != g.nil:
+          found.add(id(x))
+          stack.extend((x.left, x.right))
+      return found
+    
+    old = nodes(g)
+    for h in (g.Insert(500), g.Delete(500), g.Delete(0), g.Insert(2000)):
+      # A path is at most 2 lg(n + 1) = 20 nodes long, and the fixups copy
+      # at most a few siblings besides
+      copied = len(nodes(h) - old)
+      self.assertLessEqual(copied, 25, f"An update copied {copied} nodes")
+
+class Snapshot_Red_Black_Tree_Tests(Common_Functions):
+  """
+  Tests that snapshots of a Snapshot Red Black Tree never change
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_updates,
+            self.test_snapshots,
+            self.test_in_place,
+            self.test_threads
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_updates(self):
+    """
+    Tests that Insert and Delete update the tree in place
+    """
+    
+    g = Snapshot_Red_Black_Tree()
+    
+    for i in np.random.permutation(200):
+      self.assertIsNone(g.Insert(int(i)))
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    for i in np.random.permutation(200)[:100]:
+      g.Delete(int(i))
+      self.test_bst(g)
+      self.test_properties(g)
+    
+    self.assertEqual(len(g), 100)
+  
+  def test_snapshots(self):
+    """
+    Tests that every snapshot keeps the keys it was taken with
+    """
+    
+    g = Snapshot_Red_Black_Tree()
+    keys = []
+    snapshots = [(g.snapshot(), [])]
+    
+    for i in np.random.randint(0, 100, 500):
+      i = int(i)
+      if i in keys:
+        g.Delete(i)
+        keys.remove(i)
+      else:
+        g.Insert(i)
+        keys.append(i)
+      
+      if np.random.rand() < 0.2:
+        snapshots.append((g.snapshot(), sorted(keys)))
+    
+    for s, keys in snapshots:
+      self.assertEqual(s.Keys(), keys)
+      self.assertEqual(len(s), len(keys))
+      self.test_properties(s)
+    
+    # A snapshot is a persistent version, so updating it leaves the live tree
+    # alone
+    s = g.snapshot()
+    live = g.Keys()
+    self.assertEqual(s.Insert(1000).Keys(), live + [1000])
+    self.assertEqual(g.Keys(), live)
+  
+  def test_in_place(self):
+    """
+    Tests that nodes are only copied after a snapshot
+    """
+    
+    g = Snapshot_Red_Black_Tree()
+    
+    for i in range(100):
+      g.Insert(i)
+    
+    root = g.root
+    g.Insert(100)
+    g.Delete(50)
+    self.assertIs(g.root, root)
+    
+    g.snapshot()
+    g.Insert(101)
+    self.assertIsNot(g.root, root)
+  
+  def test_threads(self):
+    """
+    Tests that a reader can scan a snapshot while a writer updates the tree
+    """
+    
+    g = Snapshot_Red_Black_Tree()
+    for i in range(0, 1000, 2):
+      g.Insert(i)
+    errors = []
+    
+    def read():
+      for _ in range(20):
+        s = g.snapshot()
+        n = len(s)
+        keys = list(s)
+        if len(keys) != n or keys != sorted(keys):
+          errors.append(keys)
+    
+    def write():
+      for i in range(1, 1000, 2):
+        g.Insert(i)
+        g.Delete(i - 1)
+    
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    
+    self.assertEqual(errors, [])
+    self.assertEqual(g.Keys(), list(range(1, 1000, 2)))
+    self.test_properties(g)
+
+class Concurrent_Red_Black_Tree_Tests(Common_Functions):
+  """
+  Tests that a Concurrent Red Black Tree can be shared between readers and
+  writers
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_lock,
+            self.test_operations,
+            self.test_threads
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_lock(self):
+    """
+    Tests that readers share the lock and writers hold it alone
+    """
+    
+    lock = Readers_Writer_Lock()
+    events = []
+    
+    lock.Acquire_Read()
+    lock.Acquire_Read()
+    
+    def write():
+      with lock.Writing():
+        events.append('write')
+    
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(0.05)
+    
+    # The writer waits for both readers
+    self.assertEqual(events, [])
+    lock.Release_Read()
+    writer.join(0.05)
+    self.assertEqual(events, [])
+    lock.Release_Read()
+    writer.join()
+    self.assertEqual(events, ['write'])
+  
+  def test_operations(self):
+    """
+    Tests that the wrapper passes each operation through to the tree
+    """
+    
+    g = Concurrent_Red_Black_Tree()
+    
+    self.assertIsNone(g.Minimum())
+    self.assertEqual(g.InsertMany(range(0, 100, 2)), 50)
+    g.Insert(51)
+    g.Delete(0)
+    self.assertEqual(g.DeleteMany([2, 4, 5]), 2)
+    
+    self.assertEqual(len(g), 48)
+    self.assertIn(51, g)
+    self.assertNotIn(4, g)
+    self.assertEqual(g.Search(6).key, 6)
+    self.assertEqual(g.Minimum(), 6)
+    self.assertEqual(g.Maximum(), 98)
+    self.assertEqual(g.Range(48, 54), [48, 50, 51, 52, 54])
+    
+    with g.Batch() as t:
+      t.Insert(1)
+      t.Delete(98)
+    
+    with g.Read() as t:
+      self.test_properties(t)
+      self.assertEqual(list(g.tree), list(g))
+  
+  def test_threads(self):
+    """
+    Tests that readers always see a sorted, consistent tree while writers
+    insert and delete
+    """
+    
+    g = Concurrent_Red_Black_Tree(Red_Black_Tree.from_sorted(range(0, 1000, 2)))
+    errors = []
+    
+    def read():
+      for _ in range(50):
+        keys = list(g)
+        if keys != sorted(keys) or len(keys) < 500:
+          errors.append(keys)
+        with g.Read() as t:
+          if len(t.Keys()) != len(t):
+            errors.append('size')
+    
+    def write(seed):
+      rng = np.random.default_rng(seed)
+      for _ in range(200):
+        key = 2 * int(rng.integers(0, 500)) + 1
+        if rng.random() < 0.5:
+          
+          # Keep the keys distinct, so the BST property can be checked
+          with g.Batch() as t:
+            if t.Search(t.root, key) == t.nil:
+              t.Insert(key)
+        else:
+          g.Delete(key)
+      g.InsertMany(range(1001, 1101, 2))
+      g.DeleteMany(range(1001, 1101, 2))
+    
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    threads += [threading.Thread(target=write, args=(i,)) for i in range(2)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    
+    self.assertEqual(errors, [])
+    self.test_bst(g.tree)
+    self.test_properties(g.tree)
+
+class Retroactive_Priority_Queue_Tests(Common_Functions):
+  """
+  Tests a Retroactive Priority Queue against replaying its history
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_example,
+            self.test_invalid,
+            self.test_random
+            ]
+    
+    for test in tests:
+      test()
+  
+  def replay(self, history):
+    """
+    Replays the operations in history (a dictionary from times to inserted
+    keys, or None for DeleteMin) in order of time, returning the sorted keys
+    left in the queue, or None if a DeleteMin finds the queue empty
+    """
+    
+    heap = []
+    for t in sorted(history):
+      if history[t] is not None:
+        heapq.heappush(heap, history[t])
+      elif heap:
+        heapq.heappop(heap)
+      else:
+        return None
+    return sorted(heap)
+  
+  def test_empty(self):
+    """
+    Tests an empty queue
+    """
+    
+    q = Retroactive_Priority_Queue()
+    
+    self.assertIsNone(q.GetMin())
+    self.assertEqual(len(q), 0)
+    self.assertRaises(ValueError, q.DeleteMin, 1)
+  
+  def test_example(self):
+    """
+    Tests that changes to the past change the present
+    """
+    
+    q = Retroactive_Priority_Queue()
+    
+    q.Insert(10, 5)
+    q.Insert(20, 3)
+    q.DeleteMin(30)
+    self.assertEqual(q.GetMin(), 5)
+    
+    # With 1 in the queue from time 25, the DeleteMin at 30 takes it instead
+    q.Insert(25, 1)
+    self.assertEqual(q.GetMin(), 3)
+    
+    # A DeleteMin at 15 takes 5, so the one at 30 takes 1 and leaves 3 ...
+    q.DeleteMin(15)
+    self.assertEqual(q.GetMin(), 3)
+    self.assertEqual(len(q), 1)
+    
+    # ... and without the DeleteMin at 30, 1 is left as well
+    q.Remove(30)
+    self.assertEqual(q.GetMin(), 1)
+    self.assertEqual(len(q), 2)
+    
+    q.Remove(25)
+    q.Remove(15)
+    self.assertEqual(q.GetMin(), 3)
+    self.assertEqual(q.now.Keys(), [3, 5])
+  
+  def test_invalid(self):
+    """
+    Tests that changes that would leave a DeleteMin with an empty queue, and
+    operations at times or with keys already used, are refused
+    """
+    
+    q = Retroactive_Priority_Queue()
+    
+    q.Insert(10, 5)
+    q.DeleteMin(20)
+    
+    self.assertRaises(ValueError, q.DeleteMin, 5)
+    self.assertRaises(ValueError, q.DeleteMin, 15)
+    self.assertRaises(ValueError, q.Remove, 10)
+    self.assertRaises(ValueError, q.Remove, 12)
+    self.assertRaises(ValueError, q.Insert, 10, 7)
+    self.assertRaises(ValueError, q.Insert, 30, 5)
+    
+    # The refused changes left the queue as it was
+    self.assertIsNone(q.GetMin())
+    q.Insert(30, 7)
+    self.assertEqual(q.GetMin(), 7)
+  
+  def test_random(self):
+    """
+    Tests random changes to the past against replaying the history
+    """
+    
+    q = Retroactive_Priority_Queue()
+    history = {}
+    keys = iter(np.random.permutation(10000))
+    
+    for _ in range(500):
+      r = np.random.rand()
+      t = float(np.random.rand() * 100)
+      
+      if r < 0.45:
+        key = int(next(keys))
+        q.Insert(t, key)
+        history[t] = key
+      else:
+        if r < 0.75:
+          changed = dict(history)
+          changed[t] = None
+          change = lambda: q.DeleteMin(t)
+        elif history:
+          t = list(history)[np.random.randint(len(history))]
+          changed = dict(history)
+          del changed[t]
+          change = lambda: q.Remove(t)
+        else:
+          continue
+        
+        if self.replay(changed) is None:
+          self.assertRaises(ValueError, change)
+        else:
+          change()
+          history = changed
+      
+      expected = self.replay(history)
+      self.assertEqual(q.now.Keys(), expected)
+      self.assertEqual(q.GetMin(), expected[0] if expected else None)
+
+class Graph_Tests(Common_Functions):
+  """
+  Tests the two modes of a Graph and Dijkstra's algorithm on them
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_clrs,
+            self.test_modes,
+            self.test_errors,
+            self.test_random
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_clrs(self):
+    """
+    Tests shortest_paths on the graph in Figure 24.6 of CLRS, with vertices
+    s, t, x, y, z numbered 0 to 4
+    """
+    
+    g = Graph(5)
+    for u, v, w in [(0, 1, 10), (0, 3, 5), (1, 2, 1), (1, 3, 2), (3, 1, 3),
+                    (3, 2, 9), (3, 4, 2), (2, 4, 4), (4, 2, 6), (4, 0, 7)]:
+      g.Add_Edge(u, v, w)
+    
+    for queue in ['tree', 'heap']:
+      self.assertEqual(g.shortest_paths(0, queue), [0, 8, 9, 5, 7])
+    
+    g.freeze()
+    self.assertTrue(g.isFrozen())
+    for queue in ['tree', 'heap']:
+      self.assertEqual(g.shortest_paths(0, queue), [0, 8, 9, 5, 7])
+  
+  def test_modes(self):
+    """
+    Tests that freeze and from_edges give the same CSR arrays
+    """
+    
+    sources = np.random.randint(0, 50, 300)
+    targets = np.random.randint(0, 50, 300)
+    weights = np.random.rand(300)
+    
+    g = Graph(50)
+    for u, v, w in zip(sources, targets, weights):
+      g.Add_Edge(int(u), int(v), float(w))
+    self.assertEqual(g.Edge_Count(), 300)
+    g.freeze()
+    
+    h = Graph.from_edges(50, sources, targets, weights)
+    
+    self.assertEqual(g.Size(), 50)
+    self.assertEqual(h.Edge_Count(), 300)
+    np.testing.assert_array_equal(g.indptr, h.indptr)
+    np.testing.assert_array_equal(g.indices, h.indices)
+    np.testing.assert_array_equal(g.weights, h.weights)
+  
+  def test_errors(self):
+    """
+    Tests that bad edges, bad sources and changes to frozen graphs are
+    refused
+    """
+    
+    g = Graph(2)
+    
+    self.assertRaises(ValueError, g.Add_Edge, 0, 1, -1)
+    self.assertRaises(ValueError, g.Add_Edge, 0, 2)
+    self.assertRaises(ValueError, g.shortest_paths, 0, 'list')
+    for queue in ['tree', 'heap']:
+      self.assertRaises(ValueError, g.shortest_paths, -1, queue)
+      self.assertRaises(ValueError, g.shortest_paths, 2, queue)
+    self.assertRaises(ValueError, Graph.from_edges, 2, [0], [1], [-1])
+    self.assertRaises(ValueError, Graph.from_edges, 2, [0], [2])
+    
+    g.freeze()
+    self.assertRaises(ValueError, g.Add_Node)
+    self.assertRaises(ValueError, g.Add_Edge, 0, 1)
+    self.assertEqual(g.shortest_paths(1), [INFINITY, 0])
+  
+  def test_random(self):
+    """
+    Tests both queues against the Bellman-Ford algorithm on random graphs
+    """
+    
+    for _ in range(20):
+      n = np.random.randint(1, 40)
+      m = np.random.randint(0, 4 * n)
+      sources = np.random.randint(0, n, m)
+      targets = np.random.randint(0, n, m)
+      weights = np.random.randint(0, 10, m).astype(float)
+      
+      # Bellman-Ford (Section 24.1 of CLRS)
+      dist = [INFINITY] * n
+      dist[0] = 0
+      for _ in range(n):
+        for u, v, w in zip(sources, targets, weights):
+          dist[v] = min(dist[v], dist[u] + w)
+      
+      g = Graph.from_edges(n, sources, targets, weights)
+      self.assertEqual(g.shortest_paths(0, 'tree'), dist)
+      self.assertEqual(g.shortest_paths(0, 'heap'), dist)
+
+class Array_Red_Black_Tree_Basic(Common_Functions):
+  """
+  Tests for basic functionality of Array Red Black Trees
+  """
+  
+  def runTest(self):
+    tests = [
+            self.test_empty,
+            self.test_search,
+            self.test_min_max,
+            self.test_successor_predecessor,
+            self.test_slot_reuse,
+            self.test_copy
+            ]
+    
+    for test in tests:
+      test()
+  
+  def test_empty(self):
+    """
+    Test an empty tree that has just been initialized.
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    self.assertTrue(g.isEmpty(), "Calling isEmpty() on empty tree return False")
+    self.assertEqual(g.nil, 0, "Leaf node is not stored at index 0")
+    self.assertEqual(g.root, g.nil, "Root node in empty tree is not equal to leaf")
+    self.assertEqual(g.color[g.nil], BLACK, "Leaf node in an empty tree is not BLACK")
+    
+    g.Delete(5) # arbitrary number
+    
+    self.assertTrue(g.isEmpty(), "Deleting node in empty tree causes isEmpty to return False")
+  
+  def test_search(self):
+    """
+    Test the search function
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    for i in range(1, 11):
+      g.Insert(i)
+    
+    for i in range(1, 11):
+      search_result = g.key[g.Search(g.root, i)]
+      self.assertEqual(search_result, i, f"Searched for {i} but found {search_result}")
+    
+    self.assertEqual(g.Search(g.root, 11), g.nil, "Searching for a missing key did not return the leaf")
+  
+  def test_min_max(self):
+    """
+    Test the min and max functions
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    for i in range(10, 0, -1):
+      g.Insert(i)
+    
+    g_min = g.key[g.Minimum(g.root)]
+    self.assertEqual(g_min, 1, f"Tree minimum returned {g_min} (Expected 1)")
+    
+    g_max = g.key[g.Maximum(g.root)]
+    self.assertEqual(g_max, 10, f"Tree maximum returned {g_max} (Expected 10)")
+  
+  def test_successor_predecessor(self):
+    """
+    Test the successor and predecessor functions
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    for i in range(1, 11):
+      g.Insert(i)
+    
+    for i in range(1, 10):
+      successor = g.key[g.Successor(g.Search(g.root, i))]
+      self.assertEqual(successor, i+1, f"Successor of node with key {i} returned {successor} (Expected {i+1})")
+      
+      predecessor = g.key[g.Predecessor(g.Search(g.root, i+1))]
+      self.assertEqual(predecessor, i, f"Predecessor of node with key {i+1} returned {predecessor} (Expected {i})")
+  
+  def test_slot_reuse(self):
+    """
+    Tests that deleting nodes frees their slots for later inserts
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    for i in range(10):
+      g.Insert(i)
+    
+    num_slots = len(g.key)
+    
+    for i in range(5):
+      g.Delete(i)
+    
+    for i in range(5):
+      g.Insert(i + 10)
+    
+    self.assertEqual(len(g.key), num_slots, "Inserting after deletes did not reuse freed slots")
+    self.assertEqual(g.Size(), 10)
+    self.test_bst(g)
+    self.test_properties(g)
+  
+  def test_copy(self):
+    """
+    Tests that a copy is unaffected by later changes to the original tree
+    """
+    
+    g = Array_Red_Black_Tree()
+    
+    for i in range(10):
+      g.Insert(i)
+    
+    h = g.Copy()
+    
+    for i in range(10):
+      g.Delete(i)
+    
+    self.assertTrue(g.isEmpty())
+    self.assertEqual(h.Size(), 10)
+    
+    for i in range(10):
+      self.assertNotEqual(h.Search(h.root, i), h.nil, f"Copy lost the node with key {i}")
+    
+    self.test_bst(h)
+    self.test_properties(h)
+
+class Array_Red_Black_Tree_Advanced(Red_Black_Tree_Advanced):
+  """
+  Runs the high-level black box functionality tests on Array Red Black Trees
+  """
+  
+  Tree = Array_Red_Black_Tree
 
 if __name__ == "__main__":
   runner = unittest.TextTestRunner()